@@ -0,0 +1,147 @@
+"""
+Planificador de adquisición multi-frecuencia
+Cada tarea periódica corre en su propio hilo con su propia rejilla de plazos,
+de modo que un instrumento lento no frena a los demás
+Instituto Tecnológico Metropolitano (ITM) - Medellín, Colombia
+"""
+
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PeriodicTask:
+    """Tarea periódica: recibe el instante programado y el real (reloj monotónico)"""
+    
+    name: str
+    period: float
+    callback: Callable[[float, float], None]
+    runs: int = 0
+    missed: int = 0
+    error: Optional[BaseException] = field(default=None, repr=False)
+
+
+class MultiRateScheduler:
+    """
+    Ejecuta varias tareas periódicas durante un intervalo
+    
+    Todas las rejillas parten del mismo instante; cada tarea avanza en
+    plazos absolutos y, si una ejecución se excede, omite los plazos ya
+    vencidos en lugar de acumular retraso. Una excepción en una tarea
+    detiene el planificador y se propaga desde run().
+    """
+    
+    def __init__(self):
+        self.tasks: List[PeriodicTask] = []
+        self._stop_event = threading.Event()
+    
+    def add(
+        self,
+        name: str,
+        period: float,
+        callback: Callable[[float, float], None]
+    ) -> PeriodicTask:
+        """
+        Registra una tarea
+        
+        Args:
+            name: Nombre del flujo (hilo y estadísticas)
+            period: Periodo en segundos
+            callback: Función (programado, real) invocada en cada plazo
+            
+        Returns:
+            Tarea registrada
+        """
+        if period <= 0:
+            raise ValueError(f"Periodo inválido para '{name}': {period}")
+        task = PeriodicTask(name, period, callback)
+        self.tasks.append(task)
+        return task
+    
+    @property
+    def is_stopped(self) -> bool:
+        """Indica si se pidió detener el planificador"""
+        return self._stop_event.is_set()
+    
+    def stop(self):
+        """Detiene todas las tareas en su próxima espera"""
+        self._stop_event.set()
+    
+    def run(self, duration: float, start: Optional[float] = None):
+        """
+        Ejecuta las tareas hasta agotar el intervalo o hasta stop()
+        
+        Sin stop() no retorna antes de start + duration, aunque la última
+        ejecución programada de cada tarea ocurra antes.
+        
+        Args:
+            duration: Duración en segundos
+            start: Instante monotónico de la primera ejecución (por defecto ahora)
+        """
+        start = time.monotonic() if start is None else start
+        end = start + duration
+        
+        threads = [
+            threading.Thread(
+                target=self._run_task, args=(task, start, end), name=f"acq-{task.name}", daemon=True
+            )
+            for task in self.tasks
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        # Las tareas terminan tras su último plazo; el intervalo dura lo pedido
+        self._stop_event.wait(max(0.0, end - time.monotonic()))
+        
+        for task in self.tasks:
+            if task.error is not None:
+                raise task.error
+    
+    def _run_task(self, task: PeriodicTask, start: float, end: float):
+        """Bucle de una tarea en plazos absolutos"""
+        next_run = start
+        while next_run < end and not self._stop_event.is_set():
+            delay = next_run - time.monotonic()
+            if delay > 0 and self._stop_event.wait(delay):
+                break
+            
+            actual = time.monotonic()
+            try:
+                task.callback(next_run, actual)
+            except BaseException as e:
+                logger.error(f"Tarea de adquisición '{task.name}' falló: {e}")
+                task.error = e
+                self.stop()
+                break
+            task.runs += 1
+            
+            next_run += task.period
+            now = time.monotonic()
+            if next_run < now:
+                missed = math.ceil((now - next_run) / task.period)
+                next_run += missed * task.period
+                task.missed += missed
+                logger.warning(
+                    f"'{task.name}': ejecución de {now - actual:.2f}s excede el periodo; "
+                    f"{missed} plazo(s) omitido(s)"
+                )
+    
+    def stats(self) -> Dict[str, dict]:
+        """
+        Estadísticas por tarea
+        
+        Returns:
+            Diccionario nombre -> periodo, ejecuciones y plazos omitidos
+        """
+        return {
+            task.name: {"period": task.period, "runs": task.runs, "missed": task.missed}
+            for task in self.tasks
+        }
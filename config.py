@@ -7,6 +7,38 @@ Proyecto: Sistema de Control para Laboratorio de Investigación Térmica
 import os
 from pathlib import Path
 
+
+def _parse_int_list(value, default):
+    """Convierte "0,1,2" en [0, 1, 2]; devuelve default si la variable no está definida"""
+    if not value:
+        return default
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def _parse_xln_supplies(value, default_host, default_port):
+    """
+    Convierte "calentador1=192.168.1.150:5024,calentador2=192.168.1.151" en
+    {"calentador1": ("192.168.1.150", 5024), "calentador2": ("192.168.1.151", default_port)}
+    """
+    supplies = {}
+    for item in value.split(","):
+        if item.strip():
+            name, _, address = item.strip().partition("=")
+            host, _, port = address.partition(":")
+            supplies[name.strip()] = (host.strip() or default_host, int(port or default_port))
+    return supplies or {"principal": (default_host, default_port)}
+
+
+def _parse_daq_devices(value):
+    """Convierte "SERIAL_A:8,SERIAL_B:8" en [("SERIAL_A", 8), ("SERIAL_B", 8)]"""
+    devices = []
+    for item in value.split(","):
+        if item.strip():
+            serial, _, channels = item.strip().partition(":")
+            devices.append((serial, int(channels or 8)))
+    return devices
+
+
 # Directorios del proyecto
 BASE_DIR = Path(__file__).parent
 LOGS_DIR = BASE_DIR / "logs"
@@ -27,18 +59,75 @@ FLASK_DEBUG = os.getenv("FLASK_DEBUG", "False").lower() == "true"
 XLN_HOST = os.getenv("XLN_HOST", "192.168.1.150")
 XLN_PORT = int(os.getenv("XLN_PORT", 5024))
 XLN_TIMEOUT = 10
+# Fuentes con nombre "nombre=host:puerto,..."; la primera es la principal
+# (experimentos y /api/fuente/*)
+XLN_SUPPLIES = _parse_xln_supplies(os.getenv("XLN_SUPPLIES", ""), XLN_HOST, XLN_PORT)
 XLN_VOLTAGE_MAX = 300.0
 XLN_CURRENT_MAX = 5.2
 XLN_OVP = 310.0
 XLN_OCP = 5.5
 XLN_OPP = 1600.0
+# Sondeo de vida tras inactividad (s)
+XLN_PROBE_INTERVAL = float(os.getenv("XLN_PROBE_INTERVAL", 5.0))
+# Primer reintento de reconexión (s)
+XLN_BACKOFF_INITIAL = float(os.getenv("XLN_BACKOFF_INITIAL", 1.0))
+XLN_BACKOFF_MAX = float(os.getenv("XLN_BACKOFF_MAX", 60.0))
+# Fallas consecutivas para abrir el circuito
+XLN_FAILURE_THRESHOLD = int(os.getenv("XLN_FAILURE_THRESHOLD", 3))
+# Vigencia de consignas/salida en memoria (s); 0 = sin caché
+XLN_STATE_TTL = float(os.getenv("XLN_STATE_TTL", 5.0))
+# Actualizaciones de consigna por segundo en rampas
+XLN_RAMP_RATE = float(os.getenv("XLN_RAMP_RATE", 10.0))
+# Lectura de verificación durante rampas (s)
+XLN_RAMP_VERIFY_INTERVAL = float(os.getenv("XLN_RAMP_VERIFY_INTERVAL", 1.0))
+# Sondeo de STAT:QUES:COND? (s); peor caso de detección: intervalo + XLN_TIMEOUT + 2 s
+XLN_PROTECTION_INTERVAL = float(os.getenv("XLN_PROTECTION_INTERVAL", 0.2))
+# Apagar bomba ante disparo
+PROTECTION_PUMP_OFF = os.getenv("PROTECTION_PUMP_OFF", "True").lower() == "true"
 
 # Configuración DAQ USB-5203
 DAQ_TIMEOUT = 10
-DAQ_CHANNELS = 8
+# Varios módulos USB-5203: "SERIAL_A:8,SERIAL_B:8" (vacío = un solo dispositivo)
+DAQ_DEVICES = _parse_daq_devices(os.getenv("DAQ_DEVICES", ""))
+DAQ_CHANNELS = sum(channels for _, channels in DAQ_DEVICES) if DAQ_DEVICES else 8
 DAQ_TEMP_MIN = -270.0
 DAQ_TEMP_MAX = 2000.0
 DAQ_THERMOCOUPLE_TYPE = "K"
+# Backend CLI: comando de escaneo en un proceso ({channels}, {tc_type}, {serial}), p. ej.
+# "python3 daq_usb5203.py --channels {channels} --type {tc_type}"; vacío = bucle por canal
+DAQ_SCAN_COMMAND = os.getenv("DAQ_SCAN_COMMAND") or None
+# Backend de adquisición: "usb" (sesión pyusb persistente) o "cli" (test-usb5203)
+DAQ_BACKEND = os.getenv("DAQ_BACKEND", "usb")
+# Modo del backend CLI: "batch" (un comando) o "concurrent" (pool con plazo global)
+DAQ_READ_MODE = os.getenv("DAQ_READ_MODE", "batch")
+DAQ_MAX_WORKERS = int(os.getenv("DAQ_MAX_WORKERS", 4))
+DAQ_SCAN_DEADLINE = float(os.getenv("DAQ_SCAN_DEADLINE", 5.0))
+# Muestreo en segundo plano: periodo en segundos y escaneos retenidos en el buffer circular
+DAQ_SAMPLE_PERIOD = float(os.getenv("DAQ_SAMPLE_PERIOD", 1.0))
+DAQ_BUFFER_SIZE = int(os.getenv("DAQ_BUFFER_SIZE", 3600))
+# Modo continuo: escaneos por bloque y bloques preasignados en el pool
+DAQ_STREAM_BLOCK_SIZE = int(os.getenv("DAQ_STREAM_BLOCK_SIZE", 32))
+DAQ_STREAM_POOL_BLOCKS = int(os.getenv("DAQ_STREAM_POOL_BLOCKS", 64))
+# Filtrado por canal: cadena por defecto ("median:5|ema:0.3") y por canal
+# ("0=median:3;4=moving_average:8")
+DAQ_FILTERS = os.getenv("DAQ_FILTERS", "")
+DAQ_CHANNEL_FILTERS = os.getenv("DAQ_CHANNEL_FILTERS", "")
+# Escaneos consecutivos promediados por muestra
+DAQ_OVERSAMPLE = int(os.getenv("DAQ_OVERSAMPLE", 1))
+# Salud de termopares: rango de operación esperado, escaneos para "congelado" y
+# umbral de ruido (°C RMS)
+DAQ_HEALTH_TEMP_MIN = float(os.getenv("DAQ_HEALTH_TEMP_MIN", -50.0))
+DAQ_HEALTH_TEMP_MAX = float(os.getenv("DAQ_HEALTH_TEMP_MAX", 500.0))
+DAQ_HEALTH_STUCK_SAMPLES = int(os.getenv("DAQ_HEALTH_STUCK_SAMPLES", 30))
+DAQ_HEALTH_NOISE_THRESHOLD = float(os.getenv("DAQ_HEALTH_NOISE_THRESHOLD", 2.0))
+
+# Modo simulación: fuente, DAQ y relés simulados con modelo térmico
+SIMULATION = os.getenv("LABPIPANEL_SIMULATION", "False").lower() == "true"
+SIM_LATENCY = float(os.getenv("SIM_LATENCY", 0.0))
+SIM_JITTER = float(os.getenv("SIM_JITTER", 0.0))
+SIM_FAILURE_RATE = float(os.getenv("SIM_FAILURE_RATE", 0.0))
+SIM_SEED = int(os.getenv("SIM_SEED")) if os.getenv("SIM_SEED") else None
+SIM_TIME_SCALE = float(os.getenv("SIM_TIME_SCALE", 1.0))
 
 # Configuración de relés (GPIO BCM - Activos en BAJO)
 RELAY_PINS = {
@@ -52,10 +141,35 @@ RELAY_PINS = {
 EXPERIMENT_POWER_LEVELS = [1.0, 2.0, 3.0]  # Watios
 EXPERIMENT_DURATION_PER_LEVEL = 600  # 10 minutos en segundos
 EXPERIMENT_SAMPLE_RATE = 60  # 1 lectura por minuto
+EXPERIMENT_RAMP_TIME = 0.0  # Rampa de voltaje al inicio de cada nivel (s); 0 = escalón
+# Periodo propio de cada flujo de adquisición (s); None = EXPERIMENT_SAMPLE_RATE
+EXPERIMENT_TEMPERATURE_RATE = None
+EXPERIMENT_ELECTRICAL_RATE = None
+EXPERIMENT_PROTECTION_RATE = 1.0
+# Avance de nivel por régimen estacionario (EXPERIMENT_DURATION_PER_LEVEL pasa a ser la
+# permanencia máxima)
+EXPERIMENT_STEADY_STATE = False
+EXPERIMENT_STEADY_WINDOW = 120.0  # Ventana de evaluación (s)
+EXPERIMENT_STEADY_SLOPE = 0.05  # Pendiente máxima de temperaturas promedio (°C/min)
+EXPERIMENT_STEADY_STD = None  # Desviación estándar máxima (°C); None = no se evalúa
+EXPERIMENT_MIN_HOLD = 120.0  # Permanencia mínima por nivel (s)
+# Periodo de evaluación del régimen sobre temperaturas filtradas (s); None = DAQ_SAMPLE_PERIOD
+EXPERIMENT_STEADY_RATE = None
+EXPERIMENT_STEADY_MIN_SAMPLES = 10  # Muestras mínimas en la ventana
+
+# Escritura diferida de resultados: volcado cada N filas o T segundos (lo primero)
+RESULTS_FLUSH_ROWS = int(os.getenv("RESULTS_FLUSH_ROWS", 50))
+RESULTS_FLUSH_INTERVAL = float(os.getenv("RESULTS_FLUSH_INTERVAL", 5.0))
+RESULTS_FSYNC = os.getenv("RESULTS_FSYNC", "True").lower() == "true"
+# "csv" (texto) o "binary" (registros float64 .lpr; convertir con results_binary.py)
+RESULTS_FORMAT = os.getenv("RESULTS_FORMAT", "csv")
+# "split" (una fila por muestra de cada flujo, columna stream) o "merged" (columnas
+# anteriores sin stream, último valor conocido de cada flujo en cada fila)
+RESULTS_LAYOUT = os.getenv("RESULTS_LAYOUT", "split")
 
 # Canales de termopares
-EVAPORATOR_CHANNELS = [0, 1, 2, 3]
-CONDENSER_CHANNELS = [4, 5, 6, 7]
+EVAPORATOR_CHANNELS = _parse_int_list(os.getenv("EVAPORATOR_CHANNELS"), [0, 1, 2, 3])
+CONDENSER_CHANNELS = _parse_int_list(os.getenv("CONDENSER_CHANNELS"), [4, 5, 6, 7])
 
 # Configuración de logging
 LOG_FILE = LOGS_DIR / "app.log"
@@ -0,0 +1,239 @@
+"""
+Filtros digitales por canal para el flujo de muestras del DAQ
+Media móvil, mediana (rechazo de picos) y suavizado exponencial vectorizados
+Instituto Tecnológico Metropolitano (ITM) - Medellín, Colombia
+"""
+
+import abc
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+logger = logging.getLogger(__name__)
+
+
+class SampleFilter:
+    """Filtro con estado que procesa bloques muestras x canales"""
+    
+    name = "identity"
+    
+    def reset(self):
+        """Descarta el historial acumulado"""
+    
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """
+        Filtra un bloque de muestras
+        
+        Args:
+            block: Arreglo (muestras, canales) con NaN para lecturas inválidas
+            
+        Returns:
+            Arreglo filtrado de la misma forma
+        """
+        return block
+
+
+class _WindowFilter(SampleFilter, abc.ABC):
+    """Base para filtros de ventana deslizante que conservan la cola del bloque anterior"""
+    
+    def __init__(self, window: int):
+        """
+        Args:
+            window: Número de muestras de la ventana
+        """
+        if window < 1:
+            raise ValueError("La ventana del filtro debe ser al menos 1")
+        self.window = window
+        self._tail: Optional[np.ndarray] = None
+    
+    def reset(self):
+        self._tail = None
+    
+    @abc.abstractmethod
+    def _reduce(self, windows: np.ndarray) -> np.ndarray:
+        """Reduce el último eje (ventana) de un arreglo muestras x canales x ventana"""
+    
+    def process(self, block: np.ndarray) -> np.ndarray:
+        if self._tail is None or self._tail.shape[1] != block.shape[1]:
+            self._tail = np.full((self.window - 1, block.shape[1]), np.nan)
+        
+        extended = np.vstack([self._tail, block])
+        keep = self.window - 1
+        self._tail = extended[len(extended) - keep:].copy() if keep else extended[:0].copy()
+        
+        windows = sliding_window_view(extended, self.window, axis=0)
+        with np.errstate(invalid="ignore"):
+            return self._reduce(windows)
+
+
+class MovingAverageFilter(_WindowFilter):
+    """Media móvil de N muestras (ignora NaN)"""
+    
+    name = "moving_average"
+    
+    def _reduce(self, windows: np.ndarray) -> np.ndarray:
+        counts = (~np.isnan(windows)).sum(axis=-1)
+        sums = np.nansum(windows, axis=-1)
+        return np.divide(sums, counts, out=np.full(sums.shape, np.nan), where=counts > 0)
+
+
+class MedianFilter(_WindowFilter):
+    """Mediana de N muestras para rechazo de picos (ignora NaN)"""
+    
+    name = "median"
+    
+    def _reduce(self, windows: np.ndarray) -> np.ndarray:
+        filled = np.where(np.isnan(windows), np.inf, windows)
+        ordered = np.sort(filled, axis=-1)
+        counts = (~np.isnan(windows)).sum(axis=-1)
+        low_index = np.maximum((counts - 1) // 2, 0)[..., None]
+        high_index = np.maximum(counts // 2, 0)[..., None]
+        low = np.take_along_axis(ordered, low_index, axis=-1)[..., 0]
+        high = np.take_along_axis(ordered, high_index, axis=-1)[..., 0]
+        return np.where(counts > 0, (low + high) / 2, np.nan)
+
+
+class ExponentialFilter(SampleFilter):
+    """Suavizado exponencial y[n] = alpha * x[n] + (1 - alpha) * y[n-1]"""
+    
+    name = "ema"
+    
+    def __init__(self, alpha: float):
+        """
+        Args:
+            alpha: Factor de suavizado en (0, 1]; menor = más suave
+        """
+        if not (0 < alpha <= 1):
+            raise ValueError("alpha debe estar en (0, 1]")
+        self.alpha = alpha
+        self._state: Optional[np.ndarray] = None
+    
+    def reset(self):
+        self._state = None
+    
+    def process(self, block: np.ndarray) -> np.ndarray:
+        if self._state is None or self._state.shape[0] != block.shape[1]:
+            self._state = np.full(block.shape[1], np.nan)
+        
+        result = np.empty_like(block, dtype=np.float64)
+        state = self._state
+        for i, row in enumerate(block):
+            valid = ~np.isnan(row)
+            first = valid & np.isnan(state)
+            state = np.where(first, row, state)
+            state = np.where(valid & ~first, self.alpha * row + (1 - self.alpha) * state, state)
+            result[i] = np.where(valid, state, np.nan)
+        
+        self._state = state
+        return result
+
+
+FILTER_TYPES = {
+    "moving_average": lambda arg: MovingAverageFilter(int(arg)),
+    "median": lambda arg: MedianFilter(int(arg)),
+    "ema": lambda arg: ExponentialFilter(float(arg))
+}
+
+
+def parse_filter_chain(spec: str) -> List[SampleFilter]:
+    """
+    Construye una cadena de filtros desde texto
+    
+    Args:
+        spec: Filtros separados por "|" en orden de aplicación, p. ej. "median:5|ema:0.3"
+        
+    Returns:
+        Lista de filtros (vacía si spec está vacío)
+    """
+    chain = []
+    for item in spec.split("|"):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, arg = item.partition(":")
+        if name not in FILTER_TYPES:
+            raise ValueError(f"Filtro desconocido '{name}'. Opciones: {list(FILTER_TYPES)}")
+        chain.append(FILTER_TYPES[name](arg))
+    return chain
+
+
+def parse_channel_filters(spec: str) -> Dict[int, str]:
+    """
+    Interpreta filtros por canal
+    
+    Args:
+        spec: "0=median:5|ema:0.3;4=moving_average:8"
+        
+    Returns:
+        Diccionario canal -> especificación de cadena
+    """
+    result = {}
+    for item in spec.split(";"):
+        if item.strip():
+            channel, _, chain = item.partition("=")
+            result[int(channel)] = chain.strip()
+    return result
+
+
+class FilterBank:
+    """Cadenas de filtros por canal aplicadas a bloques muestras x canales"""
+    
+    def __init__(
+        self,
+        num_channels: int,
+        default_spec: str = "",
+        channel_specs: Optional[Dict[int, str]] = None
+    ):
+        """
+        Inicializa el banco de filtros
+        
+        Args:
+            num_channels: Número de canales del bloque
+            default_spec: Cadena aplicada a los canales sin configuración propia
+            channel_specs: Diccionario canal -> especificación propia
+        """
+        channel_specs = channel_specs or {}
+        specs = [channel_specs.get(ch, default_spec) for ch in range(num_channels)]
+        
+        # Los canales con la misma cadena se filtran juntos en una sola operación vectorizada
+        self.groups = []
+        for spec in dict.fromkeys(specs):
+            indices = np.array([ch for ch, s in enumerate(specs) if s == spec])
+            self.groups.append((spec, indices, parse_filter_chain(spec)))
+        
+        self.num_channels = num_channels
+        self.active = any(chain for _, _, chain in self.groups)
+        
+        if self.active:
+            chains = [(spec, idx.tolist()) for spec, idx, _ in self.groups if spec]
+            logger.info(f"Banco de filtros DAQ: {chains}")
+    
+    def reset(self):
+        """Reinicia el estado de todos los filtros"""
+        for _, _, chain in self.groups:
+            for sample_filter in chain:
+                sample_filter.reset()
+    
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """
+        Filtra un bloque completo
+        
+        Args:
+            block: Arreglo (muestras, canales)
+            
+        Returns:
+            Arreglo filtrado de la misma forma
+        """
+        block = np.atleast_2d(np.asarray(block, dtype=np.float64))
+        if not self.active:
+            return block.copy()
+        
+        result = np.empty_like(block)
+        for _, indices, chain in self.groups:
+            values = block[:, indices]
+            for sample_filter in chain:
+                values = sample_filter.process(values)
+            result[:, indices] = values
+        return result
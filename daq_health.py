@@ -0,0 +1,192 @@
+"""
+Seguimiento incremental de la salud de los termopares
+Actualiza el estado de cada canal con cada escaneo que ya pasa por el DAQ
+Instituto Tecnológico Metropolitano (ITM) - Medellín, Colombia
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from daq_usb5203 import CHANNEL_INVALID, CHANNEL_NO_RESPONSE, CHANNEL_TIMEOUT, CHANNEL_ERROR
+
+logger = logging.getLogger(__name__)
+
+HEALTH_OK = "ok"
+HEALTH_OPEN = "open"
+HEALTH_OUT_OF_RANGE = "out_of_range"
+HEALTH_STUCK = "stuck"
+HEALTH_NOISY = "noisy"
+HEALTH_NO_RESPONSE = "no_response"
+HEALTH_TIMEOUT = "timeout"
+HEALTH_ERROR = "error"
+HEALTH_UNKNOWN = "unknown"
+HEALTH_STATES = (
+    HEALTH_OK, HEALTH_OPEN, HEALTH_OUT_OF_RANGE, HEALTH_STUCK, HEALTH_NOISY,
+    HEALTH_NO_RESPONSE, HEALTH_TIMEOUT, HEALTH_ERROR, HEALTH_UNKNOWN
+)
+
+(_OK, _OPEN, _OUT_OF_RANGE, _STUCK, _NOISY,
+ _NO_RESPONSE, _TIMEOUT, _ERROR, _UNKNOWN) = range(len(HEALTH_STATES))
+
+# Estado de salud de un canal sin lectura según su estado de escaneo: sólo
+# una lectura fuera del rango físico (saturada) indica un termopar abierto
+_INVALID_STATE = {
+    CHANNEL_INVALID: _OPEN,
+    CHANNEL_NO_RESPONSE: _NO_RESPONSE,
+    CHANNEL_TIMEOUT: _TIMEOUT,
+    CHANNEL_ERROR: _ERROR
+}
+
+
+class ChannelHealthTracker:
+    """
+    Estado ok/open/out_of_range/stuck/noisy por canal, actualizado en O(canales) por escaneo
+    
+    Los canales sin lectura quedan como open, no_response, timeout o error
+    según el estado que el escaneo reporta para cada uno.
+    """
+    
+    def __init__(
+        self,
+        num_channels: int,
+        temp_min: float = -50.0,
+        temp_max: float = 500.0,
+        stuck_samples: int = 30,
+        stuck_tolerance: float = 0.001,
+        noise_threshold: float = 2.0,
+        noise_alpha: float = 0.1
+    ):
+        """
+        Inicializa el seguimiento de salud
+        
+        Args:
+            num_channels: Número de canales (lógicos) del DAQ
+            temp_min: Temperatura mínima de operación esperada (°C)
+            temp_max: Temperatura máxima de operación esperada (°C)
+            stuck_samples: Escaneos con el mismo valor para declarar un canal congelado
+            stuck_tolerance: Diferencia máxima (°C) considerada "mismo valor"
+            noise_threshold: Desviación RMS entre escaneos consecutivos (°C) para declarar ruido
+            noise_alpha: Factor de la media exponencial de la varianza de diferencias
+        """
+        self.num_channels = num_channels
+        self.temp_min = temp_min
+        self.temp_max = temp_max
+        self.stuck_samples = stuck_samples
+        self.stuck_tolerance = stuck_tolerance
+        self.noise_threshold = noise_threshold
+        self.noise_alpha = noise_alpha
+        
+        self._state = np.full(num_channels, _UNKNOWN, dtype=np.int8)
+        self._last = np.full(num_channels, np.nan)
+        self._same_count = np.zeros(num_channels, dtype=np.int64)
+        self._diff_var = np.zeros(num_channels)
+        self._last_update: Optional[float] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def has_data(self) -> bool:
+        """Indica si ya se procesó al menos un escaneo"""
+        return self._last_update is not None
+    
+    def update(self, snapshot) -> None:
+        """
+        Incorpora un escaneo al estado de los canales
+        
+        Args:
+            snapshot: DAQSnapshot con canales, valores, máscara de validez y estado
+        """
+        channels = np.array(snapshot.channels, dtype=np.int64)
+        in_range = (channels >= 0) & (channels < self.num_channels)
+        if not in_range.any():
+            return
+        
+        idx = channels[in_range]
+        values = np.asarray(snapshot.values)[in_range]
+        valid = np.asarray(snapshot.valid)[in_range]
+        invalid_state = np.array(
+            [_INVALID_STATE.get(status, _NO_RESPONSE) for status in snapshot.status],
+            dtype=np.int8
+        )[in_range]
+        
+        with self._lock:
+            last = self._last[idx]
+            has_last = valid & ~np.isnan(last)
+            diff = np.where(has_last, values - last, 0.0)
+            
+            same = has_last & (np.abs(diff) <= self.stuck_tolerance)
+            self._same_count[idx] = np.where(same, self._same_count[idx] + 1, 0)
+            
+            diff_var = self._diff_var[idx]
+            self._diff_var[idx] = np.where(
+                has_last,
+                (1 - self.noise_alpha) * diff_var + self.noise_alpha * diff * diff,
+                diff_var
+            )
+            
+            self._last[idx] = np.where(valid, values, np.nan)
+            
+            state = np.full(idx.shape, _OK, dtype=np.int8)
+            state[np.sqrt(self._diff_var[idx]) > self.noise_threshold] = _NOISY
+            state[self._same_count[idx] >= self.stuck_samples] = _STUCK
+            state[valid & ((values < self.temp_min) | (values > self.temp_max))] = _OUT_OF_RANGE
+            state[~valid] = invalid_state[~valid]
+            
+            changed = idx[self._state[idx] != state]
+            self._state[idx] = state
+            self._last_update = (
+                snapshot.timestamp if snapshot.timestamp is not None else time.time()
+            )
+        
+        for channel in changed:
+            new_state = HEALTH_STATES[self._state[channel]]
+            if new_state != HEALTH_OK:
+                logger.warning(f"Canal {channel}: estado de termopar {new_state}")
+            else:
+                logger.info(f"Canal {channel}: termopar recuperado")
+    
+    def state(self, channel: int) -> str:
+        """Estado actual de un canal"""
+        if not (0 <= channel < self.num_channels):
+            return HEALTH_UNKNOWN
+        return HEALTH_STATES[self._state[channel]]
+    
+    def states(self) -> Dict[int, str]:
+        """Diccionario canal -> estado"""
+        with self._lock:
+            codes = self._state.copy()
+        return {ch: HEALTH_STATES[code] for ch, code in enumerate(codes)}
+    
+    def open_channels(self) -> List[int]:
+        """Canales con termopar abierto (lectura saturada) según el último escaneo"""
+        with self._lock:
+            return [int(ch) for ch in np.flatnonzero(self._state == _OPEN)]
+    
+    def summary(self) -> dict:
+        """
+        Resumen de salud para la API
+        
+        Returns:
+            Diccionario con estado global, conteos y estado por canal
+        """
+        states = self.states()
+        counts = {name: 0 for name in HEALTH_STATES}
+        for name in states.values():
+            counts[name] += 1
+        
+        if not self.has_data:
+            overall = HEALTH_UNKNOWN
+        elif counts[HEALTH_OK] == self.num_channels:
+            overall = HEALTH_OK
+        else:
+            overall = "degraded"
+        
+        return {
+            "overall": overall,
+            "last_update": self._last_update,
+            "counts": {name: count for name, count in counts.items() if count},
+            "channels": states
+        }
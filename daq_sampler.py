@@ -0,0 +1,421 @@
+"""
+Muestreador en segundo plano para el DAQ USB-5203
+Un único hilo de adquisición escribe en un buffer circular compartido
+y, en modo continuo, llena un pool NumPy preasignado del que los
+suscriptores reciben copias de cada bloque
+Instituto Tecnológico Metropolitano (ITM) - Medellín, Colombia
+"""
+
+import logging
+import threading
+import time
+from typing import Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from daq_usb5203 import DAQUSB5203, DAQDeviceGroup, DAQSnapshot, CHANNEL_OK, CHANNEL_STATUSES
+from daq_filters import FilterBank
+
+logger = logging.getLogger(__name__)
+
+
+class StreamSubscription:
+    """Suscripción a los bloques del modo continuo de un DAQSampler"""
+    
+    def __init__(self, sampler: "DAQSampler", next_block: int):
+        """
+        Inicializa la suscripción
+        
+        Args:
+            sampler: Muestreador que publica los bloques
+            next_block: Número de secuencia del primer bloque a entregar
+        """
+        self.sampler = sampler
+        self.next_block = next_block
+        self.overruns = 0
+        self.closed = False
+    
+    def get(self, timeout: Optional[float] = None) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Espera el siguiente bloque completo
+        
+        Los arreglos devueltos son copias del bloque tomadas bajo el lock: el
+        pool preasignado se reutiliza cuando da la vuelta y una vista podría
+        cambiar mientras el consumidor la lee.
+        
+        Args:
+            timeout: Tiempo máximo de espera en segundos (None = indefinido)
+            
+        Returns:
+            Tupla (timestamps[block_size], valores[block_size, canales]) o None
+            si se agotó el tiempo o la suscripción se cerró
+        """
+        return self.sampler._next_block(self, timeout)
+    
+    def close(self):
+        """Cierra la suscripción y despierta a quien espere en get()"""
+        self.closed = True
+        self.sampler._unsubscribe(self)
+    
+    def __iter__(self) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Itera bloques hasta que se cierre la suscripción o termine el modo continuo"""
+        while not self.closed:
+            block = self.get()
+            if block is None:
+                break
+            yield block
+
+
+class DAQSampler:
+    """Hilo de adquisición que llena un buffer circular con escaneos completos del DAQ"""
+    
+    def __init__(
+        self,
+        daq: Union[DAQUSB5203, DAQDeviceGroup],
+        period: float = 1.0,
+        capacity: int = 3600,
+        block_size: int = 32,
+        pool_blocks: int = 64,
+        filters: Optional[FilterBank] = None,
+        oversample: int = 1
+    ):
+        """
+        Inicializa el muestreador
+        
+        Args:
+            daq: DAQUSB5203 o DAQDeviceGroup (único cliente del hardware)
+            period: Intervalo entre escaneos en segundos
+            capacity: Número de escaneos que conserva el buffer circular
+            block_size: Escaneos por bloque en modo continuo
+            pool_blocks: Bloques preasignados del pool en modo continuo
+            filters: Banco de filtros por canal (None = sin filtrado)
+            oversample: Escaneos consecutivos promediados en cada muestra
+        """
+        if period <= 0:
+            raise ValueError("El periodo de muestreo debe ser mayor que cero")
+        if capacity <= 0:
+            raise ValueError("La capacidad del buffer debe ser mayor que cero")
+        if oversample < 1:
+            raise ValueError("El sobremuestreo debe ser al menos 1")
+        
+        self.daq = daq
+        self.period = period
+        self.capacity = capacity
+        self.num_channels = daq.num_channels
+        self.filters = filters
+        self.oversample = oversample
+        
+        self._timestamps = np.zeros(capacity, dtype=np.float64)
+        self._values = np.full((capacity, self.num_channels), np.nan, dtype=np.float64)
+        self._filtered = np.full((capacity, self.num_channels), np.nan, dtype=np.float64)
+        self._status = np.zeros((capacity, self.num_channels), dtype=np.int8)
+        self._index = 0
+        self._count = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        
+        self.block_size = block_size
+        self.pool_blocks = pool_blocks
+        self._block_times = np.zeros((pool_blocks, block_size), dtype=np.float64)
+        self._block_values = np.full(
+            (pool_blocks, block_size, self.num_channels), np.nan, dtype=np.float64
+        )
+        self._blocks_published = 0
+        self._block_fill = 0
+        self._streaming = False
+        self._stream_started: Optional[float] = None
+        self._stream_scans = 0
+        self._subscribers: List[StreamSubscription] = []
+        self._block_ready = threading.Condition(self._lock)
+        
+        logger.info(f"DAQSampler inicializado: periodo {period}s, buffer de {capacity} escaneos")
+    
+    @property
+    def is_running(self) -> bool:
+        """Indica si el hilo de adquisición está activo"""
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self):
+        """Inicia el hilo de adquisición"""
+        if self.is_running:
+            return
+        
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="daq-sampler", daemon=True)
+        self._thread.start()
+        logger.info("Muestreo DAQ en segundo plano iniciado")
+    
+    def stop(self, timeout: Optional[float] = None):
+        """Detiene el hilo de adquisición"""
+        self.stop_streaming()
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+            logger.info("Muestreo DAQ en segundo plano detenido")
+    
+    def _run(self):
+        """Bucle de adquisición con plazos absolutos sobre reloj monotónico"""
+        next_deadline = time.monotonic()
+        
+        while not self._stop_event.is_set():
+            try:
+                self.acquire()
+            except Exception as e:
+                logger.error(f"Error en muestreo DAQ: {e}")
+            
+            if self._streaming:
+                # Modo continuo: el ritmo lo marca el tiempo de conversión del dispositivo
+                next_deadline = time.monotonic()
+                continue
+            
+            next_deadline += self.period
+            now = time.monotonic()
+            if next_deadline < now:
+                next_deadline = now
+            self._stop_event.wait(next_deadline - now)
+    
+    def _read_oversampled(self) -> Tuple[DAQSnapshot, np.ndarray]:
+        """
+        Realiza oversample escaneos consecutivos
+        
+        Returns:
+            Tupla (snapshot con la media de los escaneos, bloque escaneos x canales)
+        """
+        scans = [self.daq.read_snapshot() for _ in range(self.oversample)]
+        if len(scans) == 1:
+            return scans[0], scans[0].values[np.newaxis, :]
+        
+        block = np.vstack([scan.values for scan in scans])
+        valid_counts = (~np.isnan(block)).sum(axis=0)
+        sums = np.nansum(block, axis=0)
+        mean = np.divide(
+            sums, valid_counts, out=np.full(sums.shape, np.nan), where=valid_counts > 0
+        )
+        
+        status = [
+            CHANNEL_OK if count > 0 else last_status
+            for count, last_status in zip(valid_counts, scans[-1].status)
+        ]
+        timestamp = sum(scan.timestamp for scan in scans) / len(scans)
+        return DAQSnapshot.from_array(scans[-1].channels, mean, timestamp, status), block
+    
+    def acquire(self) -> DAQSnapshot:
+        """
+        Ejecuta un escaneo (sobremuestreado) y lo guarda en el buffer
+        
+        Los escaneos individuales pasan por el banco de filtros como un bloque;
+        el buffer guarda el valor crudo promediado y el último valor filtrado.
+        
+        Returns:
+            Snapshot crudo del escaneo
+        """
+        snapshot, block = self._read_oversampled()
+        filtered = self.filters.process(block)[-1] if self.filters is not None else snapshot.values
+        
+        with self._lock:
+            self._timestamps[self._index] = snapshot.timestamp
+            self._values[self._index] = snapshot.values
+            self._filtered[self._index] = filtered
+            self._status[self._index] = [CHANNEL_STATUSES.index(st) for st in snapshot.status]
+            self._index = (self._index + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+            
+            if self._streaming:
+                self._append_to_block(snapshot)
+        
+        return snapshot
+    
+    def _append_to_block(self, snapshot: DAQSnapshot):
+        """Copia un escaneo al bloque en curso y lo publica al completarse (con lock)"""
+        slot = self._blocks_published % self.pool_blocks
+        self._block_times[slot, self._block_fill] = snapshot.timestamp
+        self._block_values[slot, self._block_fill] = snapshot.values
+        self._block_fill += 1
+        self._stream_scans += 1
+        
+        if self._block_fill == self.block_size:
+            self._block_fill = 0
+            self._blocks_published += 1
+            self._block_ready.notify_all()
+    
+    @property
+    def is_streaming(self) -> bool:
+        """Indica si el modo continuo está activo"""
+        return self._streaming
+    
+    def start_streaming(self):
+        """
+        Activa el modo continuo: escaneos consecutivos sin espera entre ellos
+        
+        El USB-5203 no tiene reloj de muestreo por hardware: es sondeo por
+        software, y el ritmo máximo lo marca la duración de cada escaneo.
+        """
+        with self._lock:
+            if self._streaming:
+                return
+            self._block_fill = 0
+            self._stream_scans = 0
+            self._stream_started = time.monotonic()
+            self._streaming = True
+        
+        self.start()
+        logger.info(f"Modo continuo DAQ iniciado: bloques de {self.block_size} escaneos")
+    
+    def stop_streaming(self):
+        """Vuelve al muestreo periódico y libera a los suscriptores en espera"""
+        with self._lock:
+            if not self._streaming:
+                return
+            self._streaming = False
+            self._block_ready.notify_all()
+        
+        logger.info("Modo continuo DAQ detenido")
+    
+    def stream_stats(self) -> dict:
+        """
+        Estadísticas del modo continuo
+        
+        Returns:
+            Diccionario con estado, bloques publicados y tasa de escaneo
+        """
+        with self._lock:
+            elapsed = time.monotonic() - self._stream_started if self._stream_started else 0.0
+            rate = self._stream_scans / elapsed if self._streaming and elapsed > 0 else None
+            return {
+                "streaming": self._streaming,
+                "block_size": self.block_size,
+                "blocks_published": self._blocks_published,
+                "subscribers": len(self._subscribers),
+                "scan_rate_hz": rate
+            }
+    
+    def subscribe(self) -> StreamSubscription:
+        """
+        Crea una suscripción que recibe los bloques publicados a partir de ahora
+        
+        Returns:
+            StreamSubscription iterable
+        """
+        with self._lock:
+            subscription = StreamSubscription(self, self._blocks_published)
+            self._subscribers.append(subscription)
+        return subscription
+    
+    def _unsubscribe(self, subscription: StreamSubscription):
+        """Retira una suscripción y despierta a los hilos en espera"""
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+            self._block_ready.notify_all()
+    
+    def _next_block(
+        self,
+        subscription: StreamSubscription,
+        timeout: Optional[float]
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Entrega a una suscripción su siguiente bloque disponible"""
+        with self._lock:
+            ready = self._block_ready.wait_for(
+                lambda: subscription.closed
+                or not self._streaming
+                or self._blocks_published > subscription.next_block,
+                timeout
+            )
+            if not ready or subscription.closed:
+                return None
+            if self._blocks_published <= subscription.next_block:
+                return None
+            
+            # La ranura de _blocks_published se está llenando; el bloque más antiguo
+            # todavía íntegro es el siguiente
+            oldest = self._blocks_published - self.pool_blocks + 1
+            if subscription.next_block < oldest:
+                dropped = oldest - subscription.next_block
+                subscription.overruns += dropped
+                logger.warning(f"Suscriptor DAQ retrasado: {dropped} bloques descartados")
+                subscription.next_block = oldest
+            
+            slot = subscription.next_block % self.pool_blocks
+            subscription.next_block += 1
+            
+            return self._block_times[slot].copy(), self._block_values[slot].copy()
+    
+    def stream_blocks(
+        self,
+        timeout: Optional[float] = None
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Generador de bloques del modo continuo
+        
+        Args:
+            timeout: Espera máxima por bloque; None espera indefinidamente
+            
+        Yields:
+            Tuplas (timestamps, valores) de cada bloque completo
+        """
+        subscription = self.subscribe()
+        try:
+            while True:
+                block = subscription.get(timeout)
+                if block is None:
+                    return
+                yield block
+        finally:
+            subscription.close()
+    
+    def latest(self, filtered: bool = False) -> DAQSnapshot:
+        """
+        Devuelve el último escaneo sin tocar el hardware
+        
+        Args:
+            filtered: Devolver los valores filtrados en lugar de los crudos
+            
+        Returns:
+            Snapshot más reciente (vacío si aún no hay escaneos)
+        """
+        return self.latest_pair()[1 if filtered else 0]
+    
+    def latest_pair(self) -> Tuple[DAQSnapshot, DAQSnapshot]:
+        """
+        Devuelve el último escaneo crudo y filtrado de forma consistente
+        
+        Returns:
+            Tupla (snapshot crudo, snapshot filtrado) de la misma muestra
+        """
+        channels = range(self.num_channels)
+        
+        with self._lock:
+            if self._count == 0:
+                empty = DAQSnapshot.empty(channels)
+                return empty, empty
+            last = (self._index - 1) % self.capacity
+            timestamp = float(self._timestamps[last])
+            raw_row = self._values[last].copy()
+            filtered_row = self._filtered[last].copy()
+            status = [CHANNEL_STATUSES[code] for code in self._status[last]]
+        
+        raw = DAQSnapshot.from_array(channels, raw_row, timestamp, status)
+        if self.filters is None:
+            return raw, raw
+        return raw, DAQSnapshot.from_array(channels, filtered_row, timestamp, status)
+    
+    def history(self, samples: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Devuelve los últimos escaneos en orden cronológico
+        
+        Args:
+            samples: Número de escaneos (por defecto todos los disponibles)
+            
+        Returns:
+            Tupla (timestamps, matriz escaneos x canales con NaN para lecturas inválidas)
+        """
+        with self._lock:
+            count = self._count if samples is None else min(samples, self._count)
+            order = (np.arange(self._index - count, self._index)) % self.capacity
+            return self._timestamps[order].copy(), self._values[order].copy()
+    
+    def read_snapshot(self, filtered: bool = False) -> DAQSnapshot:
+        """Último snapshot del buffer (misma interfaz que DAQUSB5203.read_snapshot)"""
+        return self.latest(filtered)
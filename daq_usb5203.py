@@ -4,18 +4,344 @@ Lectura de 8 canales de termopares tipo K usando drivers MCC Linux
 Instituto Tecnológico Metropolitano (ITM) - Medellín, Colombia
 """
 
+import argparse
 import logging
 import subprocess
 import re
-from typing import List, Optional, Dict
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Dict, Tuple
+
+import numpy as np
+
+try:
+    import usb.core
+    import usb.util
+    USB_AVAILABLE = True
+except ImportError:
+    USB_AVAILABLE = False
+    logging.warning("pyusb no disponible - backend USB deshabilitado")
 
 logger = logging.getLogger(__name__)
 
+# Formato de salida etiquetada por canal: "CH3: 24.51" o "Channel 3 = 24.51"
+SCAN_LINE_PATTERN = re.compile(r'^\s*(?:CH|Channel\s*)(\d+)\s*[:=]?(.*)$', re.IGNORECASE)
+NUMBER_PATTERN = re.compile(r'[-+]?\d*\.?\d+')
+
+# Identificadores USB y reportes HID de la serie USB-5200 (drivers MCC Linux)
+MCC_VENDOR_ID = 0x09db
+USB5203_PRODUCT_ID = 0x0099
+USB5203_TIN_SCAN = 0x19
+USB5203_SET_ITEM = 0x49
+USB5203_UNITS_TEMPERATURE = 0
+USB5203_MAX_CHANNELS = 8
+# Subítems de SET_ITEM: cada ítem es un par de canales (0-3)
+USB5203_SENSOR_TYPE = 0x00
+USB5203_CH_0_TC = 0x10
+USB5203_SENSOR_THERMOCOUPLE = 0
+USB5203_TC_TYPES = {"J": 0, "K": 1, "T": 2, "E": 3, "R": 4, "S": 5, "B": 6, "N": 7}
+
+DAQ_BACKENDS = ["cli", "usb"]
+DAQ_READ_MODES = ["batch", "concurrent"]
+
+# Estado por canal de un escaneo
+CHANNEL_OK = "ok"
+CHANNEL_INVALID = "invalid"
+CHANNEL_NO_RESPONSE = "no_response"
+CHANNEL_TIMEOUT = "timeout"
+CHANNEL_ERROR = "error"
+CHANNEL_STATUSES = (
+    CHANNEL_OK, CHANNEL_INVALID, CHANNEL_NO_RESPONSE, CHANNEL_TIMEOUT, CHANNEL_ERROR
+)
+
+
+class USB5203Session:
+    """Sesión USB persistente con el DAQ USB-5203 (sin procesos externos)"""
+    
+    def __init__(
+        self,
+        timeout: float = 10,
+        vendor_id: int = MCC_VENDOR_ID,
+        product_id: int = USB5203_PRODUCT_ID,
+        serial: Optional[str] = None,
+        tc_type: str = "K",
+        num_channels: int = USB5203_MAX_CHANNELS
+    ):
+        """
+        Inicializa la sesión USB
+        
+        Args:
+            timeout: Timeout por transferencia en segundos
+            vendor_id: Vendor ID USB (Measurement Computing)
+            product_id: Product ID USB del USB-5203
+            serial: Número de serie para elegir entre varios dispositivos
+            tc_type: Tipo de termopar que se programa en cada canal al abrir
+            num_channels: Canales a configurar (0..num_channels-1)
+        """
+        if tc_type.upper() not in USB5203_TC_TYPES:
+            raise ValueError(f"Tipo de termopar debe ser uno de: {list(USB5203_TC_TYPES)}")
+        
+        self.timeout_ms = int(timeout * 1000)
+        self.tc_type = tc_type.upper()
+        self.num_channels = num_channels
+        self.vendor_id = vendor_id
+        self.product_id = product_id
+        self.serial = serial
+        self.device = None
+        self.endpoint_in = None
+        self._lock = threading.Lock()
+    
+    @property
+    def is_open(self) -> bool:
+        """Indica si hay un handle USB abierto"""
+        return self.device is not None
+    
+    def open(self) -> bool:
+        """
+        Abre el dispositivo y reclama la interfaz HID
+        
+        Returns:
+            True si el dispositivo quedó abierto
+        """
+        if not USB_AVAILABLE:
+            logger.error("pyusb no disponible - no se puede abrir USB-5203")
+            return False
+        
+        try:
+            match = {"idVendor": self.vendor_id, "idProduct": self.product_id}
+            if self.serial:
+                match["serial_number"] = self.serial
+            
+            device = usb.core.find(**match)
+            if device is None:
+                logger.error(f"USB-5203 no encontrado ({self.vendor_id:04x}:{self.product_id:04x})")
+                return False
+            
+            if device.is_kernel_driver_active(0):
+                device.detach_kernel_driver(0)
+            device.set_configuration()
+            usb.util.claim_interface(device, 0)
+            
+            interface = device.get_active_configuration()[(0, 0)]
+            self.endpoint_in = usb.util.find_descriptor(
+                interface,
+                custom_match=lambda ep: (
+                    usb.util.endpoint_direction(ep.bEndpointAddress) == usb.util.ENDPOINT_IN
+                )
+            )
+            self.device = device
+            self.configure_thermocouples()
+            logger.info(f"Sesión USB-5203 abierta (termopar tipo {self.tc_type})")
+            return True
+        except Exception as e:
+            logger.error(f"Error abriendo USB-5203: {e}")
+            self.close()
+            return False
+    
+    def close(self):
+        """Libera la interfaz y cierra el handle USB"""
+        if self.device is not None:
+            try:
+                usb.util.release_interface(self.device, 0)
+                usb.util.dispose_resources(self.device)
+                logger.info("Sesión USB-5203 cerrada")
+            except Exception as e:
+                logger.error(f"Error cerrando USB-5203: {e}")
+        self.device = None
+        self.endpoint_in = None
+    
+    def _set_item(self, item: int, subitem: int, value: int):
+        """Envía un reporte SET_ITEM (ítem = par de canales)"""
+        request = bytes([USB5203_SET_ITEM, item, subitem, value, 0, 0, 0])
+        self.device.ctrl_transfer(
+            0x21, 0x09, 0x0200 | USB5203_SET_ITEM, 0, request, self.timeout_ms
+        )
+    
+    def configure_thermocouples(self):
+        """Programa sensor termopar y tipo de termopar en todos los canales de la sesión"""
+        tc_code = USB5203_TC_TYPES[self.tc_type]
+        for item in range((self.num_channels + 1) // 2):
+            self._set_item(item, USB5203_SENSOR_TYPE, USB5203_SENSOR_THERMOCOUPLE)
+        for channel in range(self.num_channels):
+            self._set_item(channel // 2, USB5203_CH_0_TC + channel % 2, tc_code)
+    
+    def _scan(self, start: int, end: int) -> List[float]:
+        """Ejecuta un reporte TIN_SCAN y devuelve los valores de start..end"""
+        request = bytes([USB5203_TIN_SCAN, start, end, USB5203_UNITS_TEMPERATURE, 0])
+        self.device.ctrl_transfer(
+            0x21, 0x09, 0x0200 | USB5203_TIN_SCAN, 0, request, self.timeout_ms
+        )
+        
+        count = end - start + 1
+        response = self.device.read(
+            self.endpoint_in.bEndpointAddress, 1 + 4 * count, self.timeout_ms
+        )
+        return list(struct.unpack(f"<{count}f", bytes(response[1:1 + 4 * count])))
+    
+    def read_channels(self, channels: List[int]) -> Dict[int, Optional[float]]:
+        """
+        Lee varios canales con un solo reporte de escaneo
+        
+        Reabre el dispositivo una vez si la transferencia falla (desconexión).
+        
+        Args:
+            channels: Lista de números de canal
+            
+        Returns:
+            Diccionario con canal -> valor crudo o None
+        """
+        start, end = min(channels), max(channels)
+        
+        with self._lock:
+            for attempt in range(2):
+                if not self.is_open and not self.open():
+                    break
+                try:
+                    values = self._scan(start, end)
+                    return {ch: values[ch - start] for ch in channels}
+                except Exception as e:
+                    logger.warning(f"Error de transferencia USB-5203 (intento {attempt + 1}): {e}")
+                    self.close()
+        
+        return {ch: None for ch in channels}
+
+
+@dataclass(frozen=True)
+class DAQSnapshot:
+    """Escaneo inmutable del DAQ: timestamp, valores por canal, máscara de validez y estado"""
+    
+    timestamp: Optional[float]
+    channels: Tuple[int, ...]
+    values: np.ndarray
+    valid: np.ndarray
+    status: Tuple[str, ...] = ()
+    
+    @classmethod
+    def from_readings(
+        cls,
+        readings: Dict[int, Optional[float]],
+        timestamp: Optional[float] = None,
+        status: Optional[Dict[int, str]] = None
+    ) -> "DAQSnapshot":
+        """
+        Construye un snapshot a partir de un diccionario canal -> temperatura
+        
+        Args:
+            readings: Diccionario con canal -> temperatura (°C) o None
+            timestamp: Tiempo epoch del escaneo (por defecto ahora)
+            status: Estado por canal (por defecto ok/invalid según la lectura)
+            
+        Returns:
+            Snapshot de solo lectura
+        """
+        channels = tuple(readings.keys())
+        values = np.array(
+            [np.nan if readings[ch] is None else readings[ch] for ch in channels],
+            dtype=np.float64
+        )
+        channel_status = None if status is None else [status.get(ch, CHANNEL_OK) for ch in channels]
+        timestamp = time.time() if timestamp is None else timestamp
+        return cls.from_array(channels, values, timestamp, channel_status)
+    
+    @classmethod
+    def from_array(
+        cls,
+        channels: Iterable[int],
+        values: np.ndarray,
+        timestamp: Optional[float],
+        status: Optional[Iterable[str]] = None
+    ) -> "DAQSnapshot":
+        """Construye un snapshot desde un vector de valores con NaN para lecturas inválidas"""
+        values = np.array(values, dtype=np.float64)
+        valid = ~np.isnan(values)
+        values.flags.writeable = False
+        valid.flags.writeable = False
+        if status is None:
+            status = [CHANNEL_OK if ok else CHANNEL_INVALID for ok in valid]
+        return cls(timestamp, tuple(channels), values, valid, tuple(status))
+    
+    @classmethod
+    def empty(cls, channels: Iterable[int]) -> "DAQSnapshot":
+        """Snapshot sin lecturas (antes del primer escaneo)"""
+        channels = tuple(channels)
+        return cls.from_array(channels, np.full(len(channels), np.nan), None)
+    
+    def _mask(self, channels: Iterable[int]) -> np.ndarray:
+        """Máscara booleana de los canales pedidos que tienen lectura válida"""
+        return np.isin(np.array(self.channels), list(channels)) & self.valid
+    
+    def get(self, channel: int) -> Optional[float]:
+        """Temperatura de un canal o None si no es válida"""
+        if channel not in self.channels:
+            return None
+        idx = self.channels.index(channel)
+        return float(self.values[idx]) if self.valid[idx] else None
+    
+    def as_dict(self, channels: Optional[Iterable[int]] = None) -> Dict[int, Optional[float]]:
+        """Diccionario canal -> temperatura (°C) o None"""
+        return {ch: self.get(ch) for ch in (self.channels if channels is None else channels)}
+    
+    def channel_status(self) -> Dict[int, str]:
+        """Diccionario canal -> estado del último escaneo"""
+        return dict(zip(self.channels, self.status))
+    
+    def invalid_channels(self) -> List[int]:
+        """Canales sin lectura válida"""
+        return [ch for ch, ok in zip(self.channels, self.valid) if not ok]
+    
+    def open_channels(self) -> List[int]:
+        """Canales con lectura fuera del rango físico (posible termopar abierto)"""
+        return [ch for ch, st in zip(self.channels, self.status) if st == CHANNEL_INVALID]
+    
+    def group_stats(self, channels: Iterable[int]) -> Dict[str, Optional[float]]:
+        """
+        Estadísticas de un grupo de canales sin realizar nuevas lecturas
+        
+        Args:
+            channels: Canales del grupo (evaporador, condensador...)
+            
+        Returns:
+            Diccionario con average, min, max, spread y valid_count
+        """
+        group = self.values[self._mask(channels)]
+        
+        if group.size == 0:
+            return {"average": None, "min": None, "max": None, "spread": None, "valid_count": 0}
+        
+        group_min = float(group.min())
+        group_max = float(group.max())
+        return {
+            "average": float(group.mean()),
+            "min": group_min,
+            "max": group_max,
+            "spread": group_max - group_min,
+            "valid_count": int(group.size)
+        }
+    
+    def average(self, channels: Iterable[int]) -> Optional[float]:
+        """Temperatura promedio de un grupo de canales o None"""
+        return self.group_stats(channels)["average"]
+
 
 class DAQUSB5203:
     """Controlador para DAQ USB-5203 con termopares tipo K"""
     
-    def __init__(self, num_channels: int = 8, tc_type: str = "K", timeout: int = 10):
+    def __init__(
+        self,
+        num_channels: int = 8,
+        tc_type: str = "K",
+        timeout: int = 10,
+        scan_command: Optional[str] = None,
+        backend: str = "usb",
+        read_mode: str = "batch",
+        max_workers: int = 4,
+        scan_deadline: Optional[float] = None,
+        serial: Optional[str] = None
+    ):
         """
         Inicializa el DAQ USB-5203
         
@@ -23,10 +349,23 @@ class DAQUSB5203:
             num_channels: Número de canales (0-7)
             tc_type: Tipo de termopar (J, K, R, S, T, N, E, B)
             timeout: Timeout para lectura en segundos
+            scan_command: Plantilla de comando que lee varios canales en un solo
+                proceso ({channels}, {tc_type} y {serial} se sustituyen). Si es None
+                el backend CLI usa el bucle por canal (un test-usb5203 por canal).
+            backend: "usb" (sesión USB persistente, un reporte TIN_SCAN por escaneo)
+                o "cli" (binario test-usb5203). Sin pyusb se usa "cli".
+            read_mode: Modo del backend CLI: "batch" (un comando de shell para
+                todos los canales) o "concurrent" (un proceso por canal en un pool acotado)
+            max_workers: Tamaño máximo del pool en modo concurrente
+            scan_deadline: Plazo total del escaneo concurrente en segundos
+                (por defecto timeout)
+            serial: Número de serie del dispositivo cuando hay varios conectados
         """
         self.num_channels = num_channels
         self.tc_type = tc_type.upper()
         self.timeout = timeout
+        self.scan_command = scan_command
+        self.serial = serial
         self.temp_min = -270.0
         self.temp_max = 2000.0
         self.valid_tc_types = ["J", "K", "R", "S", "T", "N", "E", "B"]
@@ -35,7 +374,39 @@ class DAQUSB5203:
             logger.error(f"Tipo de termopar inválido: {tc_type}")
             raise ValueError(f"Tipo de termopar debe ser uno de: {self.valid_tc_types}")
         
-        logger.info(f"DAQ USB-5203 inicializado: {num_channels} canales, tipo {tc_type}")
+        if backend not in DAQ_BACKENDS:
+            logger.error(f"Backend DAQ inválido: {backend}")
+            raise ValueError(f"Backend DAQ debe ser uno de: {DAQ_BACKENDS}")
+        
+        if backend == "usb" and not USB_AVAILABLE:
+            logger.warning("pyusb no disponible - se usa el backend CLI")
+            backend = "cli"
+        
+        if backend == "usb" and num_channels > USB5203_MAX_CHANNELS:
+            raise ValueError(f"El backend USB admite máximo {USB5203_MAX_CHANNELS} canales")
+        
+        if read_mode not in DAQ_READ_MODES:
+            logger.error(f"Modo de lectura DAQ inválido: {read_mode}")
+            raise ValueError(f"Modo de lectura DAQ debe ser uno de: {DAQ_READ_MODES}")
+        
+        self.read_mode = read_mode
+        self.max_workers = max(1, max_workers)
+        self.scan_deadline = scan_deadline if scan_deadline is not None else timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._loop_warned = False
+        
+        self.health = None
+        self.backend = backend
+        self.session: Optional[USB5203Session] = None
+        if backend == "usb":
+            self.session = USB5203Session(
+                timeout, serial=serial, tc_type=self.tc_type, num_channels=num_channels
+            )
+            self.session.open()
+        
+        logger.info(
+            f"DAQ USB-5203 inicializado: {num_channels} canales, tipo {tc_type}, backend {backend}"
+        )
     
     def _validate_channel(self, channel: int) -> bool:
         """Valida que el canal esté en rango válido"""
@@ -51,12 +422,13 @@ class DAQUSB5203:
             return False
         return True
     
-    def _execute_mcc_command(self, command: str) -> Optional[str]:
+    def _execute_mcc_command(self, command: str, timeout: Optional[float] = None) -> Optional[str]:
         """
         Ejecuta comando de drivers MCC Linux
         
         Args:
             command: Comando a ejecutar
+            timeout: Timeout en segundos (por defecto self.timeout)
             
         Returns:
             Salida del comando o None si error
@@ -67,7 +439,7 @@ class DAQUSB5203:
                 shell=True,
                 capture_output=True,
                 text=True,
-                timeout=self.timeout
+                timeout=timeout if timeout is not None else self.timeout
             )
             
             if result.returncode == 0:
@@ -82,56 +454,269 @@ class DAQUSB5203:
             logger.error(f"Excepción ejecutando comando MCC: {e}")
             return None
     
-    def read_channel(self, channel: int) -> Optional[float]:
+    def _build_scan_command(self, channels: List[int]) -> str:
         """
-        Lee temperatura de un canal específico
+        Construye el comando de shell que lee todos los canales
+        
+        Con scan_command es un solo proceso; sin él se usa el bucle por canal
+        (_build_loop_command).
         
         Args:
-            channel: Número de canal (0-7)
+            channels: Lista de números de canal
             
         Returns:
-            Temperatura en °C o None si error
+            Comando de shell cuya salida trae una línea "CH<n>: <valor>" por canal
         """
-        if not self._validate_channel(channel):
+        if self.scan_command:
+            return self.scan_command.format(
+                channels=",".join(str(ch) for ch in channels),
+                tc_type=self.tc_type,
+                serial=self.serial or ""
+            )
+        return self._build_loop_command(channels)
+    
+    def _build_loop_command(self, channels: List[int]) -> str:
+        """
+        Bucle por canal: un shell que ejecuta test-usb5203 una vez por canal, en serie
+        
+        No es un escaneo de una sola invocación: lanza un proceso y reabre el
+        dispositivo por cada canal. Solo es el último recurso cuando no hay
+        pyusb ni scan_command (por ejemplo "python daq_usb5203.py ...").
+        
+        Args:
+            channels: Lista de números de canal
+            
+        Returns:
+            Comando de shell cuya salida trae una línea "CH<n>: <valor>" por canal
+        """
+        if not self._loop_warned:
+            logger.warning(
+                "Backend CLI sin DAQ_SCAN_COMMAND: bucle por canal "
+                "(un proceso test-usb5203 por canal en cada escaneo)"
+            )
+            self._loop_warned = True
+        
+        channel_list = " ".join(str(ch) for ch in channels)
+        return (
+            f"for ch in {channel_list}; do "
+            f"echo \"CH$ch: $(test-usb5203 -ch $ch -type {self.tc_type} 2>/dev/null)\"; "
+            f"done"
+        )
+    
+    def _parse_scan_output(self, output: str, channels: List[int]) -> Dict[int, Optional[float]]:
+        """
+        Extrae las lecturas de todos los canales de un único buffer de salida
+        
+        Args:
+            output: Salida completa del comando de escaneo
+            channels: Canales solicitados, en orden
+            
+        Returns:
+            Diccionario con canal -> valor crudo (sin validar) o None
+        """
+        values: Dict[int, Optional[float]] = {ch: None for ch in channels}
+        tagged = False
+        
+        for line in output.splitlines():
+            match = SCAN_LINE_PATTERN.match(line)
+            if match:
+                tagged = True
+                channel = int(match.group(1))
+                number = NUMBER_PATTERN.search(match.group(2))
+                if channel in values and number:
+                    values[channel] = float(number.group())
+        
+        if not tagged:
+            numbers = NUMBER_PATTERN.findall(output)
+            if len(numbers) == len(channels):
+                for channel, number in zip(channels, numbers):
+                    values[channel] = float(number)
+            else:
+                logger.error(
+                    f"No se pudo parsear salida de escaneo de canales {channels}: {output}"
+                )
+        
+        return values
+    
+    def _convert_reading(self, channel: int, value: Optional[float]) -> Optional[float]:
+        """Valida una lectura cruda y la convierte en temperatura"""
+        if value is None:
+            logger.error(f"No se obtuvo respuesta del canal {channel}")
             return None
         
-        try:
-            command = f"test-usb5203 -ch {channel} -type {self.tc_type}"
-            output = self._execute_mcc_command(command)
+        if self._validate_temperature(value):
+            logger.debug(f"Canal {channel}: {value:.2f}°C")
+            return value
+        
+        logger.error(f"Canal {channel}: temperatura inválida {value}°C (posible open thermocouple)")
+        return None
+    
+    def _scan_timeout(self, channels: List[int]) -> float:
+        """Timeout del comando de escaneo: el bucle por canal lanza un proceso por canal"""
+        if self.scan_command:
+            return self.timeout
+        return self.timeout * max(1, len(channels))
+    
+    def _read_raw_cli(
+        self,
+        channels: List[int]
+    ) -> Tuple[Dict[int, Optional[float]], Dict[int, str]]:
+        """Lee valores crudos mediante el binario de drivers MCC Linux"""
+        command = self._build_scan_command(channels)
+        output = self._execute_mcc_command(command, self._scan_timeout(channels))
+        
+        if output is None:
+            logger.error(f"No se obtuvo respuesta del escaneo de canales {channels}")
+            return {ch: None for ch in channels}, {ch: CHANNEL_NO_RESPONSE for ch in channels}
+        
+        return self._parse_scan_output(output, channels), {}
+    
+    def _read_raw_cli_concurrent(
+        self,
+        channels: List[int]
+    ) -> Tuple[Dict[int, Optional[float]], Dict[int, str]]:
+        """
+        Lee cada canal en su propio proceso sobre un pool acotado con un plazo global
+        
+        Los canales que no responden antes del plazo se devuelven como None con
+        estado "timeout"; el resto del escaneo se conserva.
+        
+        Args:
+            channels: Lista de números de canal
             
+        Returns:
+            Tupla (canal -> valor crudo, canal -> estado de transporte)
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="daq-read"
+            )
+        
+        deadline = time.monotonic() + self.scan_deadline
+        
+        def read_one(channel: int) -> Optional[float]:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Plazo de escaneo agotado antes de leer canal {channel}")
+            output = self._execute_mcc_command(
+                f"test-usb5203 -ch {channel} -type {self.tc_type}", timeout=remaining
+            )
             if output is None:
-                logger.error(f"No se obtuvo respuesta del canal {channel}")
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Plazo de escaneo agotado leyendo canal {channel}")
                 return None
+            match = NUMBER_PATTERN.search(output)
+            return float(match.group()) if match else None
+        
+        futures = {self._executor.submit(read_one, ch): ch for ch in channels}
+        done, pending = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+        
+        values: Dict[int, Optional[float]] = {}
+        status: Dict[int, str] = {}
+        
+        for future, channel in futures.items():
+            if future in pending:
+                future.cancel()
+                values[channel] = None
+                status[channel] = CHANNEL_TIMEOUT
+                continue
+            try:
+                values[channel] = future.result()
+                if values[channel] is None:
+                    status[channel] = CHANNEL_NO_RESPONSE
+            except TimeoutError:
+                values[channel] = None
+                status[channel] = CHANNEL_TIMEOUT
+            except Exception as e:
+                logger.error(f"Error leyendo canal {channel}: {e}")
+                values[channel] = None
+                status[channel] = CHANNEL_ERROR
+        
+        timed_out = [ch for ch, st in status.items() if st == CHANNEL_TIMEOUT]
+        if timed_out:
+            logger.warning(
+                f"Plazo de escaneo de {self.scan_deadline}s agotado; "
+                f"canales sin lectura: {timed_out}"
+            )
+        
+        return values, status
+    
+    def _read_raw(self, channels: List[int]) -> Tuple[Dict[int, Optional[float]], Dict[int, str]]:
+        """Lee valores crudos con el backend y modo configurados"""
+        if self.session is not None:
+            values = self.session.read_channels(channels)
+            return values, {ch: CHANNEL_NO_RESPONSE for ch, v in values.items() if v is None}
+        if self.read_mode == "concurrent":
+            return self._read_raw_cli_concurrent(channels)
+        return self._read_raw_cli(channels)
+    
+    def _scan_channels(
+        self,
+        channels: List[int]
+    ) -> Tuple[Dict[int, Optional[float]], Dict[int, str]]:
+        """
+        Lee varios canales en un solo escaneo
+        
+        Args:
+            channels: Lista de números de canal
             
-            temp_match = re.search(r'[-+]?\d*\.?\d+', output)
-            if temp_match:
-                temperature = float(temp_match.group())
-                
-                if self._validate_temperature(temperature):
-                    logger.debug(f"Canal {channel}: {temperature:.2f}°C")
-                    return temperature
-                else:
-                    logger.error(f"Canal {channel}: temperatura inválida {temperature}°C (posible open thermocouple)")
-                    return None
+        Returns:
+            Tupla (canal -> temperatura (°C), canal -> estado)
+        """
+        readings: Dict[int, Optional[float]] = {}
+        status: Dict[int, str] = {}
+        valid_channels = []
+        
+        for channel in channels:
+            if self._validate_channel(channel):
+                valid_channels.append(channel)
             else:
-                logger.error(f"No se pudo parsear temperatura del canal {channel}: {output}")
-                return None
+                readings[channel] = None
+                status[channel] = CHANNEL_ERROR
+        
+        if not valid_channels:
+            return readings, status
         
+        try:
+            raw_values, raw_status = self._read_raw(valid_channels)
         except Exception as e:
-            logger.error(f"Error leyendo canal {channel}: {e}")
-            return None
+            logger.error(f"Error escaneando canales {valid_channels}: {e}")
+            raw_values = {ch: None for ch in valid_channels}
+            raw_status = {ch: CHANNEL_ERROR for ch in valid_channels}
+        
+        for channel in valid_channels:
+            readings[channel] = self._convert_reading(channel, raw_values[channel])
+            if channel in raw_status:
+                status[channel] = raw_status[channel]
+            elif raw_values[channel] is None:
+                status[channel] = CHANNEL_NO_RESPONSE
+            elif readings[channel] is None:
+                status[channel] = CHANNEL_INVALID
+            else:
+                status[channel] = CHANNEL_OK
+        
+        return {ch: readings[ch] for ch in channels}, {ch: status[ch] for ch in channels}
+    
+    def read_channel(self, channel: int) -> Optional[float]:
+        """
+        Lee temperatura de un canal específico
+        
+        Args:
+            channel: Número de canal (0-7)
+            
+        Returns:
+            Temperatura en °C o None si error
+        """
+        return self._scan_channels([channel])[0][channel]
     
     def read_all_channels(self) -> Dict[int, Optional[float]]:
         """
-        Lee todos los canales configurados
+        Lee todos los canales configurados en un solo escaneo
         
         Returns:
             Diccionario con canal -> temperatura (°C)
         """
-        readings = {}
-        
-        for channel in range(self.num_channels):
-            readings[channel] = self.read_channel(channel)
+        readings, _ = self._scan_channels(list(range(self.num_channels)))
         
         valid_count = sum(1 for v in readings.values() if v is not None)
         logger.info(f"Lectura completa: {valid_count}/{self.num_channels} canales válidos")
@@ -140,7 +725,7 @@ class DAQUSB5203:
     
     def read_channels_list(self, channels: List[int]) -> Dict[int, Optional[float]]:
         """
-        Lee una lista específica de canales
+        Lee una lista específica de canales en un solo escaneo
         
         Args:
             channels: Lista de números de canal
@@ -148,50 +733,272 @@ class DAQUSB5203:
         Returns:
             Diccionario con canal -> temperatura (°C)
         """
-        readings = {}
+        return self._scan_channels(list(channels))[0]
+    
+    def read_snapshot(self, channels: Optional[List[int]] = None) -> DAQSnapshot:
+        """
+        Escanea canales y devuelve un snapshot inmutable
         
-        for channel in channels:
-            readings[channel] = self.read_channel(channel)
+        Args:
+            channels: Canales a leer (por defecto todos)
+            
+        Returns:
+            DAQSnapshot con timestamp, valores y máscara de validez
+        """
+        if channels is None:
+            channels = list(range(self.num_channels))
         
-        return readings
+        readings, status = self._scan_channels(list(channels))
+        snapshot = DAQSnapshot.from_readings(readings, status=status)
+        
+        if self.health is not None:
+            self.health.update(snapshot)
+        
+        return snapshot
     
-    def check_open_thermocouples(self) -> List[int]:
+    def check_open_thermocouples(self, snapshot: Optional[DAQSnapshot] = None) -> List[int]:
         """
         Detecta termopares desconectados (open thermocouple)
         
+        Args:
+            snapshot: Escaneo a analizar. Si es None se usa el seguimiento de
+                salud (sin leer hardware) o, si no hay, un escaneo nuevo.
+                
         Returns:
             Lista de canales con termopares desconectados
         """
-        open_channels = []
-        readings = self.read_all_channels()
+        if snapshot is None and self.health is not None and self.health.has_data:
+            return self.health.open_channels()
+        
+        if snapshot is None:
+            snapshot = self.read_snapshot()
         
-        for channel, temp in readings.items():
-            if temp is None:
-                open_channels.append(channel)
+        open_channels = snapshot.open_channels()
         
         if open_channels:
             logger.warning(f"Termopares desconectados en canales: {open_channels}")
         
         return open_channels
     
-    def get_average_temperature(self, channels: List[int]) -> Optional[float]:
+    def get_average_temperature(
+        self,
+        channels: List[int],
+        snapshot: Optional[DAQSnapshot] = None
+    ) -> Optional[float]:
         """
         Calcula temperatura promedio de un grupo de canales
         
         Args:
             channels: Lista de canales a promediar
+            snapshot: Escaneo ya adquirido (si es None se leen los canales)
             
         Returns:
             Temperatura promedio en °C o None si no hay lecturas válidas
         """
-        readings = self.read_channels_list(channels)
-        valid_temps = [temp for temp in readings.values() if temp is not None]
+        if snapshot is None:
+            snapshot = self.read_snapshot(channels)
         
-        if not valid_temps:
+        stats = snapshot.group_stats(channels)
+        
+        if stats["average"] is None:
             logger.error(f"No hay lecturas válidas para promediar en canales {channels}")
             return None
         
-        average = sum(valid_temps) / len(valid_temps)
-        logger.debug(f"Promedio de canales {channels}: {average:.2f}°C ({len(valid_temps)} válidos)")
+        logger.debug(
+            f"Promedio de canales {channels}: {stats['average']:.2f}°C "
+            f"({stats['valid_count']} válidos)"
+        )
+        
+        return stats["average"]
+    
+    def close(self):
+        """Libera la sesión USB persistente y el pool de lectura concurrente"""
+        if self.session is not None:
+            self.session.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+class DAQDeviceGroup:
+    """Grupo de varios USB-5203 leídos en paralelo como un único DAQ lógico"""
+    
+    def __init__(
+        self,
+        devices: Dict[str, DAQUSB5203],
+        channel_map: Optional[List[Tuple[str, int]]] = None
+    ):
+        """
+        Inicializa el grupo de dispositivos
+        
+        Args:
+            devices: Diccionario nombre -> instancia de DAQUSB5203
+            channel_map: Lista donde la posición es el canal lógico y el valor
+                (dispositivo, canal físico). Por defecto los canales de cada
+                dispositivo se numeran consecutivamente en el orden de devices.
+        """
+        if not devices:
+            raise ValueError("El grupo necesita al menos un dispositivo")
+        
+        if channel_map is None:
+            channel_map = [
+                (name, physical)
+                for name, device in devices.items()
+                for physical in range(device.num_channels)
+            ]
+        
+        for name, physical in channel_map:
+            if name not in devices:
+                raise ValueError(f"Dispositivo desconocido en mapa de canales: {name}")
+            if not (0 <= physical < devices[name].num_channels):
+                raise ValueError(f"Canal físico {physical} fuera de rango en {name}")
+        
+        self.devices = devices
+        self.channel_map = list(channel_map)
+        self.num_channels = len(self.channel_map)
+        self.health = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(devices), thread_name_prefix="daq-group"
+        )
+        
+        logger.info(
+            f"Grupo DAQ inicializado: {len(devices)} dispositivos, "
+            f"{self.num_channels} canales lógicos"
+        )
+    
+    def read_snapshot(self, channels: Optional[List[int]] = None) -> DAQSnapshot:
+        """
+        Escanea todos los dispositivos en paralelo y fusiona un snapshot lógico
+        
+        El tiempo de escaneo es el del dispositivo más lento; el timestamp del
+        snapshot es el punto medio de los escaneos de cada dispositivo.
+        
+        Args:
+            channels: Canales lógicos a leer (por defecto todos)
+            
+        Returns:
+            DAQSnapshot indexado por canal lógico
+        """
+        if channels is None:
+            channels = list(range(self.num_channels))
+        
+        requests: Dict[str, List[int]] = {}
+        for channel in channels:
+            if 0 <= channel < self.num_channels:
+                name, physical = self.channel_map[channel]
+                requests.setdefault(name, []).append(physical)
+            else:
+                logger.error(f"Canal lógico {channel} fuera de rango [0-{self.num_channels-1}]")
+        
+        futures = {
+            name: self._executor.submit(self.devices[name].read_snapshot, sorted(set(physicals)))
+            for name, physicals in requests.items()
+        }
         
-        return average
+        device_snapshots: Dict[str, DAQSnapshot] = {}
+        for name, future in futures.items():
+            try:
+                device_snapshots[name] = future.result()
+            except Exception as e:
+                logger.error(f"Error leyendo dispositivo {name}: {e}")
+        
+        readings: Dict[int, Optional[float]] = {}
+        status: Dict[int, str] = {}
+        for channel in channels:
+            if not (0 <= channel < self.num_channels):
+                readings[channel] = None
+                status[channel] = CHANNEL_ERROR
+                continue
+            name, physical = self.channel_map[channel]
+            snapshot = device_snapshots.get(name)
+            if snapshot is None:
+                readings[channel] = None
+                status[channel] = CHANNEL_ERROR
+            else:
+                readings[channel] = snapshot.get(physical)
+                status[channel] = snapshot.channel_status().get(physical, CHANNEL_ERROR)
+        
+        timestamps = [
+            snap.timestamp for snap in device_snapshots.values() if snap.timestamp is not None
+        ]
+        timestamp = sum(timestamps) / len(timestamps) if timestamps else None
+        
+        snapshot = DAQSnapshot.from_readings(readings, timestamp, status)
+        
+        if self.health is not None:
+            self.health.update(snapshot)
+        
+        return snapshot
+    
+    def read_channel(self, channel: int) -> Optional[float]:
+        """Temperatura de un canal lógico o None si error"""
+        return self.read_snapshot([channel]).get(channel)
+    
+    def read_all_channels(self) -> Dict[int, Optional[float]]:
+        """Lee todos los canales lógicos (todos los dispositivos en paralelo)"""
+        return self.read_snapshot().as_dict()
+    
+    def read_channels_list(self, channels: List[int]) -> Dict[int, Optional[float]]:
+        """Lee una lista de canales lógicos"""
+        return self.read_snapshot(channels).as_dict()
+    
+    def check_open_thermocouples(self, snapshot: Optional[DAQSnapshot] = None) -> List[int]:
+        """Canales lógicos con termopares desconectados"""
+        if snapshot is None and self.health is not None and self.health.has_data:
+            return self.health.open_channels()
+        
+        if snapshot is None:
+            snapshot = self.read_snapshot()
+        
+        open_channels = snapshot.open_channels()
+        if open_channels:
+            logger.warning(f"Termopares desconectados en canales: {open_channels}")
+        
+        return open_channels
+    
+    def get_average_temperature(
+        self,
+        channels: List[int],
+        snapshot: Optional[DAQSnapshot] = None
+    ) -> Optional[float]:
+        """Temperatura promedio de un grupo de canales lógicos"""
+        if snapshot is None:
+            snapshot = self.read_snapshot(channels)
+        return snapshot.average(channels)
+    
+    def close(self):
+        """Cierra todos los dispositivos y el pool de lectura"""
+        for device in self.devices.values():
+            device.close()
+        self._executor.shutdown(wait=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Escaneo USB-5203 en un solo proceso (un reporte TIN_SCAN)"
+    )
+    parser.add_argument("--channels", default="0,1,2,3,4,5,6,7", help="Canales: 0,1,2")
+    parser.add_argument("--type", default="K", help="Tipo de termopar")
+    parser.add_argument("--serial", default="", help="Número de serie del dispositivo")
+    parser.add_argument("--timeout", type=float, default=10, help="Timeout USB en segundos")
+    args = parser.parse_args()
+    
+    channels = [int(ch) for ch in args.channels.split(",") if ch.strip()]
+    session = USB5203Session(
+        args.timeout, serial=args.serial or None, tc_type=args.type,
+        num_channels=max(channels) + 1
+    )
+    try:
+        values = session.read_channels(channels)
+    finally:
+        session.close()
+    
+    for channel in channels:
+        value = values[channel]
+        print(f"CH{channel}: {'' if value is None else f'{value:.3f}'}")
+    
+    return 0 if any(v is not None for v in values.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
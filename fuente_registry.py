@@ -0,0 +1,140 @@
+"""
+Registro de fuentes XLN30052 con nombre
+Operaciones sobre varias fuentes ejecutadas en paralelo
+Instituto Tecnológico Metropolitano (ITM) - Medellín, Colombia
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, TypeVar
+
+from fuente_xln import FuenteXLN
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SupplyRegistry:
+    """Fuentes identificadas por nombre; la primera registrada es la principal"""
+    
+    def __init__(self, supplies: Dict[str, FuenteXLN], max_workers: Optional[int] = None):
+        """
+        Inicializa el registro
+        
+        Args:
+            supplies: Diccionario nombre -> fuente (en orden; la primera es la principal)
+            max_workers: Hilos para operaciones en paralelo (por defecto uno por fuente)
+        """
+        if not supplies:
+            raise ValueError("Se requiere al menos una fuente")
+        
+        self.supplies = dict(supplies)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or len(self.supplies),
+            thread_name_prefix="xln-registry"
+        )
+        
+        logger.info(f"Fuentes registradas: {self.names}")
+    
+    @property
+    def names(self) -> List[str]:
+        """Nombres registrados"""
+        return list(self.supplies)
+    
+    @property
+    def default(self) -> FuenteXLN:
+        """Fuente principal"""
+        return next(iter(self.supplies.values()))
+    
+    def get(self, name: str) -> Optional[FuenteXLN]:
+        """Fuente por nombre o None si no está registrada"""
+        return self.supplies.get(name)
+    
+    def __iter__(self):
+        return iter(self.supplies.items())
+    
+    def __len__(self) -> int:
+        return len(self.supplies)
+    
+    def map(
+        self,
+        operation: Callable[[FuenteXLN], T],
+        names: Optional[List[str]] = None
+    ) -> Dict[str, Optional[T]]:
+        """
+        Aplica una operación a varias fuentes en paralelo
+        
+        El tiempo total es el de la fuente más lenta, no la suma.
+        
+        Args:
+            operation: Función que recibe la fuente
+            names: Fuentes a incluir (por defecto todas)
+            
+        Returns:
+            Diccionario nombre -> resultado (None si la operación lanzó excepción)
+        """
+        names = self.names if names is None else names
+        futures = {name: self._executor.submit(operation, self.supplies[name]) for name in names}
+        
+        results = {}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                logger.error(f"Fuente '{name}': {e}")
+                results[name] = None
+        return results
+    
+    def read_all(self, names: Optional[List[str]] = None) -> Dict[str, Optional[dict]]:
+        """Estado completo (read_state) de cada fuente"""
+        return self.map(lambda fuente: fuente.read_state(), names)
+    
+    def set_all(
+        self,
+        voltage: Optional[float] = None,
+        current: Optional[float] = None,
+        output: Optional[bool] = None,
+        names: Optional[List[str]] = None
+    ) -> Dict[str, Optional[bool]]:
+        """
+        Aplica las mismas consignas a varias fuentes en paralelo
+        
+        Args:
+            voltage: Voltaje (V); None = sin cambio
+            current: Corriente límite (A); None = sin cambio
+            output: Estado de salida; None = sin cambio
+            names: Fuentes a incluir (por defecto todas)
+            
+        Returns:
+            Diccionario nombre -> True si todas las operaciones de esa fuente tuvieron éxito
+        """
+        def apply(fuente: FuenteXLN) -> bool:
+            ok = True
+            if voltage is not None or current is not None:
+                if voltage is not None:
+                    ok = fuente.set_voltage(voltage, verify=False) and ok
+                if current is not None:
+                    ok = fuente.set_current(current, verify=False) and ok
+                ok = fuente.verify_setpoints() and ok
+            if output is not None:
+                ok = (fuente.output_on() if output else fuente.output_off()) and ok
+            return ok
+        
+        return self.map(apply, names)
+    
+    def output_off_all(self) -> Dict[str, Optional[bool]]:
+        """Apaga la salida de todas las fuentes en paralelo"""
+        return self.map(lambda fuente: fuente.output_off())
+    
+    def link_status(self) -> Dict[str, dict]:
+        """Estado del enlace de cada fuente (no bloquea)"""
+        return {name: fuente.link.status() for name, fuente in self.supplies.items()}
+    
+    def close(self):
+        """Detiene los hilos de cada fuente y cierra las conexiones"""
+        for fuente in self.supplies.values():
+            fuente.stop_link_manager()
+            fuente.stop_io_worker()
+            fuente.disconnect()
+        self._executor.shutdown(wait=False)
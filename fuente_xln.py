@@ -1,16 +1,639 @@
 """
 Módulo de control para fuente BK Precision XLN30052
-Comunicación vía Telnet (puerto 5024) con comandos SCPI
+Comunicación vía TCP (puerto 5024) con comandos SCPI
 Instituto Tecnológico Metropolitano (ITM) - Medellín, Colombia
 """
 
-import telnetlib
+import itertools
 import logging
+import queue
+import threading
 import time
-from typing import Tuple, Optional
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Dict, List, Sequence, Tuple, Optional
+
+from scpi_async import SCPIConnection
 
 logger = logging.getLogger(__name__)
 
+# Estados del circuit breaker de la conexión
+LINK_CLOSED = "closed"
+LINK_OPEN = "open"
+LINK_HALF_OPEN = "half_open"
+
+# Prioridades de la cola de comandos (menor = se atiende antes)
+PRIORITY_SAFETY = 0
+PRIORITY_CONTROL = 1
+PRIORITY_POLL = 2
+
+SAFETY_COMMANDS = ("OUTP OFF", "OUTP 0", "OUTPUT OFF", "OUTPUT 0")
+
+# Margen sobre el timeout del enlace al esperar un resultado de la cola (s)
+RESULT_WAIT_MARGIN = 2.0
+
+# Bits del registro STAT:QUES:COND?
+PROTECTION_BITS = (
+    (0x01, "ovp"),
+    (0x02, "ocp"),
+    (0x04, "opp")
+)
+PROTECTION_MASK = 0x07
+
+# Consulta, tolerancia de verificación, nombre y unidad de cada consigna
+SETPOINT_QUERIES = {
+    "voltage": ("VOLT?", 0.5, "voltaje", "V"),
+    "current": ("CURR?", 0.01, "corriente", "A")
+}
+
+# Consultas de read_state(), enviadas en un único intercambio encadenado
+STATE_QUERIES = (
+    ("voltage", "MEAS:VOLT?"),
+    ("current", "MEAS:CURR?"),
+    ("voltage_set", "VOLT?"),
+    ("current_set", "CURR?"),
+    ("output", "OUTP?"),
+    ("questionable", "STAT:QUES:COND?")
+)
+
+
+def command_priority(command: str) -> int:
+    """
+    Prioridad por defecto de un comando SCPI
+    
+    Una cadena ("VOLT 12.00;:VOLT?") se clasifica por su primer comando.
+    
+    Args:
+        command: Comando SCPI
+        
+    Returns:
+        PRIORITY_SAFETY para apagar la salida, PRIORITY_POLL para consultas y
+        PRIORITY_CONTROL para el resto de escrituras
+    """
+    first = command.split(";", 1)[0].lstrip(":")
+    normalized = " ".join(first.strip().upper().split())
+    if normalized in SAFETY_COMMANDS:
+        return PRIORITY_SAFETY
+    if "?" in normalized:
+        return PRIORITY_POLL
+    return PRIORITY_CONTROL
+
+
+class XLNConnectionManager:
+    """
+    Gestor de conexión con reconexión en segundo plano y circuit breaker
+    
+    Tras failure_threshold fallas consecutivas el circuito se abre: las
+    peticiones fallan de inmediato hasta que vence el backoff exponencial y se
+    permite un único intento de prueba (half-open).
+    """
+    
+    def __init__(
+        self,
+        fuente: "FuenteXLN",
+        failure_threshold: int = 3,
+        backoff_initial: float = 1.0,
+        backoff_max: float = 60.0,
+        probe_interval: float = 5.0,
+        probe_timeout: Optional[float] = None
+    ):
+        """
+        Inicializa el gestor
+        
+        Args:
+            fuente: Fuente gestionada
+            failure_threshold: Fallas consecutivas para abrir el circuito
+            backoff_initial: Espera inicial antes de reintentar (s)
+            backoff_max: Espera máxima entre reintentos (s)
+            probe_interval: Inactividad tras la cual se sondea la conexión (s)
+            probe_timeout: Plazo del intento de prueba en half-open antes de admitir
+                otro (s); por defecto el doble del timeout de la fuente
+        """
+        self.fuente = fuente
+        self.failure_threshold = failure_threshold
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout if probe_timeout is not None else 2 * fuente.timeout
+        
+        self.state = LINK_CLOSED
+        self.probe_started = 0.0
+        self.consecutive_failures = 0
+        self.backoff = backoff_initial
+        self.next_attempt = 0.0
+        self.last_success: Optional[float] = None
+        self.last_activity = 0.0
+        
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def is_running(self) -> bool:
+        """Indica si el hilo de reconexión está activo"""
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self):
+        """Inicia el hilo de reconexión y sondeo"""
+        if self.is_running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="xln-link", daemon=True)
+        self._thread.start()
+        logger.info("Gestor de conexión de fuente iniciado")
+    
+    def stop(self, timeout: Optional[float] = None):
+        """Detiene el hilo de reconexión"""
+        self._stop_event.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+    
+    def allow_request(self) -> bool:
+        """
+        Decide si se puede intentar una operación sobre el enlace
+        
+        Al vencer el backoff se admite un único intento de prueba; mientras
+        está en curso (half-open) las demás peticiones siguen fallando de
+        inmediato. Si la prueba no se resuelve en probe_timeout se admite otra.
+        
+        Returns:
+            False mientras el circuito está abierto o hay una prueba en curso
+        """
+        with self._lock:
+            if self.state == LINK_CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == LINK_OPEN:
+                if now < self.next_attempt:
+                    return False
+                self.state = LINK_HALF_OPEN
+            elif now - self.probe_started < self.probe_timeout:
+                return False
+            self.probe_started = now
+            return True
+    
+    def abandon_probe(self):
+        """Devuelve el turno de prueba sin resultado (no había conexión que probar)"""
+        with self._lock:
+            if self.state == LINK_HALF_OPEN:
+                self.state = LINK_OPEN
+                self.next_attempt = time.monotonic()
+        self._wake.set()
+    
+    def record_success(self):
+        """Registra una operación exitosa y cierra el circuito"""
+        with self._lock:
+            if self.state != LINK_CLOSED:
+                logger.info("Enlace con fuente restablecido")
+            self.state = LINK_CLOSED
+            self.consecutive_failures = 0
+            self.backoff = self.backoff_initial
+            self.last_success = time.time()
+            self.last_activity = time.monotonic()
+    
+    def record_failure(self):
+        """Registra una falla; abre el circuito al superar el umbral"""
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == LINK_HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state == LINK_OPEN or self.state == LINK_HALF_OPEN:
+                    self.backoff = min(self.backoff * 2, self.backoff_max)
+                self.state = LINK_OPEN
+                self.next_attempt = time.monotonic() + self.backoff
+                logger.warning(f"Circuito de fuente abierto: reintento en {self.backoff:.1f}s")
+        self._wake.set()
+    
+    def request_reconnect(self):
+        """Despierta al hilo para que reconecte lo antes posible"""
+        self._wake.set()
+    
+    def _run(self):
+        """Bucle de reconexión con backoff y sondeo de vida en inactividad"""
+        while not self._stop_event.is_set():
+            self._wake.clear()
+            wait_time = self.probe_interval
+            
+            if self.fuente.connection is None:
+                if self.allow_request():
+                    self.fuente.connect()
+                with self._lock:
+                    if self.state == LINK_OPEN:
+                        wait_time = max(0.0, self.next_attempt - time.monotonic())
+            else:
+                idle = time.monotonic() - self.last_activity
+                if idle >= self.probe_interval:
+                    self.fuente.probe()
+                    idle = 0.0
+                wait_time = self.probe_interval - idle
+            
+            self._wake.wait(max(0.05, wait_time))
+    
+    def status(self) -> dict:
+        """
+        Estado del enlace para la API
+        
+        Returns:
+            Diccionario con conexión, circuito, fallas y próximo reintento
+        """
+        with self._lock:
+            retry_in = 0.0
+            if self.state == LINK_OPEN:
+                retry_in = max(0.0, self.next_attempt - time.monotonic())
+            return {
+                "connected": self.fuente.connection is not None,
+                "circuit": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "retry_in": round(retry_in, 1),
+                "last_success": self.last_success
+            }
+
+
+class XLNCommandWorker:
+    """
+    Hilo de E/S dueño del enlace con la fuente
+    
+    Los llamadores encolan comandos con prioridad y reciben un Future; el
+    hilo los envía de a uno, de modo que escritura y lectura de cada
+    intercambio nunca se intercalan entre hilos. Una secuencia encadenada
+    (submit_batch) es un solo trabajo: un comando de seguridad encolado
+    mientras tanto se atiende antes de la secuencia siguiente.
+    """
+    
+    def __init__(self, fuente: "FuenteXLN"):
+        """
+        Args:
+            fuente: Fuente cuyo enlace atiende el hilo
+        """
+        self.fuente = fuente
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+        self._stats_lock = threading.Lock()
+        self._processed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._last_wait = 0.0
+    
+    @property
+    def is_running(self) -> bool:
+        """Indica si el hilo de E/S está activo"""
+        return self._thread is not None and self._thread.is_alive()
+    
+    def on_worker_thread(self) -> bool:
+        """Indica si el llamador es el propio hilo de E/S"""
+        return threading.current_thread() is self._thread
+    
+    def start(self):
+        """Inicia el hilo de E/S"""
+        if self.is_running:
+            return
+        self._thread = threading.Thread(target=self._run, name="xln-io", daemon=True)
+        self._thread.start()
+        logger.info("Cola de comandos de fuente iniciada")
+    
+    def stop(self, timeout: Optional[float] = None):
+        """Detiene el hilo tras el comando en curso; los pendientes se resuelven con None"""
+        if self._thread is None:
+            return
+        self._queue.put((-1, next(self._sequence), None, None, 0.0))
+        self._thread.join(timeout)
+        self._thread = None
+        self._drain()
+    
+    def submit(self, command: str, priority: Optional[int] = None) -> Future:
+        """
+        Encola un comando
+        
+        Args:
+            command: Comando SCPI
+            priority: Prioridad (por defecto según command_priority)
+            
+        Returns:
+            Future que se resuelve con la respuesta (o None si error)
+        """
+        if priority is None:
+            priority = command_priority(command)
+        future: Future = Future()
+        self._queue.put((priority, next(self._sequence), command, future, time.monotonic()))
+        return future
+    
+    def submit_batch(
+        self,
+        commands: Sequence[str],
+        synchronized: Optional[bool] = None,
+        priority: int = PRIORITY_CONTROL
+    ) -> Future:
+        """
+        Encola una secuencia encadenada como un solo trabajo
+        
+        Args:
+            commands: Comandos SCPI
+            synchronized: Como en FuenteXLN.send_pipelined
+            priority: Prioridad de la secuencia completa
+            
+        Returns:
+            Future que se resuelve con la lista de resultados (o None si error)
+        """
+        future: Future = Future()
+        batch = (tuple(commands), synchronized)
+        self._queue.put((priority, next(self._sequence), batch, future, time.monotonic()))
+        return future
+    
+    def _run(self):
+        """Atiende la cola en orden de prioridad y llegada"""
+        while True:
+            priority, _, command, future, submitted = self._queue.get()
+            if future is None:
+                break
+            if not future.set_running_or_notify_cancel():
+                continue
+            
+            wait = time.monotonic() - submitted
+            with self._stats_lock:
+                self._processed += 1
+                self._wait_total += wait
+                self._wait_max = max(self._wait_max, wait)
+                self._last_wait = wait
+            
+            try:
+                if isinstance(command, tuple):
+                    future.set_result(self.fuente._send_pipelined_direct(*command))
+                else:
+                    future.set_result(self.fuente._send_direct(command))
+            except Exception as e:
+                logger.error(f"Error en cola de comandos con '{command}': {e}")
+                future.set_result(None)
+    
+    def _drain(self):
+        """Resuelve con None los comandos que quedaron en la cola"""
+        while True:
+            try:
+                _, _, _, future, _ = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if future is not None and future.set_running_or_notify_cancel():
+                future.set_result(None)
+    
+    def stats(self) -> dict:
+        """
+        Métricas de la cola para la API
+        
+        Returns:
+            Diccionario con profundidad, comandos atendidos y espera promedio/máxima/última (ms)
+        """
+        with self._stats_lock:
+            average = self._wait_total / self._processed if self._processed else 0.0
+            return {
+                "running": self.is_running,
+                "depth": self._queue.qsize(),
+                "processed": self._processed,
+                "wait_avg_ms": round(average * 1000, 2),
+                "wait_max_ms": round(self._wait_max * 1000, 2),
+                "wait_last_ms": round(self._last_wait * 1000, 2)
+            }
+
+
+def build_ramp_timeline(
+    start_voltage: Optional[float],
+    end_voltage: Optional[float],
+    start_current: Optional[float],
+    end_current: Optional[float],
+    duration: float,
+    update_rate: float
+) -> List[Tuple[float, Optional[float], Optional[float]]]:
+    """
+    Precalcula los puntos de una rampa lineal
+    
+    Args:
+        start_voltage: Voltaje inicial (V)
+        end_voltage: Voltaje final (V); None = el voltaje no se rampa
+        start_current: Corriente inicial (A)
+        end_current: Corriente final (A); None = la corriente no se rampa
+        duration: Duración de la rampa (s)
+        update_rate: Actualizaciones de consigna por segundo
+        
+    Returns:
+        Lista de (segundos desde el inicio, voltaje, corriente); el último punto es el final exacto
+    """
+    steps = max(1, int(round(duration * update_rate)))
+    timeline = []
+    for step in range(1, steps + 1):
+        fraction = step / steps
+        voltage = current = None
+        if end_voltage is not None:
+            voltage = start_voltage + (end_voltage - start_voltage) * fraction
+        if end_current is not None:
+            current = start_current + (end_current - start_current) * fraction
+        timeline.append((duration * fraction, voltage, current))
+    return timeline
+
+
+class XLNRampEngine:
+    """
+    Rampas de consigna transmitidas sobre una línea de tiempo precalculada
+    
+    Cada punto se envía como escrituras encadenadas sin *OPC?; la lectura
+    de verificación se agrega sólo cada verify_interval segundos y en el
+    último punto. Si el envío se atrasa, se salta al último punto vencido
+    en lugar de acumular retraso.
+    """
+    
+    def __init__(
+        self,
+        fuente: "FuenteXLN",
+        update_rate: float = 10.0,
+        verify_interval: float = 1.0
+    ):
+        """
+        Args:
+            fuente: Fuente a controlar
+            update_rate: Actualizaciones de consigna por segundo
+            verify_interval: Intervalo entre lecturas de verificación (s)
+        """
+        self.fuente = fuente
+        self.update_rate = update_rate
+        self.verify_interval = verify_interval
+        
+        self._thread: Optional[threading.Thread] = None
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+        self._done.set()
+        self._lock = threading.Lock()
+        self._status = {
+            "running": False,
+            "points_total": 0,
+            "points_sent": 0,
+            "points_skipped": 0,
+            "verifications": 0,
+            "result": None,
+            "error": None
+        }
+    
+    @property
+    def is_running(self) -> bool:
+        """Indica si hay una rampa en curso"""
+        return not self._done.is_set()
+    
+    def _validate(self, timeline: Sequence[Tuple[float, Optional[float], Optional[float]]]) -> bool:
+        """Valida todos los puntos antes de empezar"""
+        for _, voltage, current in timeline:
+            if voltage is not None and not self.fuente._validate_voltage(voltage):
+                return False
+            if current is not None and not self.fuente._validate_current(current):
+                return False
+        return True
+    
+    def start(self, timeline: Sequence[Tuple[float, Optional[float], Optional[float]]]) -> bool:
+        """
+        Inicia una rampa en segundo plano
+        
+        Args:
+            timeline: Puntos (segundos desde el inicio, voltaje, corriente); None = sin cambio
+            
+        Returns:
+            True si la rampa comenzó
+        """
+        with self._lock:
+            if self.is_running:
+                logger.error("Ya hay una rampa en curso")
+                return False
+            if not timeline or not self._validate(timeline):
+                return False
+            
+            self._cancel.clear()
+            self._done.clear()
+            self._status.update({
+                "running": True,
+                "points_total": len(timeline),
+                "points_sent": 0,
+                "points_skipped": 0,
+                "verifications": 0,
+                "result": None,
+                "error": None
+            })
+            self._thread = threading.Thread(
+                target=self._execute, args=(list(timeline),), name="xln-ramp", daemon=True
+            )
+            self._thread.start()
+        return True
+    
+    def run(self, timeline: Sequence[Tuple[float, Optional[float], Optional[float]]]) -> bool:
+        """
+        Ejecuta una rampa y espera su fin
+        
+        Returns:
+            True si la rampa llegó al último punto verificado
+        """
+        if not self.start(timeline):
+            return False
+        return bool(self.wait())
+    
+    def wait(self, timeout: Optional[float] = None) -> Optional[bool]:
+        """
+        Espera el fin de la rampa
+        
+        Returns:
+            Resultado de la rampa o None si sigue en curso al vencer timeout
+        """
+        if not self._done.wait(timeout):
+            return None
+        return self._status["result"]
+    
+    def cancel(self):
+        """Detiene la rampa en curso; la fuente conserva la última consigna enviada"""
+        if self.is_running:
+            self._cancel.set()
+            logger.warning("Rampa de fuente cancelada")
+    
+    def status(self) -> dict:
+        """Progreso de la rampa actual o de la última ejecutada"""
+        with self._lock:
+            return dict(self._status)
+    
+    def _finish(self, result: bool, error: Optional[str] = None, log: bool = True):
+        with self._lock:
+            self._status.update({"running": False, "result": result, "error": error})
+        if error and log:
+            logger.error(f"Rampa de fuente interrumpida: {error}")
+        self._done.set()
+    
+    def _execute(self, timeline: List[Tuple[float, Optional[float], Optional[float]]]):
+        """Transmite los puntos según la línea de tiempo"""
+        fuente = self.fuente
+        fuente.invalidate_cache("voltage_set")
+        fuente.invalidate_cache("current_set")
+        
+        start = time.monotonic()
+        last_verify = start
+        index = 0
+        
+        while index < len(timeline):
+            remaining = start + timeline[index][0] - time.monotonic()
+            if remaining > 0 and self._cancel.wait(remaining):
+                break
+            if self._cancel.is_set():
+                break
+            
+            now = time.monotonic()
+            skipped = 0
+            while index + 1 < len(timeline) and start + timeline[index + 1][0] <= now:
+                index += 1
+                skipped += 1
+            
+            _, voltage, current = timeline[index]
+            commands = []
+            checks = []
+            if voltage is not None:
+                commands.append(f"VOLT {voltage:.2f}")
+                checks.append(("voltage", round(voltage, 2)))
+            if current is not None:
+                commands.append(f"CURR {current:.3f}")
+                checks.append(("current", round(current, 3)))
+            
+            verify = index == len(timeline) - 1 or now - last_verify >= self.verify_interval
+            if verify:
+                commands.extend(SETPOINT_QUERIES[key][0] for key, _ in checks)
+                last_verify = now
+            
+            results = fuente.send_pipelined(commands, synchronized=False)
+            if any(result is None for result in results):
+                self._finish(
+                    False, f"sin respuesta de la fuente en el punto {index + 1}/{len(timeline)}"
+                )
+                return
+            
+            if verify:
+                for (key, expected), raw in zip(checks, results[len(checks):]):
+                    _, tolerance, label, unit = SETPOINT_QUERIES[key]
+                    try:
+                        readback = float(raw)
+                    except ValueError:
+                        readback = None
+                    fuente._cache_put(f"{key}_set", readback)
+                    if readback is None or abs(readback - expected) >= tolerance:
+                        self._finish(
+                            False, f"{label} leído {readback}{unit}, esperado {expected}{unit}"
+                        )
+                        return
+            
+            with self._lock:
+                self._status["points_sent"] += 1
+                self._status["points_skipped"] += skipped
+                self._status["verifications"] += int(verify)
+            index += 1
+        
+        if self._cancel.is_set():
+            self._finish(False, "cancelada", log=False)
+            return
+        
+        logger.info(
+            f"Rampa de fuente completada: {len(timeline)} puntos en "
+            f"{time.monotonic() - start:.2f}s"
+        )
+        self._finish(True)
+
 
 class FuenteXLN:
     """Controlador para fuente de alimentación BK Precision XLN30052"""
@@ -21,80 +644,497 @@ class FuenteXLN:
         
         Args:
             host: Dirección IP de la fuente
-            port: Puerto Telnet (5024 por defecto)
+            port: Puerto TCP (5024 por defecto)
             timeout: Timeout en segundos
         """
         self.host = host
         self.port = port
         self.timeout = timeout
-        self.connection: Optional[telnetlib.Telnet] = None
+        self.connection: Optional[SCPIConnection] = None
         self.voltage_max = 300.0
         self.current_max = 5.2
+        self.link = XLNConnectionManager(self)
+        self.io = XLNCommandWorker(self)
+        self.ramp = XLNRampEngine(self)
+        self.opc_sync = True
+        self._io_lock = threading.RLock()
+        self._pending_writes: List[Future] = []
+        self._pending_setpoints: Dict[str, float] = {}
+        self._pending_lock = threading.Lock()
+        
+        # Consignas y estado de salida: los cambia este servidor, se sirven de memoria
+        self.state_ttl = 5.0
+        self._cache: Dict[str, Tuple[object, float]] = {}
+        self._cache_lock = threading.Lock()
         
         logger.info(f"Inicializando FuenteXLN en {host}:{port}")
     
+    @property
+    def is_connected(self) -> bool:
+        """Indica si hay conexión abierta (no bloquea ni intenta conectar)"""
+        return self.connection is not None
+    
+    def _open_transport(self):
+        """
+        Abre una conexión SCPI asíncrona con la fuente
+        
+        Returns:
+            Conexión abierta (lanza excepción si falla)
+        """
+        return SCPIConnection(self.host, self.port, self.timeout)
+    
+    def _close_transport(self, connection):
+        """Cierra una conexión SCPI"""
+        connection.close()
+    
+    def _exchange(self, command: str, expect_response: bool) -> Optional[str]:
+        """
+        Escribe un comando y, si es consulta, lee la respuesta
+        
+        Args:
+            command: Comando SCPI
+            expect_response: Leer una línea de respuesta
+            
+        Returns:
+            Respuesta (sin terminador) o "" si no es consulta; un timeout
+            se propaga como TimeoutError y cierra la conexión
+        """
+        if not expect_response:
+            self.connection.write(command)
+            # Sin *OPC? no hay confirmación: se da tiempo fijo a la fuente
+            time.sleep(0.1)
+            return ""
+        
+        return self.connection.query(command)
+    
+    def _exchange_many(self, commands: Sequence[Tuple[str, bool]]) -> List[str]:
+        """
+        Envía varios comandos con sus respuestas en vuelo simultáneamente
+        
+        Args:
+            commands: Pares (comando, espera_respuesta)
+            
+        Returns:
+            Respuesta de cada comando ("" para los que no responden)
+        """
+        return self.connection.exchange_many(commands)
+    
     def connect(self) -> bool:
         """
-        Establece conexión Telnet con la fuente
+        Establece conexión TCP con la fuente
         
         Returns:
             True si conexión exitosa, False en caso contrario
         """
+        # El connect (hasta timeout + saludo) ocurre sin reservar el enlace: los
+        # comandos en cola fallan de inmediato mientras tanto en lugar de esperarlo
         try:
-            self.connection = telnetlib.Telnet(
-                self.host,
-                self.port,
-                self.timeout
-            )
-            logger.info(f"Conexión establecida con fuente en {self.host}:{self.port}")
-            time.sleep(0.5)
-            return True
+            connection = self._open_transport()
         except Exception as e:
             logger.error(f"Error al conectar con fuente: {e}")
+            self.link.record_failure()
             return False
+        
+        with self._io_lock:
+            redundant = self.connection is not None
+            if not redundant:
+                self.connection = connection
+        
+        if redundant:
+            # Otro hilo conectó mientras tanto: se conserva su conexión
+            try:
+                self._close_transport(connection)
+            except Exception as e:
+                logger.debug(f"Error al cerrar conexión redundante: {e}")
+        else:
+            logger.info(f"Conexión establecida con fuente en {self.host}:{self.port}")
+        self.link.record_success()
+        return True
     
     def disconnect(self):
         """Cierra la conexión con la fuente"""
-        if self.connection:
+        # Al perder el enlace la fuente pudo cambiar (reinicio, panel frontal)
+        self.invalidate_cache()
+        with self._io_lock:
+            connection, self.connection = self.connection, None
+        if connection:
             try:
-                self.connection.close()
+                self._close_transport(connection)
                 logger.info("Conexión con fuente cerrada")
             except Exception as e:
                 logger.error(f"Error al cerrar conexión: {e}")
-            finally:
-                self.connection = None
     
-    def _send_command(self, command: str) -> Optional[str]:
+    def start_link_manager(self):
+        """Activa la reconexión en segundo plano (las peticiones nunca esperan un connect)"""
+        self.link.start()
+    
+    def stop_link_manager(self):
+        """Detiene la reconexión en segundo plano"""
+        self.link.stop()
+    
+    def start_io_worker(self):
+        """Serializa todos los comandos a través del hilo de E/S con cola de prioridad"""
+        self.io.start()
+    
+    def stop_io_worker(self):
+        """Detiene el hilo de E/S (los comandos vuelven a enviarse directamente)"""
+        self.io.stop()
+    
+    def probe(self) -> bool:
+        """
+        Sondeo de vida barato sobre la conexión existente
+        
+        Returns:
+            True si la fuente respondió
+        """
+        return self._send_command("*IDN?") is not None
+    
+    def query_many(self, *queries: str) -> Optional[List[str]]:
+        """
+        Envía varias consultas SCPI encadenadas en un solo intercambio
+        
+        Cada consulta se envía con ruta absoluta (";:") para que el árbol
+        SCPI no la interprete relativa a la anterior.
+        
+        Args:
+            queries: Consultas SCPI (cada una termina en "?")
+            
+        Returns:
+            Lista de respuestas en el mismo orden o None si error
+        """
+        command = ";:".join(query.strip().lstrip(":") for query in queries)
+        result = self._send_command(command)
+        if result is None:
+            return None
+        
+        values = [value.strip() for value in result.split(";")]
+        if len(values) != len(queries):
+            logger.error(
+                f"Respuesta encadenada inválida: {len(queries)} consultas, respuesta '{result}'"
+            )
+            return None
+        return values
+    
+    def _send_command(self, command: str, priority: Optional[int] = None) -> Optional[str]:
         """
         Envía comando SCPI a la fuente
         
+        Con el hilo de E/S activo el comando se encola y se espera su
+        resultado; sin él se envía directamente bajo el candado del socket.
+        
         Args:
             command: Comando SCPI a enviar
+            priority: Prioridad en la cola (por defecto según command_priority)
             
         Returns:
             Respuesta de la fuente o None si error
         """
-        if not self.connection:
-            if not self.connect():
-                return None
+        if self.io.is_running and not self.io.on_worker_thread():
+            return self._wait_result(self.io.submit(command, priority), f"'{command}'")
+        return self._send_direct(command)
+    
+    def _wait_result(self, future: Future, description: str):
+        """
+        Espera el resultado de un trabajo encolado como máximo timeout + RESULT_WAIT_MARGIN
         
+        Si el plazo vence el trabajo se cancela (si aún no empezó), se
+        registra una falla del enlace y se devuelve None.
+        """
         try:
-            cmd = command.strip() + "\r\n"
-            self.connection.write(cmd.encode('ascii'))
-            
-            if "?" in command:
-                response = self.connection.read_until(b"\n", timeout=self.timeout)
-                result = response.decode('ascii').strip()
-                logger.debug(f"Comando: {command} -> Respuesta: {result}")
-                return result
+            return future.result(timeout=self.timeout + RESULT_WAIT_MARGIN)
+        except FutureTimeoutError:
+            future.cancel()
+            logger.error(
+                f"Sin resultado de la cola de comandos para {description} "
+                f"en {self.timeout + RESULT_WAIT_MARGIN:.1f}s"
+            )
+            self.link.record_failure()
+            return None
+    
+    def _send_direct(self, command: str) -> Optional[str]:
+        """
+        Envía un comando sin pasar por la cola
+        
+        Falla de inmediato (None) si el circuito está abierto o, con el gestor
+        de conexión activo, si no hay conexión establecida.
+        """
+        if not self.link.allow_request():
+            logger.debug(f"Fuente no disponible (circuito abierto): '{command}' descartado")
+            return None
+        
+        with self._io_lock:
+            return self._send_locked(command)
+    
+    def _cache_get(self, key: str):
+        """Valor en memoria si no superó state_ttl, o None"""
+        with self._cache_lock:
+            entry = self._cache.get(key)
+        if entry is None or time.monotonic() - entry[1] > self.state_ttl:
+            return None
+        return entry[0]
+    
+    def _cache_put(self, key: str, value):
+        """Registra un valor conocido del instrumento (escritura confirmada o lectura)"""
+        if value is None:
+            return
+        with self._cache_lock:
+            self._cache[key] = (value, time.monotonic())
+    
+    def invalidate_cache(self, key: Optional[str] = None):
+        """
+        Descarta el estado en memoria
+        
+        Args:
+            key: "voltage_set", "current_set" u "output"; None descarta todo
+        """
+        with self._cache_lock:
+            if key is None:
+                self._cache.clear()
             else:
-                time.sleep(0.1)
-                logger.debug(f"Comando enviado: {command}")
-                return "OK"
+                self._cache.pop(key, None)
+    
+    def _ensure_connected(self) -> bool:
+        """Verifica la conexión; sin gestor activo conecta en línea (comportamiento original)"""
+        if self.connection:
+            return True
+        if self.link.is_running:
+            # La reconexión es del hilo del gestor; si este llamador tenía el turno
+            # de prueba, lo cede
+            self.link.abandon_probe()
+            return False
+        return self.connect()
+    
+    def _wire_command(self, command: str, synchronized: Optional[bool] = None) -> Tuple[str, bool]:
+        """
+        Traduce un comando a lo que se envía por el enlace
+        
+        Las escrituras se encadenan con *OPC?: la respuesta "1" llega cuando
+        la fuente terminó de aplicarlas, sin esperas fijas.
+        
+        Args:
+            command: Comando SCPI
+            synchronized: Sincronizar escrituras con *OPC? (por defecto opc_sync)
+            
+        Returns:
+            (comando enviado, espera_respuesta)
+        """
+        if synchronized is None:
+            synchronized = self.opc_sync
+        if "?" in command or not synchronized:
+            return command, "?" in command
+        return f"{command};:*OPC?", True
+    
+    def _interpret(
+        self,
+        command: str,
+        result: str,
+        synchronized: Optional[bool] = None
+    ) -> Optional[str]:
+        """Convierte la respuesta del enlace en el resultado de _send_command"""
+        if synchronized is None:
+            synchronized = self.opc_sync
+        if "?" in command:
+            logger.debug(f"Comando: {command} -> Respuesta: {result}")
+            return result
+        
+        if synchronized and result != "1":
+            logger.error(f"Comando '{command}' no confirmado por *OPC?: '{result}'")
+            return None
+        
+        logger.debug(f"Comando enviado: {command}")
+        return "OK"
+    
+    def _send_locked(self, command: str) -> Optional[str]:
+        """Cuerpo de _send_command ejecutado con el socket reservado"""
+        if not self._ensure_connected():
+            return None
+        
+        try:
+            result = self._exchange(*self._wire_command(command))
+        except (OSError, EOFError) as e:
+            logger.error(f"Error de conexión al enviar comando '{command}': {e}")
+            self.disconnect()
+            self.link.record_failure()
+            return None
         except Exception as e:
             logger.error(f"Error al enviar comando '{command}': {e}")
-            self.disconnect()
+            self.link.record_failure()
             return None
+        
+        self.link.record_success()
+        return self._interpret(command, result)
+    
+    def send_pipelined(
+        self,
+        commands: Sequence[str],
+        synchronized: Optional[bool] = None
+    ) -> List[Optional[str]]:
+        """
+        Envía varios comandos sin esperar cada respuesta antes del siguiente
+        
+        Los comandos se escriben seguidos y las respuestas se recogen en
+        orden, de modo que la secuencia cuesta aproximadamente un solo viaje
+        de ida y vuelta. Con el hilo de E/S activo la secuencia se encola
+        como un solo trabajo con prioridad de control; reserva el enlace
+        durante toda la secuencia, pero no se adelanta a los comandos de
+        seguridad pendientes.
+        
+        Args:
+            commands: Comandos SCPI
+            synchronized: False para enviar escrituras sin *OPC? ni espera
+                (su confirmación queda a cargo de una consulta posterior)
+                
+        Returns:
+            Resultado de cada comando como en _send_command (None si error)
+        """
+        if not commands:
+            return []
+        if self.io.is_running and not self.io.on_worker_thread():
+            results = self._wait_result(
+                self.io.submit_batch(commands, synchronized),
+                f"secuencia de {len(commands)} comandos"
+            )
+            return results if results is not None else [None] * len(commands)
+        return self._send_pipelined_direct(commands, synchronized)
+    
+    def _send_pipelined_direct(
+        self,
+        commands: Sequence[str],
+        synchronized: Optional[bool] = None
+    ) -> List[Optional[str]]:
+        """Envía una secuencia encadenada sin pasar por la cola, bajo el candado del socket"""
+        if not self.link.allow_request():
+            return [None] * len(commands)
+        
+        with self._io_lock:
+            if not self._ensure_connected():
+                return [None] * len(commands)
+            
+            try:
+                results = self._exchange_many(
+                    [self._wire_command(command, synchronized) for command in commands]
+                )
+            except (OSError, EOFError) as e:
+                logger.error(f"Error de conexión en secuencia de {len(commands)} comandos: {e}")
+                self.disconnect()
+                self.link.record_failure()
+                return [None] * len(commands)
+            except Exception as e:
+                logger.error(f"Error en secuencia de {len(commands)} comandos: {e}")
+                self.link.record_failure()
+                return [None] * len(commands)
+            
+            self.link.record_success()
+            return [
+                self._interpret(command, result, synchronized)
+                for command, result in zip(commands, results)
+            ]
+    
+    def _write_deferred(self, command: str) -> bool:
+        """
+        Encola una escritura sin esperar su resultado (modo "disparar y verificar después")
+        
+        Sin hilo de E/S la escritura se envía de forma síncrona.
+        
+        Returns:
+            True si quedó encolada o se envió correctamente
+        """
+        if not self.io.is_running or self.io.on_worker_thread():
+            return self._send_command(command) is not None
+        
+        future = self.io.submit(command)
+        with self._pending_lock:
+            self._pending_writes.append(future)
+        return True
+    
+    def _set_and_verify(self, key: str, command: str, value: float, verify: bool) -> bool:
+        """
+        Escribe una consigna y la verifica en el mismo intercambio o la deja pendiente
+        
+        Args:
+            key: "voltage" o "current"
+            command: Escritura SCPI de la consigna
+            value: Valor escrito
+            verify: True para escritura+lectura encadenadas; False para diferir la verificación
+            
+        Returns:
+            True si la consigna quedó verificada (o encolada con verify=False)
+        """
+        query, tolerance, label, unit = SETPOINT_QUERIES[key]
+        
+        if not verify:
+            with self._pending_lock:
+                self._pending_setpoints[key] = value
+            queued = self._write_deferred(command)
+            if queued:
+                self._cache_put(f"{key}_set", value)
+            return queued
+        
+        self.invalidate_cache(f"{key}_set")
+        result = self._send_command(f"{command};:{query}", PRIORITY_CONTROL)
+        if not result:
+            return False
+        
+        try:
+            readback = float(result)
+        except ValueError:
+            readback = None
+        
+        if readback is not None and abs(readback - value) < tolerance:
+            self._cache_put(f"{key}_set", readback)
+            logger.info(f"Consigna de {label}: {value}{unit} (verificado: {readback}{unit})")
+            return True
+        
+        self._cache_put(f"{key}_set", readback)
+        logger.error(
+            f"Verificación de {label} falló: esperado {value}{unit}, leído {readback}{unit}"
+        )
+        return False
+    
+    def verify_setpoints(self) -> bool:
+        """
+        Confirma las escrituras diferidas y verifica las consignas en un solo intercambio
+        
+        Returns:
+            True si todas las escrituras se aplicaron y las consignas coinciden
+        """
+        with self._pending_lock:
+            writes, self._pending_writes = self._pending_writes, []
+            expected, self._pending_setpoints = self._pending_setpoints, {}
+        
+        ok = all(
+            self._wait_result(future, "escritura diferida") is not None for future in writes
+        )
+        if not ok:
+            logger.error("Escritura diferida a la fuente no confirmada")
+        
+        if not expected:
+            return ok
+        
+        keys = list(expected)
+        values = self.query_many(*(SETPOINT_QUERIES[key][0] for key in keys))
+        if values is None:
+            for key in keys:
+                self.invalidate_cache(f"{key}_set")
+            return False
+        
+        for key, raw in zip(keys, values):
+            _, tolerance, label, unit = SETPOINT_QUERIES[key]
+            try:
+                readback = float(raw)
+            except ValueError:
+                readback = None
+            self._cache_put(f"{key}_set", readback)
+            if readback is None or abs(readback - expected[key]) >= tolerance:
+                logger.error(
+                    f"Verificación diferida de {label} falló: "
+                    f"esperado {expected[key]}{unit}, leído {readback}{unit}"
+                )
+                ok = False
+            else:
+                logger.info(f"Consigna de {label} verificada: {readback}{unit}")
+        
+        return ok
     
     def _validate_voltage(self, voltage: float) -> bool:
         """Valida que el voltaje esté en rango permitido"""
@@ -110,12 +1150,13 @@ class FuenteXLN:
             return False
         return True
     
-    def set_voltage(self, voltage: float) -> bool:
+    def set_voltage(self, voltage: float, verify: bool = True) -> bool:
         """
         Configura el voltaje de salida
         
         Args:
             voltage: Voltaje en voltios (0-300V)
+            verify: False para no esperar la lectura de verificación (ver verify_setpoints)
             
         Returns:
             True si configuración exitosa
@@ -126,39 +1167,73 @@ class FuenteXLN:
         if voltage > 50.0:
             logger.warning(f"Configurando voltaje alto: {voltage}V - Verificar seguridad")
         
-        result = self._send_command(f"VOLT {voltage:.2f}")
-        if result:
-            readback = self.get_voltage()
-            if readback is not None and abs(readback - voltage) < 0.5:
-                logger.info(f"Voltaje configurado: {voltage:.2f}V (verificado: {readback:.2f}V)")
-                return True
-            else:
-                logger.error(f"Verificación de voltaje falló: esperado {voltage}V, leído {readback}V")
-                return False
-        return False
+        return self._set_and_verify("voltage", f"VOLT {voltage:.2f}", voltage, verify)
+    
+    def ramp_to(
+        self,
+        voltage: Optional[float] = None,
+        current: Optional[float] = None,
+        duration: float = 1.0,
+        wait: bool = True
+    ) -> bool:
+        """
+        Lleva las consignas linealmente desde su valor actual hasta el indicado
+        
+        Args:
+            voltage: Voltaje final (V); None = sin cambio
+            current: Corriente final (A); None = sin cambio
+            duration: Duración de la rampa (s)
+            wait: Esperar el final de la rampa
+            
+        Returns:
+            True si la rampa terminó verificada (o comenzó, con wait=False)
+        """
+        start_voltage = self.get_voltage() if voltage is not None else None
+        start_current = self.get_current() if current is not None else None
+        missing_voltage = voltage is not None and start_voltage is None
+        missing_current = current is not None and start_current is None
+        if missing_voltage or missing_current:
+            logger.error("No se pudo leer la consigna inicial de la rampa")
+            return False
+        
+        timeline = build_ramp_timeline(
+            start_voltage, voltage, start_current, current, duration, self.ramp.update_rate
+        )
+        if wait:
+            return self.ramp.run(timeline)
+        return self.ramp.start(timeline)
     
-    def get_voltage(self) -> Optional[float]:
+    def get_voltage(self, refresh: bool = False) -> Optional[float]:
         """
-        Lee el voltaje configurado
+        Lee el voltaje configurado (de memoria si no superó state_ttl)
         
+        Args:
+            refresh: Forzar la consulta al instrumento
+            
         Returns:
             Voltaje en voltios o None si error
         """
+        cached = None if refresh else self._cache_get("voltage_set")
+        if cached is not None:
+            return cached
+        
         result = self._send_command("VOLT?")
         if result:
             try:
                 voltage = float(result)
+                self._cache_put("voltage_set", voltage)
                 return voltage
             except ValueError:
                 logger.error(f"Respuesta de voltaje inválida: {result}")
         return None
     
-    def set_current(self, current: float) -> bool:
+    def set_current(self, current: float, verify: bool = True) -> bool:
         """
         Configura la corriente límite
         
         Args:
             current: Corriente en amperios (0-5.2A)
+            verify: False para no esperar la lectura de verificación (ver verify_setpoints)
             
         Returns:
             True si configuración exitosa
@@ -166,28 +1241,27 @@ class FuenteXLN:
         if not self._validate_current(current):
             return False
         
-        result = self._send_command(f"CURR {current:.3f}")
-        if result:
-            readback = self.get_current()
-            if readback is not None and abs(readback - current) < 0.01:
-                logger.info(f"Corriente configurada: {current:.3f}A (verificado: {readback:.3f}A)")
-                return True
-            else:
-                logger.error(f"Verificación de corriente falló: esperado {current}A, leído {readback}A")
-                return False
-        return False
+        return self._set_and_verify("current", f"CURR {current:.3f}", current, verify)
     
-    def get_current(self) -> Optional[float]:
+    def get_current(self, refresh: bool = False) -> Optional[float]:
         """
-        Lee la corriente configurada
+        Lee la corriente configurada (de memoria si no superó state_ttl)
         
+        Args:
+            refresh: Forzar la consulta al instrumento
+            
         Returns:
             Corriente en amperios o None si error
         """
+        cached = None if refresh else self._cache_get("current_set")
+        if cached is not None:
+            return cached
+        
         result = self._send_command("CURR?")
         if result:
             try:
                 current = float(result)
+                self._cache_put("current_set", current)
                 return current
             except ValueError:
                 logger.error(f"Respuesta de corriente inválida: {result}")
@@ -232,44 +1306,62 @@ class FuenteXLN:
         Returns:
             True si activación exitosa
         """
+        self.invalidate_cache("output")
         result = self._send_command("OUTP ON")
         if result:
+            self._cache_put("output", True)
             logger.info("Salida de fuente activada")
             return True
         return False
     
     def output_off(self) -> bool:
         """
-        Desactiva la salida de la fuente
+        Desactiva la salida de la fuente (cancela cualquier rampa en curso)
         
         Returns:
             True si desactivación exitosa
         """
+        self.ramp.cancel()
+        self.invalidate_cache("output")
         result = self._send_command("OUTP OFF")
         if result:
+            self._cache_put("output", False)
             logger.info("Salida de fuente desactivada")
             return True
         return False
     
-    def get_output_state(self) -> Optional[bool]:
+    def get_output_state(self, refresh: bool = False) -> Optional[bool]:
         """
-        Consulta el estado de la salida
+        Consulta el estado de la salida (de memoria si no superó state_ttl)
         
+        Args:
+            refresh: Forzar la consulta al instrumento
+            
         Returns:
             True si salida activa, False si inactiva, None si error
         """
+        cached = None if refresh else self._cache_get("output")
+        if cached is not None:
+            return cached
+        
         result = self._send_command("OUTP?")
         if result:
             if result in ["1", "ON"]:
+                self._cache_put("output", True)
                 return True
             elif result in ["0", "OFF"]:
+                self._cache_put("output", False)
                 return False
         return None
     
-    def check_protections(self) -> dict:
+    @staticmethod
+    def decode_protections(status_int: int) -> dict:
         """
-        Verifica el estado de las protecciones
+        Interpreta el registro questionable
         
+        Args:
+            status_int: Valor de STAT:QUES:COND?
+            
         Returns:
             Diccionario con estado de protecciones
         """
@@ -280,31 +1372,93 @@ class FuenteXLN:
             "status": "ok"
         }
         
+        for bit, name in PROTECTION_BITS:
+            if status_int & bit:
+                protections[name] = True
+                protections["status"] = f"{name}_active"
+                logger.warning(f"Protección {name.upper()} activada")
+        
+        return protections
+    
+    def check_protections(self) -> dict:
+        """
+        Verifica el estado de las protecciones
+        
+        Returns:
+            Diccionario con estado de protecciones
+        """
         try:
-            status = self._send_command("STAT:QUES:COND?")
-            if status:
-                status_int = int(status)
-                
-                if status_int & 0x01:
-                    protections["ovp"] = True
-                    protections["status"] = "ovp_active"
-                    logger.warning("Protección OVP activada")
-                
-                if status_int & 0x02:
-                    protections["ocp"] = True
-                    protections["status"] = "ocp_active"
-                    logger.warning("Protección OCP activada")
-                
-                if status_int & 0x04:
-                    protections["opp"] = True
-                    protections["status"] = "opp_active"
-                    logger.warning("Protección OPP activada")
+            status = self.read_questionable(PRIORITY_POLL)
+            if status is not None:
+                return self.decode_protections(status)
         except Exception as e:
             logger.error(f"Error al verificar protecciones: {e}")
-            protections["status"] = "error"
         
+        # Sin respuesta válida no se puede afirmar que no haya disparo
+        protections = self.decode_protections(0)
+        protections["status"] = "error"
         return protections
     
+    def read_questionable(self, priority: int = PRIORITY_SAFETY) -> Optional[int]:
+        """
+        Lee el registro STAT:QUES:COND? (por defecto con prioridad de seguridad en la cola)
+        
+        Args:
+            priority: Prioridad en la cola de comandos
+            
+        Returns:
+            Valor del registro o None si no hubo respuesta o no es un entero
+        """
+        result = self._send_command("STAT:QUES:COND?", priority)
+        if not result:
+            return None
+        try:
+            status = int(result)
+        except ValueError:
+            logger.error(f"Registro questionable inválido: {result}")
+            return None
+        
+        if status & PROTECTION_MASK:
+            # Un disparo apaga la salida sin pasar por este servidor
+            self.invalidate_cache("output")
+        return status
+    
+    def read_state(self) -> Optional[Dict]:
+        """
+        Lee mediciones, consignas, salida y protecciones en un solo intercambio
+        
+        Returns:
+            Diccionario con voltage, current, power, voltage_set, current_set,
+            output (bool), questionable (int) y protections, o None si error
+        """
+        values = self.query_many(*(query for _, query in STATE_QUERIES))
+        if values is None:
+            return None
+        
+        raw = dict(zip((key for key, _ in STATE_QUERIES), values))
+        try:
+            voltage = float(raw["voltage"])
+            current = float(raw["current"])
+            questionable = int(raw["questionable"])
+            state = {
+                "voltage": voltage,
+                "current": current,
+                "power": voltage * current,
+                "voltage_set": float(raw["voltage_set"]),
+                "current_set": float(raw["current_set"]),
+                "output": raw["output"].upper() in ("1", "ON"),
+                "questionable": questionable,
+                "protections": self.decode_protections(questionable)
+            }
+        except ValueError:
+            logger.error(f"Estado de fuente inválido: {raw}")
+            return None
+        
+        for key in ("voltage_set", "current_set", "output"):
+            self._cache_put(key, state[key])
+        
+        return state
+    
     def reset_protections(self) -> bool:
         """
         Resetea las protecciones de la fuente
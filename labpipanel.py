@@ -6,6 +6,7 @@ Servidor Flask con API REST para control de instrumentación
 
 from flask import Flask, render_template, jsonify, request
 import logging
+from functools import wraps
 from logging.handlers import RotatingFileHandler
 import os
 from datetime import datetime
@@ -13,10 +14,16 @@ from pathlib import Path
 import threading
 
 import config
-from fuente_xln import FuenteXLN
-from daq_usb5203 import DAQUSB5203
+from fuente_xln import FuenteXLN, XLNConnectionManager
+from fuente_registry import SupplyRegistry
+from daq_usb5203 import DAQUSB5203, DAQDeviceGroup
+from daq_sampler import DAQSampler
+from daq_filters import FilterBank, parse_channel_filters
+from daq_health import ChannelHealthTracker
+from protection_monitor import ProtectionMonitor
 from relay_controller import RelayController
 from thermal_experiment import ThermalExperiment
+from simulation import create_simulated_instruments, create_simulated_supply
 
 app = Flask(__name__)
 
@@ -36,10 +43,126 @@ app.logger.addHandler(file_handler)
 
 logger = logging.getLogger(__name__)
 
-fuente = FuenteXLN(config.XLN_HOST, config.XLN_PORT, config.XLN_TIMEOUT)
-daq = DAQUSB5203(config.DAQ_CHANNELS, config.DAQ_THERMOCOUPLE_TYPE, config.DAQ_TIMEOUT)
-relay = RelayController(config.RELAY_PINS)
-experiment_controller = ThermalExperiment(fuente, daq, relay, config.RESULTS_DIR)
+
+def _create_daq_device(serial=None, num_channels=config.DAQ_CHANNELS):
+    """Crea un DAQUSB5203 con la configuración global"""
+    return DAQUSB5203(
+        num_channels,
+        config.DAQ_THERMOCOUPLE_TYPE,
+        config.DAQ_TIMEOUT,
+        scan_command=config.DAQ_SCAN_COMMAND,
+        backend=config.DAQ_BACKEND,
+        read_mode=config.DAQ_READ_MODE,
+        max_workers=config.DAQ_MAX_WORKERS,
+        scan_deadline=config.DAQ_SCAN_DEADLINE,
+        serial=serial
+    )
+
+
+if config.SIMULATION:
+    fuente, daq, relay, thermal_model = create_simulated_instruments(
+        config.RELAY_PINS,
+        config.EVAPORATOR_CHANNELS,
+        config.CONDENSER_CHANNELS,
+        num_channels=config.DAQ_CHANNELS,
+        latency=config.SIM_LATENCY,
+        jitter=config.SIM_JITTER,
+        failure_rate=config.SIM_FAILURE_RATE,
+        seed=config.SIM_SEED,
+        time_scale=config.SIM_TIME_SCALE
+    )
+    supply_names = list(config.XLN_SUPPLIES)
+    supplies = {supply_names[0]: fuente}
+    for index, name in enumerate(supply_names[1:], start=1):
+        supplies[name] = create_simulated_supply(
+            config.SIM_LATENCY,
+            config.SIM_JITTER,
+            config.SIM_FAILURE_RATE,
+            None if config.SIM_SEED is None else config.SIM_SEED + 10 * index
+        )
+else:
+    supplies = {
+        name: FuenteXLN(host, port, config.XLN_TIMEOUT)
+        for name, (host, port) in config.XLN_SUPPLIES.items()
+    }
+    relay = RelayController(config.RELAY_PINS)
+    
+    if len(config.DAQ_DEVICES) > 1:
+        daq = DAQDeviceGroup({
+            serial: _create_daq_device(serial, channels) for serial, channels in config.DAQ_DEVICES
+        })
+    elif config.DAQ_DEVICES:
+        serial, channels = config.DAQ_DEVICES[0]
+        daq = _create_daq_device(serial, channels)
+    else:
+        daq = _create_daq_device()
+
+fuentes = SupplyRegistry(supplies)
+fuente = fuentes.default
+
+for _, supply in fuentes:
+    supply.link = XLNConnectionManager(
+        supply,
+        failure_threshold=config.XLN_FAILURE_THRESHOLD,
+        backoff_initial=config.XLN_BACKOFF_INITIAL,
+        backoff_max=config.XLN_BACKOFF_MAX,
+        probe_interval=config.XLN_PROBE_INTERVAL
+    )
+    supply.state_ttl = config.XLN_STATE_TTL
+    supply.ramp.update_rate = config.XLN_RAMP_RATE
+    supply.ramp.verify_interval = config.XLN_RAMP_VERIFY_INTERVAL
+    supply.start_io_worker()
+    supply.start_link_manager()
+
+daq.health = ChannelHealthTracker(
+    daq.num_channels,
+    temp_min=config.DAQ_HEALTH_TEMP_MIN,
+    temp_max=config.DAQ_HEALTH_TEMP_MAX,
+    stuck_samples=config.DAQ_HEALTH_STUCK_SAMPLES,
+    noise_threshold=config.DAQ_HEALTH_NOISE_THRESHOLD
+)
+sampler = DAQSampler(
+    daq,
+    config.DAQ_SAMPLE_PERIOD,
+    config.DAQ_BUFFER_SIZE,
+    block_size=config.DAQ_STREAM_BLOCK_SIZE,
+    pool_blocks=config.DAQ_STREAM_POOL_BLOCKS,
+    filters=FilterBank(
+        daq.num_channels,
+        config.DAQ_FILTERS,
+        parse_channel_filters(config.DAQ_CHANNEL_FILTERS)
+    ) if config.DAQ_FILTERS or config.DAQ_CHANNEL_FILTERS else None,
+    oversample=config.DAQ_OVERSAMPLE
+)
+experiment_controller = ThermalExperiment(
+    fuente,
+    daq,
+    relay,
+    config.RESULTS_DIR,
+    sampler=sampler,
+    results_flush_rows=config.RESULTS_FLUSH_ROWS,
+    results_flush_interval=config.RESULTS_FLUSH_INTERVAL,
+    results_fsync=config.RESULTS_FSYNC,
+    results_format=config.RESULTS_FORMAT,
+    results_layout=config.RESULTS_LAYOUT
+)
+sampler.start()
+
+# Un disparo en cualquier fuente apaga todas las salidas del banco
+protection_monitors = {}
+for name, supply in fuentes:
+    monitor = ProtectionMonitor(supply, config.XLN_PROTECTION_INTERVAL)
+    monitor.add_callback("output_off", lambda protections: fuentes.output_off_all())
+    if config.PROTECTION_PUMP_OFF:
+        monitor.add_callback("pump_off", lambda protections: relay.deactivate_relay("RELAY_1"))
+    monitor.add_callback(
+        "experiment_abort",
+        lambda protections, name=name: experiment_controller.abort(
+            f"Protección activada en fuente '{name}': {protections['status']}"
+        )
+    )
+    monitor.start()
+    protection_monitors[name] = monitor
 
 logger.info("=" * 80)
 logger.info("LabPiPanel - Sistema de Control de Laboratorio Térmico")
@@ -47,6 +170,41 @@ logger.info("Instituto Tecnológico Metropolitano (ITM) - Medellín, Colombia")
 logger.info("=" * 80)
 
 
+def _round_or_none(value, digits: int = 2):
+    """Redondea un valor numérico o devuelve None"""
+    return round(value, digits) if value is not None else None
+
+
+def _with_fuente(view):
+    """Resuelve <name> de la ruta a la fuente registrada (la principal si la ruta no lo incluye)"""
+    @wraps(view)
+    def wrapper(name=None):
+        supply = fuente if name is None else fuentes.get(name)
+        if supply is None:
+            return jsonify({
+                "status": "error",
+                "message": f"Fuente '{name}' no registrada",
+                "fuentes": fuentes.names
+            }), 404
+        return view(supply)
+    return wrapper
+
+
+def _state_to_json(state):
+    """Estado de read_state() redondeado para la API (None si no hubo lectura)"""
+    if state is None:
+        return None
+    return {
+        "voltage": round(state["voltage"], 2),
+        "current": round(state["current"], 3),
+        "power": round(state["power"], 2),
+        "voltage_set": round(state["voltage_set"], 2),
+        "current_set": round(state["current_set"], 3),
+        "output_state": "on" if state["output"] else "off",
+        "protections": state["protections"]
+    }
+
+
 @app.route('/')
 def index():
     """Página principal del sistema"""
@@ -57,18 +215,26 @@ def index():
 def api_status():
     """Estado general del sistema"""
     try:
-        fuente_connected = fuente.connection is not None or fuente.connect()
+        fuente_link = fuente.link.status()
         
         relay_states = relay.get_all_states()
         
         experiment_status = experiment_controller.get_experiment_status()
         
+        daq_health = daq.health.summary()
+        
         return jsonify({
             "status": "ok",
             "timestamp": datetime.now().isoformat(),
             "system": {
-                "fuente": "connected" if fuente_connected else "disconnected",
-                "daq": "ready",
+                "fuente": "connected" if fuente.is_connected else "disconnected",
+                "fuente_link": fuente_link,
+                "fuente_queue": fuente.io.stats(),
+                "fuentes": fuentes.link_status(),
+                "daq": (
+                    "ready" if daq_health["overall"] in ("ok", "unknown") else daq_health["overall"]
+                ),
+                "daq_health": daq_health,
                 "relays": relay_states,
                 "experiment": experiment_status
             }
@@ -79,7 +245,9 @@ def api_status():
 
 
 @app.route('/api/fuente/voltage', methods=['GET', 'POST'])
-def api_fuente_voltage():
+@app.route('/api/fuente/<name>/voltage', methods=['GET', 'POST'])
+@_with_fuente
+def api_fuente_voltage(fuente):
     """Obtener o configurar voltaje de la fuente"""
     try:
         if request.method == 'POST':
@@ -134,7 +302,9 @@ def api_fuente_voltage():
 
 
 @app.route('/api/fuente/current', methods=['GET', 'POST'])
-def api_fuente_current():
+@app.route('/api/fuente/<name>/current', methods=['GET', 'POST'])
+@_with_fuente
+def api_fuente_current(fuente):
     """Obtener o configurar corriente límite de la fuente"""
     try:
         if request.method == 'POST':
@@ -180,7 +350,9 @@ def api_fuente_current():
 
 
 @app.route('/api/fuente/output', methods=['GET', 'POST'])
-def api_fuente_output():
+@app.route('/api/fuente/<name>/output', methods=['GET', 'POST'])
+@_with_fuente
+def api_fuente_output(fuente):
     """Obtener o cambiar estado de salida de la fuente"""
     try:
         if request.method == 'POST':
@@ -228,20 +400,17 @@ def api_fuente_output():
 
 
 @app.route('/api/fuente/measure', methods=['GET'])
-def api_fuente_measure():
-    """Medir voltaje y corriente actual de la fuente"""
+@app.route('/api/fuente/<name>/measure', methods=['GET'])
+@_with_fuente
+def api_fuente_measure(fuente):
+    """Medir voltaje, corriente, salida y protecciones de la fuente (un solo intercambio)"""
     try:
-        voltage = fuente.measure_voltage()
-        current = fuente.measure_current()
+        state = fuente.read_state()
         
-        if voltage is not None and current is not None:
-            power = voltage * current
-            
+        if state is not None:
             return jsonify({
                 "status": "ok",
-                "voltage": round(voltage, 2),
-                "current": round(current, 3),
-                "power": round(power, 2)
+                **_state_to_json(state)
             }), 200
         else:
             return jsonify({
@@ -255,14 +424,18 @@ def api_fuente_measure():
 
 
 @app.route('/api/fuente/protections', methods=['GET'])
-def api_fuente_protections():
+@app.route('/api/fuente/<name>/protections', methods=['GET'])
+@_with_fuente
+def api_fuente_protections(fuente):
     """Verificar estado de protecciones de la fuente"""
     try:
         protections = fuente.check_protections()
+        monitor = protection_monitors[request.view_args.get('name') or fuentes.names[0]]
         
         return jsonify({
             "status": "ok",
-            "protections": protections
+            "protections": protections,
+            "monitor": monitor.status()
         }), 200
     
     except Exception as e:
@@ -270,30 +443,124 @@ def api_fuente_protections():
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
+@app.route('/api/fuentes', methods=['GET'])
+def api_fuentes():
+    """Estado de todas las fuentes registradas (lecturas en paralelo)"""
+    try:
+        states = fuentes.read_all()
+        
+        return jsonify({
+            "status": "ok",
+            "default": fuentes.names[0],
+            "fuentes": {name: _state_to_json(state) for name, state in states.items()}
+        }), 200
+    
+    except Exception as e:
+        logger.error(f"Error en /api/fuentes: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@app.route('/api/fuentes/set', methods=['POST'])
+def api_fuentes_set():
+    """Aplicar consignas y/o salida a varias fuentes en paralelo"""
+    try:
+        data = request.get_json()
+        names = data.get('names') or fuentes.names
+        unknown = [name for name in names if fuentes.get(name) is None]
+        if unknown:
+            return jsonify({
+                "status": "error",
+                "message": f"Fuentes no registradas: {unknown}",
+                "fuentes": fuentes.names
+            }), 404
+        
+        voltage = float(data['voltage']) if data.get('voltage') is not None else None
+        current = float(data['current']) if data.get('current') is not None else None
+        output = data.get('output')
+        
+        if voltage is not None and not (0 <= voltage <= config.XLN_VOLTAGE_MAX):
+            return jsonify({
+                "status": "error",
+                "message": f"Voltaje debe estar entre 0 y {config.XLN_VOLTAGE_MAX}V"
+            }), 400
+        
+        if current is not None and not (0 <= current <= config.XLN_CURRENT_MAX):
+            return jsonify({
+                "status": "error",
+                "message": f"Corriente debe estar entre 0 y {config.XLN_CURRENT_MAX}A"
+            }), 400
+        
+        if output is not None and output not in ('on', 'off'):
+            return jsonify({
+                "status": "error",
+                "message": "Estado debe ser 'on' o 'off'"
+            }), 400
+        
+        if voltage is not None and voltage > 50 and not data.get('confirm', False):
+            return jsonify({
+                "status": "warning",
+                "message": (
+                    f"Voltaje alto ({voltage}V) en {len(names)} fuentes. Confirmar operación."
+                ),
+                "require_confirm": True
+            }), 200
+        
+        results = fuentes.set_all(
+            voltage=voltage,
+            current=current,
+            output=None if output is None else output == 'on',
+            names=names
+        )
+        
+        return jsonify({
+            "status": "ok" if all(results.values()) else "error",
+            "results": results
+        }), 200 if all(results.values()) else 500
+    
+    except Exception as e:
+        logger.error(f"Error en /api/fuentes/set: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
 @app.route('/api/daq/read', methods=['GET'])
 def api_daq_read():
-    """Leer todos los canales del DAQ"""
+    """Leer todos los canales del DAQ (último escaneo del muestreador)"""
     try:
         channels = request.args.getlist('channels', type=int)
         
-        if channels:
-            temps = daq.read_channels_list(channels)
-        else:
-            temps = daq.read_all_channels()
-        
-        evap_channels = config.EVAPORATOR_CHANNELS
-        cond_channels = config.CONDENSER_CHANNELS
+        snapshot, filtered = sampler.latest_pair()
+        temps = snapshot.as_dict(channels or None)
+        filtered_temps = filtered.as_dict(channels or None)
         
-        temp_evap_avg = daq.get_average_temperature(evap_channels)
-        temp_cond_avg = daq.get_average_temperature(cond_channels)
+        evap_stats = snapshot.group_stats(config.EVAPORATOR_CHANNELS)
+        cond_stats = snapshot.group_stats(config.CONDENSER_CHANNELS)
+        scan_time = snapshot.timestamp
         
         return jsonify({
             "status": "ok",
-            "timestamp": datetime.now().isoformat(),
-            "temperatures": {f"ch{ch}": round(temp, 2) if temp else None for ch, temp in temps.items()},
+            "timestamp": datetime.fromtimestamp(scan_time).isoformat() if scan_time else None,
+            "temperatures": {
+                f"ch{ch}": round(temp, 2) if temp is not None else None
+                for ch, temp in temps.items()
+            },
+            "channel_status": {f"ch{ch}": state for ch, state in snapshot.channel_status().items()},
             "averages": {
-                "evaporator": round(temp_evap_avg, 2) if temp_evap_avg else None,
-                "condenser": round(temp_cond_avg, 2) if temp_cond_avg else None
+                "evaporator": _round_or_none(evap_stats["average"]),
+                "condenser": _round_or_none(cond_stats["average"])
+            },
+            "groups": {
+                "evaporator": {key: _round_or_none(value) for key, value in evap_stats.items()},
+                "condenser": {key: _round_or_none(value) for key, value in cond_stats.items()}
+            },
+            "filtered": {
+                "enabled": sampler.filters is not None,
+                "temperatures": {
+                    f"ch{ch}": _round_or_none(temp) for ch, temp in filtered_temps.items()
+                },
+                "averages": {
+                    "evaporator": _round_or_none(filtered.average(config.EVAPORATOR_CHANNELS)),
+                    "condenser": _round_or_none(filtered.average(config.CONDENSER_CHANNELS))
+                }
             }
         }), 200
     
@@ -302,6 +569,48 @@ def api_daq_read():
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
+@app.route('/api/daq/health', methods=['GET'])
+def api_daq_health():
+    """Estado de salud de los termopares (sin lecturas adicionales)"""
+    try:
+        return jsonify({
+            "status": "ok",
+            "health": daq.health.summary()
+        }), 200
+    
+    except Exception as e:
+        logger.error(f"Error en /api/daq/health: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@app.route('/api/daq/stream', methods=['GET', 'POST'])
+def api_daq_stream():
+    """Obtener estado o activar/desactivar el modo de adquisición continua"""
+    try:
+        if request.method == 'POST':
+            data = request.get_json()
+            action = data.get('action', 'start').lower()
+            
+            if action == 'start':
+                sampler.start_streaming()
+            elif action == 'stop':
+                sampler.stop_streaming()
+            else:
+                return jsonify({
+                    "status": "error",
+                    "message": "Acción debe ser 'start' o 'stop'"
+                }), 400
+        
+        return jsonify({
+            "status": "ok",
+            "stream": sampler.stream_stats()
+        }), 200
+    
+    except Exception as e:
+        logger.error(f"Error en /api/daq/stream: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
 @app.route('/api/relay/<relay_name>', methods=['GET', 'POST'])
 def api_relay(relay_name):
     """Obtener o cambiar estado de un relé"""
@@ -390,6 +699,19 @@ def api_experiment_run():
         sample_rate = data.get('sample_rate', config.EXPERIMENT_SAMPLE_RATE)
         resistance = data.get('resistance', 10.0)
         enable_pump = data.get('enable_pump', True)
+        ramp_time = data.get('ramp_time', config.EXPERIMENT_RAMP_TIME)
+        temperature_rate = data.get('temperature_rate', config.EXPERIMENT_TEMPERATURE_RATE)
+        electrical_rate = data.get('electrical_rate', config.EXPERIMENT_ELECTRICAL_RATE)
+        protection_rate = data.get('protection_rate', config.EXPERIMENT_PROTECTION_RATE)
+        steady_state = data.get('steady_state', config.EXPERIMENT_STEADY_STATE)
+        steady_window = data.get('steady_window', config.EXPERIMENT_STEADY_WINDOW)
+        steady_slope = data.get('steady_slope', config.EXPERIMENT_STEADY_SLOPE)
+        steady_std = data.get('steady_std', config.EXPERIMENT_STEADY_STD)
+        min_hold = data.get('min_hold', config.EXPERIMENT_MIN_HOLD)
+        steady_rate = data.get('steady_rate', config.EXPERIMENT_STEADY_RATE)
+        steady_min_samples = data.get(
+            'steady_min_samples', config.EXPERIMENT_STEADY_MIN_SAMPLES
+        )
         
         def run_experiment_thread():
             experiment_controller.run_experiment(
@@ -399,7 +721,18 @@ def api_experiment_run():
                 resistance_ohm=resistance,
                 evaporator_channels=config.EVAPORATOR_CHANNELS,
                 condenser_channels=config.CONDENSER_CHANNELS,
-                enable_pump=enable_pump
+                enable_pump=enable_pump,
+                ramp_time=ramp_time,
+                temperature_rate=temperature_rate,
+                electrical_rate=electrical_rate,
+                protection_rate=protection_rate,
+                steady_state=steady_state,
+                steady_window=steady_window,
+                steady_slope=steady_slope,
+                steady_std=steady_std,
+                min_hold=min_hold,
+                steady_rate=steady_rate,
+                steady_min_samples=steady_min_samples
             )
         
         thread = threading.Thread(target=run_experiment_thread)
@@ -414,7 +747,18 @@ def api_experiment_run():
                 "duration_per_level": duration,
                 "sample_rate": sample_rate,
                 "resistance": resistance,
-                "enable_pump": enable_pump
+                "enable_pump": enable_pump,
+                "ramp_time": ramp_time,
+                "temperature_rate": temperature_rate,
+                "electrical_rate": electrical_rate,
+                "protection_rate": protection_rate,
+                "steady_state": steady_state,
+                "steady_window": steady_window,
+                "steady_slope": steady_slope,
+                "steady_std": steady_std,
+                "min_hold": min_hold,
+                "steady_rate": steady_rate,
+                "steady_min_samples": steady_min_samples
             }
         }), 200
     
@@ -467,6 +811,10 @@ if __name__ == '__main__':
         logger.info("Servidor detenido por usuario")
     
     finally:
+        for monitor in protection_monitors.values():
+            monitor.stop()
+        sampler.stop()
         relay.cleanup()
-        fuente.disconnect()
+        fuentes.close()
+        daq.close()
         logger.info("Sistema LabPiPanel finalizado")
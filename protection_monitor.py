@@ -0,0 +1,184 @@
+"""
+Monitor de protecciones de la fuente XLN30052
+Sondea STAT:QUES:COND? a intervalo corto y dispara los enclavamientos
+(salida apagada, bomba apagada, experimento abortado) al detectar OVP/OCP/OPP
+Instituto Tecnológico Metropolitano (ITM) - Medellín, Colombia
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from fuente_xln import FuenteXLN, PROTECTION_MASK, RESULT_WAIT_MARGIN
+
+logger = logging.getLogger(__name__)
+
+
+class ProtectionMonitor:
+    """
+    Hilo de sondeo de protecciones con callbacks de enclavamiento
+    
+    La consulta comparte la cola de comandos y el socket de la fuente: con
+    prioridad de seguridad se adelanta a todo lo encolado, pero espera el
+    trabajo en curso (un comando, un punto de rampa o una secuencia, cada
+    uno acotado por el timeout de la fuente). Quien encola espera como
+    máximo timeout + RESULT_WAIT_MARGIN, así que un disparo se detecta, o
+    el sondeo se cuenta como fallido, a lo sumo interval + timeout +
+    RESULT_WAIT_MARGIN después de ocurrir (max_detection_latency).
+    """
+    
+    def __init__(self, fuente: FuenteXLN, interval: float = 0.2):
+        """
+        Inicializa el monitor
+        
+        Args:
+            fuente: Fuente a vigilar
+            interval: Intervalo de sondeo de STAT:QUES:COND? (s)
+        """
+        self.fuente = fuente
+        self.interval = interval
+        self.callbacks: List[Tuple[str, Callable[[dict], None]]] = []
+        
+        self.tripped = False
+        self.trip_count = 0
+        self.last_trip: Optional[dict] = None
+        self.last_poll: Optional[float] = None
+        self.last_status: Optional[int] = None
+        self.polls_failed = 0
+        
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+    
+    @property
+    def max_detection_latency(self) -> float:
+        """Peor caso (s) entre un disparo y su detección o un sondeo fallido"""
+        return self.interval + self.fuente.timeout + RESULT_WAIT_MARGIN
+    
+    @property
+    def is_running(self) -> bool:
+        """Indica si el monitor está activo"""
+        return self._thread is not None and self._thread.is_alive()
+    
+    def add_callback(self, name: str, callback: Callable[[dict], None]):
+        """
+        Registra una acción de enclavamiento
+        
+        Las acciones se ejecutan en el orden de registro, en el hilo del
+        monitor, apenas se detecta el disparo; una acción que falla no
+        impide las siguientes.
+        
+        Args:
+            name: Nombre para el registro
+            callback: Función que recibe el diccionario de protecciones
+        """
+        self.callbacks.append((name, callback))
+    
+    def start(self):
+        """Inicia el sondeo"""
+        if self.is_running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="xln-protections", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"Monitor de protecciones iniciado (cada {self.interval}s, "
+            f"detección en el peor caso {self.max_detection_latency:.1f}s)"
+        )
+    
+    def stop(self, timeout: Optional[float] = None):
+        """Detiene el sondeo"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+    
+    def _run(self):
+        """Sondeo en plazos monotónicos"""
+        next_poll = time.monotonic()
+        while not self._stop_event.is_set():
+            self.poll()
+            next_poll += self.interval
+            now = time.monotonic()
+            if next_poll < now:
+                next_poll = now
+            self._stop_event.wait(next_poll - now)
+    
+    def poll(self) -> Optional[int]:
+        """
+        Consulta el registro questionable una vez y reacciona a un disparo nuevo
+        
+        Returns:
+            Valor del registro o None si no hubo respuesta
+        """
+        try:
+            status = self.fuente.read_questionable()
+        except Exception as e:
+            logger.error(f"Error leyendo protecciones: {e}")
+            status = None
+        detected = time.monotonic()
+        
+        with self._lock:
+            self.last_poll = time.time()
+            if status is None:
+                self.polls_failed += 1
+                return None
+            self.last_status = status
+            
+            active = status & PROTECTION_MASK
+            if not active:
+                if self.tripped:
+                    logger.info("Protecciones de fuente normalizadas")
+                self.tripped = False
+                return status
+            if self.tripped:
+                return status
+            
+            self.tripped = True
+            self.trip_count += 1
+        
+        protections = self.fuente.decode_protections(status)
+        self._trigger(protections, detected)
+        return status
+    
+    def _trigger(self, protections: dict, detected: float):
+        """Ejecuta los enclavamientos registrados"""
+        logger.critical(f"Disparo de protección de fuente: {protections['status']}")
+        
+        actions = {}
+        for name, callback in self.callbacks:
+            try:
+                callback(protections)
+                actions[name] = round((time.monotonic() - detected) * 1000, 1)
+            except Exception as e:
+                logger.error(f"Enclavamiento '{name}' falló: {e}")
+                actions[name] = None
+        
+        with self._lock:
+            self.last_trip = {
+                "timestamp": time.time(),
+                "protections": protections,
+                "actions_ms": actions
+            }
+        logger.warning(f"Enclavamientos ejecutados (ms desde la detección): {actions}")
+    
+    def status(self) -> dict:
+        """
+        Estado del monitor para la API
+        
+        Returns:
+            Diccionario con sondeo, disparos y acciones del último disparo
+        """
+        with self._lock:
+            return {
+                "running": self.is_running,
+                "interval": self.interval,
+                "max_detection_latency": self.max_detection_latency,
+                "tripped": self.tripped,
+                "trip_count": self.trip_count,
+                "last_poll": self.last_poll,
+                "last_status": self.last_status,
+                "polls_failed": self.polls_failed,
+                "last_trip": self.last_trip
+            }
@@ -29,7 +29,10 @@ class RelayController:
         """
         self.relay_pins = relay_pins
         self.relay_states = {}
-        
+        self._setup_pins()
+    
+    def _setup_pins(self):
+        """Configura los pines GPIO como salidas en estado desactivado"""
         if GPIO_AVAILABLE:
             GPIO.setmode(GPIO.BCM)
             GPIO.setwarnings(False)
@@ -43,6 +46,11 @@ class RelayController:
                 self.relay_states[name] = False
                 logger.info(f"Relé {name} inicializado en modo simulación")
     
+    def _write_pin(self, pin: int, active: bool):
+        """Escribe el nivel del pin (activo en BAJO)"""
+        if GPIO_AVAILABLE:
+            GPIO.output(pin, GPIO.LOW if active else GPIO.HIGH)
+    
     def activate_relay(self, relay_name: str) -> bool:
         """
         Activa un relé específico (GPIO LOW)
@@ -60,8 +68,7 @@ class RelayController:
         pin = self.relay_pins[relay_name]
         
         try:
-            if GPIO_AVAILABLE:
-                GPIO.output(pin, GPIO.LOW)
+            self._write_pin(pin, True)
             
             self.relay_states[relay_name] = True
             logger.info(f"Relé {relay_name} (GPIO {pin}) ACTIVADO")
@@ -87,8 +94,7 @@ class RelayController:
         pin = self.relay_pins[relay_name]
         
         try:
-            if GPIO_AVAILABLE:
-                GPIO.output(pin, GPIO.HIGH)
+            self._write_pin(pin, False)
             
             self.relay_states[relay_name] = False
             logger.info(f"Relé {relay_name} (GPIO {pin}) DESACTIVADO")
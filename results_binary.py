@@ -0,0 +1,340 @@
+"""
+Formato binario de resultados de experimentos
+Registros float64 de ancho fijo, NaN para valores ausentes, cabecera JSON
+con columnas y canales; lectura por mapeo de memoria sin copias
+Instituto Tecnológico Metropolitano (ITM) - Medellín, Colombia
+
+Estructura del archivo:
+    MAGIC (8 bytes) | longitud de cabecera (uint32 LE) | cabecera JSON
+    (rellenada hasta múltiplo de 8) | registros de N float64 LE
+
+Uso:
+    python results_binary.py results/thermal_experiment_20240115_103000.csv
+    python results_binary.py results/thermal_experiment_20240115_103000.lpr --to-csv
+"""
+
+import argparse
+import csv
+import json
+import logging
+import struct
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from results_writer import csv_formats
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"LPPRES01"
+BINARY_SUFFIX = ".lpr"
+FORMAT_VERSION = 1
+MISSING_VALUES = ("", "N/A", "nan", "NaN")
+
+
+def _record_dtype(columns: List[str]) -> np.dtype:
+    """Registro de una muestra: una columna float64 little-endian por campo"""
+    return np.dtype([(column, "<f8") for column in columns])
+
+
+class BinaryResultsFile:
+    """
+    Archivo binario de resultados de sólo anexado
+    
+    Las filas se acumulan en un bloque NumPy de chunk_rows registros y se
+    anexan al archivo bloque a bloque. Las columnas categóricas (p. ej.
+    "stream") se guardan como el índice de su etiqueta en la cabecera.
+    """
+    
+    def __init__(
+        self,
+        path: Path,
+        fieldnames: List[str],
+        categories: Optional[Dict[str, List[str]]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        chunk_rows: int = 256
+    ):
+        """
+        Crea el archivo y escribe la cabecera
+        
+        Args:
+            path: Ruta del archivo
+            fieldnames: Columnas en orden
+            categories: Etiquetas de cada columna categórica
+            metadata: Datos descriptivos (canales, niveles, etc.) guardados en la cabecera
+            chunk_rows: Registros por bloque anexado
+        """
+        self.path = Path(path)
+        self.fieldnames = list(fieldnames)
+        self.categories = {column: list(labels) for column, labels in (categories or {}).items()}
+        self.metadata = metadata or {}
+        self.dtype = _record_dtype(self.fieldnames)
+        
+        self._codes = {
+            column: {label: float(code) for code, label in enumerate(labels)}
+            for column, labels in self.categories.items()
+        }
+        self._chunk = np.full(max(1, chunk_rows), np.nan, dtype=self.dtype)
+        self._filled = 0
+        
+        header = json.dumps({
+            "version": FORMAT_VERSION,
+            "columns": self.fieldnames,
+            "dtype": "<f8",
+            "categories": self.categories,
+            "metadata": self.metadata
+        }, ensure_ascii=False).encode("utf-8")
+        # Los registros comienzan alineados a 8 bytes
+        header += b" " * (-(len(MAGIC) + 4 + len(header)) % 8)
+        
+        self._file = open(self.path, 'wb')
+        self._file.write(MAGIC + struct.pack("<I", len(header)) + header)
+    
+    def write(self, row: Dict[str, Any]):
+        """Copia una fila al bloque en curso (None y columnas ausentes quedan en NaN)"""
+        record = self._chunk[self._filled]
+        for column, value in row.items():
+            if value is None:
+                continue
+            if column in self._codes:
+                value = self._codes[column].get(value, np.nan)
+            record[column] = value
+        self._filled += 1
+        if self._filled == len(self._chunk):
+            self._append_chunk()
+    
+    def _append_chunk(self):
+        """Anexa los registros acumulados y reinicia el bloque"""
+        if self._filled:
+            self._file.write(self._chunk[:self._filled].tobytes())
+            self._chunk.fill(np.nan)
+            self._filled = 0
+    
+    def flush(self):
+        """Anexa el bloque parcial y vuelca el buffer al sistema operativo"""
+        self._append_chunk()
+        self._file.flush()
+    
+    def fileno(self) -> int:
+        return self._file.fileno()
+    
+    def close(self):
+        self._append_chunk()
+        self._file.close()
+
+
+class BinaryResults:
+    """
+    Lector de resultados binarios por mapeo de memoria
+    
+    Las columnas son vistas NumPy sobre el archivo mapeado (sin copiar ni
+    parsear); sólo se leen del disco las páginas que se usan. Un registro
+    final incompleto (escritura interrumpida) se ignora.
+    """
+    
+    def __init__(self, path: Path):
+        """
+        Abre y mapea el archivo
+        
+        Args:
+            path: Ruta del archivo binario
+        """
+        self.path = Path(path)
+        
+        with open(self.path, 'rb') as f:
+            magic = f.read(len(MAGIC))
+            if magic != MAGIC:
+                raise ValueError(f"No es un archivo de resultados binario: {self.path}")
+            header_length, = struct.unpack("<I", f.read(4))
+            self.header = json.loads(f.read(header_length).decode("utf-8"))
+        
+        self.columns: List[str] = self.header["columns"]
+        self.categories: Dict[str, List[str]] = self.header.get("categories", {})
+        self.metadata: Dict[str, Any] = self.header.get("metadata", {})
+        self.dtype = _record_dtype(self.columns)
+        
+        offset = len(MAGIC) + 4 + header_length
+        count = (self.path.stat().st_size - offset) // self.dtype.itemsize
+        if count > 0:
+            self.records = np.memmap(
+                self.path, dtype=self.dtype, mode='r', offset=offset, shape=(count,)
+            )
+        else:
+            self.records = np.empty(0, dtype=self.dtype)
+    
+    def __len__(self) -> int:
+        return len(self.records)
+    
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.column(column)
+    
+    def column(self, column: str) -> np.ndarray:
+        """
+        Columna como vista float64 sobre el archivo (sin copia)
+        
+        Args:
+            column: Nombre de la columna
+            
+        Returns:
+            Arreglo de sólo lectura con NaN en los valores ausentes
+        """
+        return self.records[column]
+    
+    def as_array(self) -> np.ndarray:
+        """Todos los registros como matriz (muestras x columnas) sin copia"""
+        return self.records.view("<f8").reshape(len(self.records), len(self.columns))
+    
+    def labels(self, column: str) -> List[Optional[str]]:
+        """Etiquetas de una columna categórica (None donde falta el valor)"""
+        names = self.categories[column]
+        return [None if np.isnan(code) else names[int(code)] for code in self.records[column]]
+    
+    def mask(self, column: str, label: str) -> np.ndarray:
+        """Máscara booleana de las filas cuya columna categórica vale label"""
+        return self.records[column] == float(self.categories[column].index(label))
+    
+    def close(self):
+        """Suelta el mapeo; las columnas ya obtenidas lo mantienen vivo hasta liberarse"""
+        self.records = np.empty(0, dtype=self.dtype)
+    
+    def __enter__(self) -> "BinaryResults":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def _parse_csv_value(column: str, text: str) -> Optional[Any]:
+    """Convierte una celda del CSV de resultados a su valor crudo"""
+    if text in MISSING_VALUES:
+        return None
+    if column == "timestamp":
+        return datetime.fromisoformat(text).timestamp()
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def csv_to_binary(
+    csv_path: Path,
+    binary_path: Optional[Path] = None,
+    chunk_rows: int = 4096
+) -> Path:
+    """
+    Convierte un CSV de resultados al formato binario
+    
+    Las columnas no numéricas (p. ej. "stream") se guardan como categorías.
+    El CSV se recorre dos veces sin cargarlo en memoria: la primera reúne
+    las etiquetas de las categorías y la segunda escribe las filas.
+    
+    Args:
+        csv_path: CSV de origen
+        binary_path: Destino (por defecto el mismo nombre con extensión .lpr)
+        chunk_rows: Registros por bloque anexado
+        
+    Returns:
+        Ruta del archivo binario
+    """
+    csv_path = Path(csv_path)
+    binary_path = Path(binary_path) if binary_path else csv_path.with_suffix(BINARY_SUFFIX)
+    
+    categories: Dict[str, List[str]] = {}
+    with open(csv_path, newline='') as f:
+        reader = csv.DictReader(f)
+        fieldnames = list(reader.fieldnames or [])
+        for row in reader:
+            for column, text in row.items():
+                value = _parse_csv_value(column, text)
+                if isinstance(value, str):
+                    labels = categories.setdefault(column, [])
+                    if value not in labels:
+                        labels.append(value)
+    
+    sink = BinaryResultsFile(
+        binary_path,
+        fieldnames,
+        categories=categories,
+        metadata={"source": csv_path.name},
+        chunk_rows=chunk_rows
+    )
+    count = 0
+    try:
+        with open(csv_path, newline='') as f:
+            for row in csv.DictReader(f):
+                sink.write({column: _parse_csv_value(column, text) for column, text in row.items()})
+                count += 1
+    finally:
+        sink.close()
+    
+    logger.info(f"{count} filas convertidas: {csv_path} -> {binary_path}")
+    return binary_path
+
+
+def binary_to_csv(
+    binary_path: Path,
+    csv_path: Optional[Path] = None,
+    missing_value: str = "N/A"
+) -> Path:
+    """
+    Convierte resultados binarios al CSV con el formato de columnas habitual
+    
+    Args:
+        binary_path: Archivo binario de origen
+        csv_path: Destino (por defecto el mismo nombre con extensión .csv)
+        missing_value: Texto para valores ausentes
+        
+    Returns:
+        Ruta del CSV
+    """
+    binary_path = Path(binary_path)
+    csv_path = Path(csv_path) if csv_path else binary_path.with_suffix(".csv")
+    
+    with BinaryResults(binary_path) as results:
+        formats = csv_formats(results.columns)
+        columns = [
+            results.labels(column) if column in results.categories
+            else results.column(column).tolist()
+            for column in results.columns
+        ]
+    
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(results.columns)
+        for values in zip(*columns):
+            writer.writerow([
+                missing_value if value is None or value != value
+                else formats[column](value) if column in formats
+                else value
+                for column, value in zip(results.columns, values)
+            ])
+    
+    count = len(columns[0]) if columns else 0
+    logger.info(f"{count} filas convertidas: {binary_path} -> {csv_path}")
+    return csv_path
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Conversión entre resultados CSV y binarios de LabPiPanel"
+    )
+    parser.add_argument("source", help="Archivo de origen (.csv o .lpr)")
+    parser.add_argument("destination", nargs="?", default=None, help="Archivo de destino")
+    parser.add_argument("--to-csv", action="store_true", help="Convertir de binario a CSV")
+    args = parser.parse_args()
+    
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    
+    if args.to_csv:
+        binary_to_csv(Path(args.source), args.destination and Path(args.destination))
+    else:
+        csv_to_binary(Path(args.source), args.destination and Path(args.destination))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Escritor diferido de resultados
+Las filas se encolan en memoria y un hilo las formatea y escribe por lotes,
+de modo que el muestreo nunca espera a la tarjeta SD
+Instituto Tecnológico Metropolitano (ITM) - Medellín, Colombia
+"""
+
+import csv
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+def csv_formats(fieldnames: List[str]) -> Dict[str, Callable[[Any], str]]:
+    """
+    Formato de cada columna del CSV de resultados según su nombre
+    
+    Args:
+        fieldnames: Columnas del CSV
+        
+    Returns:
+        Diccionario columna -> función de formato (las demás columnas usan str)
+    """
+    formats = {}
+    for column in fieldnames:
+        if column == "timestamp":
+            formats[column] = lambda t: datetime.fromtimestamp(t).isoformat()
+        elif column in ("scheduled_time", "elapsed_time", "voltage"):
+            formats[column] = "{:.2f}".format
+        elif column == "current":
+            formats[column] = "{:.3f}".format
+        elif column.startswith("r_thermal"):
+            formats[column] = "{:.4f}".format
+        elif column.startswith("temp_"):
+            formats[column] = "{:.2f}".format
+    return formats
+
+
+class CSVResultsFile:
+    """Archivo CSV de resultados: una fila de texto por muestra"""
+    
+    def __init__(
+        self,
+        path: Path,
+        fieldnames: List[str],
+        formats: Optional[Dict[str, Callable[[Any], str]]] = None,
+        missing_value: str = "N/A"
+    ):
+        """
+        Crea el archivo y escribe la cabecera
+        
+        Args:
+            path: Ruta del CSV
+            fieldnames: Columnas en orden
+            formats: Función de formato por columna (por defecto según csv_formats)
+            missing_value: Texto para columnas ausentes o con valor None
+        """
+        self.path = Path(path)
+        self.fieldnames = list(fieldnames)
+        self.formats = csv_formats(self.fieldnames) if formats is None else formats
+        self.missing_value = missing_value
+        
+        self._file = open(self.path, 'w', newline='')
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, restval=missing_value)
+        self._writer.writeheader()
+    
+    def write(self, row: Dict[str, Any]):
+        """Formatea y escribe una fila (en el buffer del archivo)"""
+        formatted = {}
+        for column, value in row.items():
+            if value is None:
+                formatted[column] = self.missing_value
+            elif column in self.formats:
+                formatted[column] = self.formats[column](value)
+            else:
+                formatted[column] = value
+        self._writer.writerow(formatted)
+    
+    def flush(self):
+        """Vuelca el buffer al sistema operativo"""
+        self._file.flush()
+    
+    def fileno(self) -> int:
+        return self._file.fileno()
+    
+    def close(self):
+        self._file.close()
+
+
+class ResultsWriter:
+    """
+    Escritura de resultados en segundo plano con política de volcado configurable
+    
+    write() sólo encola la fila con sus valores crudos; el hilo escritor la
+    entrega al archivo (CSVResultsFile o BinaryResultsFile), que la formatea,
+    y vuelca cada flush_rows filas o cada flush_interval segundos (lo que
+    ocurra primero), con fsync opcional. close() siempre vacía la cola y
+    hace el volcado final, también cuando el experimento termina por error.
+    """
+    
+    def __init__(
+        self,
+        sink,
+        flush_rows: int = 50,
+        flush_interval: float = 5.0,
+        fsync: bool = True
+    ):
+        """
+        Arranca el hilo escritor
+        
+        Args:
+            sink: Archivo de resultados abierto (write, flush, fileno, close, path)
+            flush_rows: Filas pendientes que fuerzan un volcado
+            flush_interval: Segundos máximos entre volcados
+            fsync: Forzar escritura física (os.fsync) en cada volcado
+        """
+        self.sink = sink
+        self.path = Path(sink.path)
+        self.flush_rows = max(1, flush_rows)
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        
+        self.rows_written = 0
+        self.flushes = 0
+        self.max_queue_depth = 0
+        self.error: Optional[BaseException] = None
+        
+        self._queue: "queue.Queue" = queue.Queue()
+        self._pending = 0
+        self._closed = False
+        
+        self._thread = threading.Thread(target=self._run, name="results-writer", daemon=True)
+        self._thread.start()
+    
+    def __enter__(self) -> "ResultsWriter":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close(raise_error=exc_type is None)
+        return False
+    
+    def write(self, row: Dict[str, Any]):
+        """
+        Encola una fila sin bloquear
+        
+        Args:
+            row: Valores crudos por columna
+            
+        Raises:
+            Error del hilo escritor si éste ya falló
+        """
+        if self.error is not None:
+            raise self.error
+        if self._closed:
+            raise ValueError(f"Escritor de resultados cerrado: {self.path}")
+        self._queue.put(row)
+        depth = self._queue.qsize()
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+    
+    def close(self, raise_error: bool = True):
+        """
+        Vacía la cola, hace el volcado final y cierra el archivo
+        
+        Args:
+            raise_error: Propagar un error del hilo escritor
+        """
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_STOP)
+            self._thread.join()
+            logger.info(
+                f"Resultados cerrados: {self.rows_written} filas, {self.flushes} volcados "
+                f"({self.path})"
+            )
+        if raise_error and self.error is not None:
+            raise self.error
+    
+    def _flush(self):
+        """Vuelca el buffer al sistema operativo y, si corresponde, al medio físico"""
+        self.sink.flush()
+        if self.fsync:
+            os.fsync(self.sink.fileno())
+        self._pending = 0
+        self.flushes += 1
+    
+    def _run(self):
+        """Hilo escritor: consume la cola y vuelca según la política"""
+        next_flush = time.monotonic() + self.flush_interval
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=max(0.0, next_flush - time.monotonic()))
+                except queue.Empty:
+                    item = None
+                
+                if item is _STOP:
+                    break
+                if item is not None:
+                    self.sink.write(item)
+                    self.rows_written += 1
+                    self._pending += 1
+                
+                now = time.monotonic()
+                if self._pending >= self.flush_rows or (self._pending and now >= next_flush):
+                    self._flush()
+                if now >= next_flush:
+                    next_flush = now + self.flush_interval
+        except BaseException as e:
+            logger.error(f"Error escribiendo resultados en {self.path}: {e}")
+            self.error = e
+        finally:
+            try:
+                self._flush()
+            except Exception as e:
+                logger.error(f"Error en el volcado final de {self.path}: {e}")
+                self.error = self.error or e
+            self.sink.close()
+    
+    def stats(self) -> dict:
+        """
+        Estadísticas del escritor
+        
+        Returns:
+            Diccionario con filas escritas, volcados y profundidad de cola
+        """
+        return {
+            "rows_written": self.rows_written,
+            "flushes": self.flushes,
+            "queue_depth": self._queue.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "flush_rows": self.flush_rows,
+            "flush_interval": self.flush_interval,
+            "fsync": self.fsync
+        }
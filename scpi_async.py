@@ -0,0 +1,348 @@
+"""
+Transporte SCPI asíncrono sobre TCP para instrumentos de laboratorio
+Entramado por líneas, timeout por comando y consultas en vuelo encadenadas
+Instituto Tecnológico Metropolitano (ITM) - Medellín, Colombia
+"""
+
+import asyncio
+import collections
+import logging
+import threading
+from typing import Awaitable, Deque, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+TELNET_IAC = 0xFF
+TELNET_SE = 0xF0
+TELNET_SB = 0xFA
+# WILL, WONT, DO, DONT: comando de tres bytes (IAC, verbo, opción)
+TELNET_OPTION_VERBS = (0xFB, 0xFC, 0xFD, 0xFE)
+
+
+def _strip_telnet(raw: bytes) -> bytes:
+    """
+    Elimina las secuencias de control Telnet de un bloque de bytes
+    
+    IAC IAC es un 0xFF literal; WILL/WONT/DO/DONT ocupan tres bytes; un
+    bloque IAC SB ... IAC SE se descarta completo; cualquier otro comando
+    IAC ocupa dos bytes.
+    """
+    cleaned = bytearray()
+    i = 0
+    while i < len(raw):
+        byte = raw[i]
+        if byte != TELNET_IAC:
+            cleaned.append(byte)
+            i += 1
+            continue
+        
+        verb = raw[i + 1] if i + 1 < len(raw) else None
+        if verb == TELNET_IAC:
+            cleaned.append(TELNET_IAC)
+            i += 2
+        elif verb in TELNET_OPTION_VERBS:
+            i += 3
+        elif verb == TELNET_SB:
+            i += 2
+            while i < len(raw):
+                if raw[i] == TELNET_IAC:
+                    if i + 1 < len(raw) and raw[i + 1] == TELNET_SE:
+                        i += 2
+                        break
+                    i += 2
+                else:
+                    i += 1
+        else:
+            i += 2
+    return bytes(cleaned)
+
+
+def _decode_line(raw: bytes) -> str:
+    """Decodifica una línea de respuesta descartando secuencias de negociación Telnet"""
+    if TELNET_IAC in raw:
+        raw = _strip_telnet(raw)
+    return raw.decode("ascii", errors="ignore").strip()
+
+
+class AsyncSCPIClient:
+    """
+    Cliente SCPI sobre un stream TCP
+    
+    Las respuestas SCPI llegan en el orden de las consultas, así que cada
+    consulta enviada deja un Future en una cola FIFO y una única tarea
+    lectora las resuelve línea a línea. Varias consultas pueden estar en
+    vuelo a la vez (pipelining). Si una consulta expira, el stream queda
+    desincronizado y la conexión se cierra.
+    """
+    
+    def __init__(self, host: str, port: int, timeout: float = 10.0, settle_time: float = 0.5):
+        """
+        Inicializa el cliente (no conecta)
+        
+        Args:
+            host: Dirección del instrumento
+            port: Puerto TCP
+            timeout: Timeout por defecto de conexión y de cada consulta (s)
+            settle_time: Espera tras conectar para descartar el saludo del servidor (s)
+        """
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.settle_time = settle_time
+        
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._pending: Deque[asyncio.Future] = collections.deque()
+        self._reader_task: Optional[asyncio.Task] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+        self._closed_error: Optional[Exception] = None
+    
+    @property
+    def is_open(self) -> bool:
+        """Indica si el stream está abierto y sincronizado"""
+        return self._writer is not None and self._closed_error is None
+    
+    async def connect(self):
+        """Abre el stream TCP y descarta cualquier saludo inicial"""
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port),
+            self.timeout
+        )
+        self._closed_error = None
+        self._write_lock = asyncio.Lock()
+        
+        if self.settle_time > 0:
+            try:
+                await self._drain_banner()
+            except Exception:
+                writer, self._writer = self._writer, None
+                writer.close()
+                raise
+        
+        self._reader_task = asyncio.get_running_loop().create_task(self._read_responses())
+    
+    async def _drain_banner(self):
+        """Espera settle_time y descarta el saludo del servidor"""
+        await asyncio.sleep(self.settle_time)
+        while True:
+            try:
+                banner = await asyncio.wait_for(self._reader.read(4096), 0.01)
+            except asyncio.TimeoutError:
+                break
+            if not banner:
+                raise ConnectionError("Conexión cerrada por el instrumento al conectar")
+            logger.debug(f"Saludo descartado: {banner!r}")
+    
+    async def close(self):
+        """Cierra el stream y falla las consultas pendientes"""
+        self._fail_pending(ConnectionError("Conexión SCPI cerrada"))
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            self._reader_task = None
+        if self._writer is not None:
+            writer, self._writer = self._writer, None
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (OSError, ConnectionError):
+                pass
+    
+    def _fail_pending(self, error: Exception):
+        """Marca el stream como inservible y propaga el error a las consultas en vuelo"""
+        if self._closed_error is None:
+            self._closed_error = error
+        while self._pending:
+            future = self._pending.popleft()
+            if not future.done():
+                future.set_exception(error)
+                # Quien esperaba este Future puede haber desistido por timeout
+                future.exception()
+    
+    async def _read_responses(self):
+        """Tarea lectora: asigna cada línea recibida a la consulta más antigua en vuelo"""
+        try:
+            while True:
+                raw = await self._reader.readline()
+                if not raw:
+                    raise ConnectionError("Conexión cerrada por el instrumento")
+                line = _decode_line(raw)
+                if not line and not self._pending:
+                    continue
+                if not self._pending:
+                    logger.warning(f"Respuesta SCPI no solicitada descartada: '{line}'")
+                    continue
+                future = self._pending.popleft()
+                if not future.done():
+                    future.set_result(line)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._fail_pending(e if isinstance(e, ConnectionError) else ConnectionError(str(e)))
+    
+    async def _send(self, command: str, expect_response: bool) -> Optional[asyncio.Future]:
+        """Escribe una línea y, si se espera respuesta, registra su Future en la cola"""
+        if not self.is_open:
+            raise self._closed_error or ConnectionError("Conexión SCPI no abierta")
+        
+        future = asyncio.get_running_loop().create_future() if expect_response else None
+        async with self._write_lock:
+            if future is not None:
+                self._pending.append(future)
+            self._writer.write((command.strip() + "\r\n").encode("ascii"))
+            await self._writer.drain()
+        return future
+    
+    async def _await_response(
+        self,
+        future: asyncio.Future,
+        command: str,
+        timeout: Optional[float]
+    ) -> str:
+        """Espera una respuesta; al expirar cierra el stream porque quedaría desfasado"""
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            error = TimeoutError(f"Timeout esperando respuesta a '{command}'")
+            await self.close()
+            raise error
+    
+    async def write(self, command: str):
+        """Envía un comando sin respuesta"""
+        await self._send(command, False)
+    
+    async def query(self, command: str, timeout: Optional[float] = None) -> str:
+        """
+        Envía una consulta y espera su respuesta
+        
+        Args:
+            command: Consulta SCPI
+            timeout: Timeout propio de esta consulta (s)
+            
+        Returns:
+            Línea de respuesta sin terminador
+        """
+        future = await self._send(command, True)
+        return await self._await_response(future, command, timeout)
+    
+    async def exchange_many(
+        self,
+        commands: Sequence[Tuple[str, bool]],
+        timeout: Optional[float] = None
+    ) -> List[str]:
+        """
+        Envía varios comandos seguidos sin esperar respuestas intermedias
+        
+        Args:
+            commands: Pares (comando, espera_respuesta)
+            timeout: Timeout para cada respuesta (s)
+            
+        Returns:
+            Respuesta de cada comando ("" para los que no responden)
+        """
+        futures = [await self._send(command, expect) for command, expect in commands]
+        results = []
+        for (command, _), future in zip(commands, futures):
+            if future is None:
+                results.append("")
+            else:
+                results.append(await self._await_response(future, command, timeout))
+        return results
+
+
+class EventLoopThread:
+    """Bucle asyncio en un hilo propio para usar clientes asíncronos desde código síncrono"""
+    
+    def __init__(self, name: str = "scpi-loop"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Bucle de eventos (se inicia en el primer uso)"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name=self.name, daemon=True
+                )
+                self._thread.start()
+            return self._loop
+    
+    def run(self, coroutine: Awaitable, timeout: Optional[float] = None):
+        """
+        Ejecuta una corrutina en el bucle y espera su resultado
+        
+        Args:
+            coroutine: Corrutina a ejecutar
+            timeout: Espera máxima del llamador (s); None = sin límite
+            
+        Returns:
+            Resultado de la corrutina (propaga sus excepciones)
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+
+
+_shared_loop = EventLoopThread()
+
+
+def shared_event_loop() -> EventLoopThread:
+    """Bucle compartido por todas las fuentes del proceso"""
+    return _shared_loop
+
+
+class SCPIConnection:
+    """
+    Fachada síncrona de AsyncSCPIClient
+    
+    Todas las conexiones comparten un único bucle de eventos, de modo que
+    varias fuentes se atienden concurrentemente sin un hilo bloqueado por
+    cada una.
+    """
+    
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        timeout: float = 10.0,
+        settle_time: float = 0.5,
+        event_loop: Optional[EventLoopThread] = None
+    ):
+        """
+        Abre la conexión
+        
+        Args:
+            host: Dirección del instrumento
+            port: Puerto TCP
+            timeout: Timeout de conexión y por consulta (s)
+            settle_time: Espera inicial para descartar el saludo (s)
+            event_loop: Bucle donde corre el cliente (por defecto el compartido)
+        """
+        self.event_loop = event_loop or shared_event_loop()
+        self.client = AsyncSCPIClient(host, port, timeout, settle_time)
+        self.event_loop.run(self.client.connect())
+    
+    @property
+    def is_open(self) -> bool:
+        return self.client.is_open
+    
+    def write(self, command: str):
+        """Envía un comando sin respuesta"""
+        self.event_loop.run(self.client.write(command))
+    
+    def query(self, command: str, timeout: Optional[float] = None) -> str:
+        """Envía una consulta y devuelve su respuesta"""
+        return self.event_loop.run(self.client.query(command, timeout))
+    
+    def exchange_many(
+        self,
+        commands: Sequence[Tuple[str, bool]],
+        timeout: Optional[float] = None
+    ) -> List[str]:
+        """Envía varios comandos encadenados en vuelo y devuelve sus respuestas"""
+        return self.event_loop.run(self.client.exchange_many(commands, timeout))
+    
+    def close(self):
+        """Cierra la conexión"""
+        self.event_loop.run(self.client.close())
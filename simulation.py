@@ -0,0 +1,524 @@
+"""
+Backends simulados de la instrumentación (DAQ, fuente XLN30052 y relés)
+Latencia configurable, fallas inyectadas y modelo térmico simple
+Instituto Tecnológico Metropolitano (ITM) - Medellín, Colombia
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from daq_usb5203 import DAQUSB5203, CHANNEL_NO_RESPONSE
+from fuente_xln import FuenteXLN
+from relay_controller import RelayController
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyProfile:
+    """Latencia, jitter y fallas inyectadas por llamada (reproducibles con semilla)"""
+    
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        """
+        Inicializa el perfil
+        
+        Args:
+            latency: Retardo fijo por llamada en segundos
+            jitter: Retardo adicional uniforme máximo en segundos
+            failure_rate: Probabilidad de falla por llamada (0-1)
+            seed: Semilla del generador aleatorio
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+    
+    def sample_delay(self) -> float:
+        """Latencia de la llamada actual (fija más jitter) en segundos, sin dormir"""
+        with self._lock:
+            extra = self.rng.uniform(0, self.jitter) if self.jitter > 0 else 0.0
+        return self.latency + extra
+    
+    def delay(self):
+        """Duerme la latencia configurada más el jitter"""
+        seconds = self.sample_delay()
+        if seconds > 0:
+            time.sleep(seconds)
+    
+    def should_fail(self) -> bool:
+        """Decide si la llamada actual falla"""
+        if self.failure_rate <= 0:
+            return False
+        with self._lock:
+            return self.rng.random() < self.failure_rate
+    
+    def gauss(self, sigma: float) -> float:
+        """Ruido gaussiano reproducible"""
+        with self._lock:
+            return self.rng.gauss(0, sigma)
+
+
+class ThermalModel:
+    """
+    Modelo térmico de dos nodos (evaporador / condensador) del termosifón
+    
+    C_e dT_e/dt = P - (T_e - T_c) / R_ec
+    C_c dT_c/dt = (T_e - T_c) / R_ec - (T_c - T_amb) / R_ca
+    
+    R_ca depende del estado de la bomba. time_scale acelera el tiempo simulado.
+    """
+    
+    def __init__(
+        self,
+        ambient: float = 25.0,
+        r_evap_cond: float = 2.0,
+        r_cond_amb_pump: float = 0.5,
+        r_cond_amb_no_pump: float = 5.0,
+        c_evap: float = 50.0,
+        c_cond: float = 200.0,
+        time_scale: float = 1.0
+    ):
+        """
+        Inicializa el modelo
+        
+        Args:
+            ambient: Temperatura ambiente (°C)
+            r_evap_cond: Resistencia térmica evaporador-condensador (°C/W)
+            r_cond_amb_pump: Resistencia condensador-ambiente con bomba (°C/W)
+            r_cond_amb_no_pump: Resistencia condensador-ambiente sin bomba (°C/W)
+            c_evap: Capacidad térmica del evaporador (J/°C)
+            c_cond: Capacidad térmica del condensador (J/°C)
+            time_scale: Segundos simulados por segundo real
+        """
+        self.ambient = ambient
+        self.r_evap_cond = r_evap_cond
+        self.r_cond_amb_pump = r_cond_amb_pump
+        self.r_cond_amb_no_pump = r_cond_amb_no_pump
+        self.c_evap = c_evap
+        self.c_cond = c_cond
+        self.time_scale = time_scale
+        
+        self.power = 0.0
+        self.pump_on = False
+        self.temp_evap = ambient
+        self.temp_cond = ambient
+        self._last_update = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _advance(self):
+        """Integra el modelo hasta el instante actual (Euler explícito con subpasos)"""
+        now = time.monotonic()
+        remaining = (now - self._last_update) * self.time_scale
+        self._last_update = now
+        
+        r_cond_amb = self.r_cond_amb_pump if self.pump_on else self.r_cond_amb_no_pump
+        while remaining > 0:
+            dt = min(remaining, 0.5)
+            q_ec = (self.temp_evap - self.temp_cond) / self.r_evap_cond
+            q_ca = (self.temp_cond - self.ambient) / r_cond_amb
+            self.temp_evap += dt * (self.power - q_ec) / self.c_evap
+            self.temp_cond += dt * (q_ec - q_ca) / self.c_cond
+            remaining -= dt
+    
+    def set_power(self, power: float):
+        """Actualiza la potencia aplicada al evaporador (W)"""
+        with self._lock:
+            self._advance()
+            self.power = max(0.0, power)
+    
+    def set_pump(self, pump_on: bool):
+        """Actualiza el estado de la bomba de fluido"""
+        with self._lock:
+            self._advance()
+            self.pump_on = pump_on
+    
+    def temperatures(self) -> Tuple[float, float]:
+        """
+        Temperaturas actuales del modelo
+        
+        Returns:
+            Tupla (T_evaporador, T_condensador) en °C
+        """
+        with self._lock:
+            self._advance()
+            return self.temp_evap, self.temp_cond
+
+
+class XLNInstrumentModel:
+    """Intérprete del subconjunto SCPI de la XLN30052 con carga resistiva"""
+    
+    IDENTIFICATION = "B&K Precision,XLN30052,SIM000001,1.0"
+    
+    def __init__(
+        self,
+        thermal: Optional[ThermalModel] = None,
+        load_ohm: float = 10.0,
+        ovp: float = 310.0,
+        ocp: float = 5.5,
+        opp: float = 1600.0,
+        noise: float = 0.0,
+        profile: Optional[LatencyProfile] = None
+    ):
+        """
+        Inicializa el instrumento simulado
+        
+        Args:
+            thermal: Modelo térmico que recibe la potencia entregada
+            load_ohm: Resistencia de la carga (Ω)
+            ovp: Umbral de sobre-voltaje (V)
+            ocp: Umbral de sobre-corriente (A)
+            opp: Umbral de sobre-potencia (W)
+            noise: Ruido gaussiano de las mediciones (fracción del valor)
+            profile: Perfil para el ruido de medición
+        """
+        self.thermal = thermal
+        self.load_ohm = load_ohm
+        self.ovp = ovp
+        self.ocp = ocp
+        self.opp = opp
+        self.noise = noise
+        self.profile = profile or LatencyProfile()
+        
+        self.voltage_set = 0.0
+        self.current_set = 0.0
+        self.output = False
+        self.questionable = 0
+        self._lock = threading.Lock()
+    
+    def _operating_point(self) -> Tuple[float, float]:
+        """Voltaje y corriente entregados (CV o CC según el límite)"""
+        if not self.output or self.load_ohm <= 0:
+            return 0.0, 0.0
+        voltage = self.voltage_set
+        current = voltage / self.load_ohm
+        if current > self.current_set:
+            current = self.current_set
+            voltage = current * self.load_ohm
+        return voltage, current
+    
+    def _update_outputs(self):
+        """Evalúa protecciones y propaga la potencia al modelo térmico"""
+        voltage, current = self._operating_point()
+        if self.output:
+            if voltage > self.ovp:
+                self.questionable |= 0x01
+            if current > self.ocp:
+                self.questionable |= 0x02
+            if voltage * current > self.opp:
+                self.questionable |= 0x04
+            if self.questionable & 0x07:
+                self.output = False
+                voltage, current = 0.0, 0.0
+        if self.thermal is not None:
+            self.thermal.set_power(voltage * current)
+    
+    def trip(self, bits: int = 0x01):
+        """Fuerza el disparo de una protección (OVP=0x01, OCP=0x02, OPP=0x04)"""
+        with self._lock:
+            self.questionable |= bits
+            self.output = False
+            self._update_outputs()
+    
+    def _measure(self, value: float) -> float:
+        """Agrega ruido de medición"""
+        if self.noise > 0 and value:
+            return value * (1 + self.profile.gauss(self.noise))
+        return value
+    
+    def _execute(self, command: str) -> Optional[str]:
+        """Ejecuta un comando SCPI simple; devuelve la respuesta si es consulta"""
+        header, _, argument = command.strip().partition(" ")
+        header = header.upper().lstrip(":")
+        argument = argument.strip().upper()
+        
+        if header == "*IDN?":
+            return self.IDENTIFICATION
+        if header == "*CLS":
+            self.questionable = 0
+            return None
+        if header == "*OPC?":
+            return "1"
+        if header in ("VOLT", "SOUR:VOLT"):
+            self.voltage_set = float(argument)
+            self._update_outputs()
+            return None
+        if header in ("VOLT?", "SOUR:VOLT?"):
+            return f"{self.voltage_set:.2f}"
+        if header in ("CURR", "SOUR:CURR"):
+            self.current_set = float(argument)
+            self._update_outputs()
+            return None
+        if header in ("CURR?", "SOUR:CURR?"):
+            return f"{self.current_set:.3f}"
+        if header in ("OUTP", "OUTPUT"):
+            if argument in ("ON", "1"):
+                self.output = not (self.questionable & 0x07)
+            else:
+                self.output = False
+            self._update_outputs()
+            return None
+        if header in ("OUTP?", "OUTPUT?"):
+            return "1" if self.output else "0"
+        if header == "MEAS:VOLT?":
+            return f"{self._measure(self._operating_point()[0]):.3f}"
+        if header == "MEAS:CURR?":
+            return f"{self._measure(self._operating_point()[1]):.4f}"
+        if header == "MEAS:POW?":
+            voltage, current = self._operating_point()
+            return f"{self._measure(voltage * current):.3f}"
+        if header == "STAT:QUES:COND?":
+            return str(self.questionable)
+        
+        raise ValueError(f"Comando SCPI no soportado: {command}")
+    
+    def handle(self, line: str) -> Optional[str]:
+        """
+        Procesa una línea SCPI (admite comandos encadenados con ';')
+        
+        Args:
+            line: Línea recibida
+            
+        Returns:
+            Respuestas de las consultas unidas con ';' o None si no hay consultas
+        """
+        responses = []
+        with self._lock:
+            for command in line.split(";"):
+                if command.strip():
+                    response = self._execute(command)
+                    if response is not None:
+                        responses.append(response)
+        return ";".join(responses) if responses else None
+
+
+class SimulatedFuenteXLN(FuenteXLN):
+    """FuenteXLN cuyo transporte es un instrumento simulado en lugar del socket TCP"""
+    
+    def __init__(
+        self,
+        instrument: Optional[XLNInstrumentModel] = None,
+        profile: Optional[LatencyProfile] = None,
+        host: str = "simulated",
+        port: int = 5024,
+        timeout: int = 10
+    ):
+        """
+        Inicializa la fuente simulada
+        
+        Args:
+            instrument: Modelo SCPI del instrumento
+            profile: Latencia y fallas por comando
+            host: Nombre mostrado en los logs
+            port: Puerto nominal
+            timeout: Timeout nominal
+        """
+        super().__init__(host, port, timeout)
+        self.instrument = instrument or XLNInstrumentModel()
+        self.profile = profile or LatencyProfile()
+    
+    def _open_transport(self):
+        """Simula la apertura de la conexión (puede fallar según el perfil)"""
+        self.profile.delay()
+        if self.profile.should_fail():
+            raise ConnectionError("Falla de conexión inyectada")
+        return self.instrument
+    
+    def _close_transport(self, connection):
+        """Cierra la conexión simulada"""
+    
+    def _exchange(self, command: str, expect_response: bool) -> Optional[str]:
+        """Entrega el comando al instrumento simulado con la latencia configurada"""
+        self.profile.delay()
+        if self.profile.should_fail():
+            raise ConnectionError(f"Falla inyectada en '{command}'")
+        
+        response = self.instrument.handle(command)
+        if not expect_response:
+            return ""
+        return response
+    
+    def _exchange_many(self, commands: Sequence[Tuple[str, bool]]) -> List[str]:
+        """Secuencia de comandos: una sola latencia de ida y vuelta para todo el lote"""
+        self.profile.delay()
+        if self.profile.should_fail():
+            raise ConnectionError("Falla inyectada en secuencia de comandos")
+        
+        results = []
+        for command, expect_response in commands:
+            response = self.instrument.handle(command)
+            results.append(response if expect_response else "")
+        return results
+
+
+class SimulatedDAQUSB5203(DAQUSB5203):
+    """DAQUSB5203 cuyas lecturas provienen del modelo térmico"""
+    
+    def __init__(
+        self,
+        thermal: ThermalModel,
+        evaporator_channels: List[int],
+        condenser_channels: List[int],
+        profile: Optional[LatencyProfile] = None,
+        noise: float = 0.05,
+        open_channels: Optional[List[int]] = None,
+        num_channels: int = 8,
+        tc_type: str = "K",
+        timeout: int = 10
+    ):
+        """
+        Inicializa el DAQ simulado
+        
+        Args:
+            thermal: Modelo térmico compartido con la fuente simulada
+            evaporator_channels: Canales que miden el evaporador
+            condenser_channels: Canales que miden el condensador
+            profile: Latencia y fallas por escaneo
+            noise: Ruido gaussiano por lectura (°C)
+            open_channels: Canales con termopar abierto simulado
+            num_channels: Número de canales
+            tc_type: Tipo de termopar nominal
+            timeout: Timeout nominal
+        """
+        super().__init__(num_channels, tc_type, timeout, backend="cli")
+        self.thermal = thermal
+        self.evaporator_channels = set(evaporator_channels)
+        self.condenser_channels = set(condenser_channels)
+        self.profile = profile or LatencyProfile()
+        self.noise = noise
+        self.open_channels = set(open_channels or [])
+        # Desviación fija por canal para que los termopares no sean idénticos
+        self.offsets = {ch: self.profile.gauss(0.2) for ch in range(num_channels)}
+    
+    def _read_raw(self, channels: List[int]) -> Tuple[Dict[int, Optional[float]], Dict[int, str]]:
+        """Genera lecturas crudas desde el modelo térmico"""
+        self.profile.delay()
+        if self.profile.should_fail():
+            logger.error(f"DAQ simulado: falla inyectada en escaneo de canales {channels}")
+            return {ch: None for ch in channels}, {ch: CHANNEL_NO_RESPONSE for ch in channels}
+        
+        temp_evap, temp_cond = self.thermal.temperatures()
+        values: Dict[int, Optional[float]] = {}
+        
+        for channel in channels:
+            if channel in self.open_channels:
+                values[channel] = -9999.0
+                continue
+            if channel in self.evaporator_channels:
+                base = temp_evap
+            elif channel in self.condenser_channels:
+                base = temp_cond
+            else:
+                base = self.thermal.ambient
+            values[channel] = base + self.offsets[channel] + self.profile.gauss(self.noise)
+        
+        return values, {}
+
+
+class SimulatedRelayController(RelayController):
+    """RelayController sin GPIO con latencia, fallas y bomba conectada al modelo térmico"""
+    
+    def __init__(
+        self,
+        relay_pins: Dict[str, int],
+        thermal: Optional[ThermalModel] = None,
+        profile: Optional[LatencyProfile] = None,
+        pump_relay: str = "RELAY_1"
+    ):
+        """
+        Inicializa los relés simulados
+        
+        Args:
+            relay_pins: Diccionario con nombres y pines GPIO (BCM)
+            thermal: Modelo térmico que recibe el estado de la bomba
+            profile: Latencia y fallas por conmutación
+            pump_relay: Relé que controla la bomba de fluido
+        """
+        self.thermal = thermal
+        self.profile = profile or LatencyProfile()
+        self.pump_pin = relay_pins.get(pump_relay)
+        super().__init__(relay_pins)
+    
+    def _setup_pins(self):
+        """Inicializa los estados sin tocar GPIO"""
+        for name in self.relay_pins.keys():
+            self.relay_states[name] = False
+        logger.info(f"Relés simulados inicializados: {list(self.relay_pins)}")
+    
+    def _write_pin(self, pin: int, active: bool):
+        """Simula la conmutación con latencia y falla inyectada"""
+        self.profile.delay()
+        if self.profile.should_fail():
+            raise IOError(f"Falla inyectada en GPIO {pin}")
+        if pin == self.pump_pin and self.thermal is not None:
+            self.thermal.set_pump(active)
+    
+    def cleanup(self):
+        """Desactiva todos los relés simulados"""
+        self.deactivate_all()
+
+
+def create_simulated_supply(
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    failure_rate: float = 0.0,
+    seed: Optional[int] = None,
+    load_ohm: float = 10.0
+) -> SimulatedFuenteXLN:
+    """
+    Crea una fuente simulada adicional con su propia carga (sin modelo térmico)
+    
+    Returns:
+        Fuente simulada
+    """
+    instrument = XLNInstrumentModel(
+        load_ohm=load_ohm, noise=0.001, profile=LatencyProfile(seed=seed)
+    )
+    profile = LatencyProfile(latency, jitter, failure_rate, None if seed is None else seed + 1)
+    return SimulatedFuenteXLN(instrument, profile)
+
+
+def create_simulated_instruments(
+    relay_pins: Dict[str, int],
+    evaporator_channels: List[int],
+    condenser_channels: List[int],
+    num_channels: int = 8,
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    failure_rate: float = 0.0,
+    seed: Optional[int] = None,
+    time_scale: float = 1.0,
+    load_ohm: float = 10.0
+) -> Tuple[SimulatedFuenteXLN, SimulatedDAQUSB5203, SimulatedRelayController, ThermalModel]:
+    """
+    Crea fuente, DAQ y relés simulados que comparten un modelo térmico
+    
+    Returns:
+        Tupla (fuente, daq, relés, modelo térmico)
+    """
+    thermal = ThermalModel(time_scale=time_scale)
+    
+    def profile(offset: int) -> LatencyProfile:
+        return LatencyProfile(
+            latency, jitter, failure_rate, None if seed is None else seed + offset
+        )
+    
+    instrument = XLNInstrumentModel(thermal, load_ohm=load_ohm, noise=0.001, profile=profile(0))
+    fuente = SimulatedFuenteXLN(instrument, profile(1))
+    daq = SimulatedDAQUSB5203(
+        thermal, evaporator_channels, condenser_channels, profile(2), num_channels=num_channels
+    )
+    relay = SimulatedRelayController(relay_pins, thermal, profile(3))
+    
+    logger.info(
+        f"Instrumentos simulados: latencia {latency}s, jitter {jitter}s, fallas {failure_rate:.1%}"
+    )
+    return fuente, daq, relay, thermal
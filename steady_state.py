@@ -0,0 +1,188 @@
+"""
+Detección de régimen estacionario sobre el flujo de temperaturas
+Pendiente y desviación estándar en una ventana de tiempo deslizante,
+actualizadas incrementalmente con cada muestra
+Instituto Tecnológico Metropolitano (ITM) - Medellín, Colombia
+"""
+
+import collections
+import logging
+import math
+from typing import Deque, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class RollingTrend:
+    """
+    Regresión lineal de una señal sobre una ventana de tiempo
+    
+    Mantiene las sumas de t, y, t², t·y e y² de las muestras dentro de la
+    ventana, así que cada muestra cuesta O(1) amortizado sin recorrer el
+    historial. Los tiempos se guardan relativos a la primera muestra para
+    conservar precisión en las sumas.
+    """
+    
+    def __init__(self, window: float):
+        """
+        Args:
+            window: Ancho de la ventana en segundos
+        """
+        if window <= 0:
+            raise ValueError("La ventana debe ser positiva")
+        self.window = window
+        self.reset()
+    
+    def reset(self):
+        """Descarta el historial"""
+        self._samples: Deque[Tuple[float, float]] = collections.deque()
+        self._origin: Optional[float] = None
+        self._sum_t = self._sum_y = self._sum_tt = self._sum_ty = self._sum_yy = 0.0
+    
+    def _accumulate(self, t: float, y: float, sign: float):
+        self._sum_t += sign * t
+        self._sum_y += sign * y
+        self._sum_tt += sign * t * t
+        self._sum_ty += sign * t * y
+        self._sum_yy += sign * y * y
+    
+    def add(self, t: float, y: float):
+        """
+        Agrega una muestra y descarta las que salen de la ventana
+        
+        Args:
+            t: Instante de la muestra (s, reloj monotónico)
+            y: Valor
+        """
+        if self._origin is None:
+            self._origin = t
+        t -= self._origin
+        self._samples.append((t, y))
+        self._accumulate(t, y, 1.0)
+        while self._samples[0][0] < t - self.window:
+            self._accumulate(*self._samples.popleft(), -1.0)
+    
+    @property
+    def count(self) -> int:
+        return len(self._samples)
+    
+    @property
+    def span(self) -> float:
+        """Tiempo cubierto desde la primera muestra recibida (s)"""
+        return self._samples[-1][0] if self._samples else 0.0
+    
+    def slope(self) -> Optional[float]:
+        """Pendiente por mínimos cuadrados (unidades/s) o None con menos de 3 muestras"""
+        n = len(self._samples)
+        if n < 3:
+            return None
+        denominator = n * self._sum_tt - self._sum_t ** 2
+        if denominator <= 0:
+            return None
+        return (n * self._sum_ty - self._sum_t * self._sum_y) / denominator
+    
+    def std(self) -> Optional[float]:
+        """Desviación estándar poblacional de la ventana o None sin muestras"""
+        n = len(self._samples)
+        if n == 0:
+            return None
+        variance = (self._sum_yy - self._sum_y ** 2 / n) / n
+        return math.sqrt(max(0.0, variance))
+
+
+class SteadyStateDetector:
+    """
+    Criterio de régimen estacionario para varias señales
+    
+    Una señal es estacionaria cuando su ventana está completa y tiene al
+    menos min_samples muestras, el valor absoluto de la pendiente no supera
+    slope_threshold (°C/min) y, si se indica, su desviación estándar no
+    supera std_threshold (°C). El régimen se alcanza cuando todas las
+    señales lo son a la vez.
+    """
+    
+    def __init__(
+        self,
+        signals: Iterable[str] = ("temp_evap_avg", "temp_cond_avg"),
+        window: float = 120.0,
+        slope_threshold: float = 0.05,
+        std_threshold: Optional[float] = None,
+        min_samples: int = 10
+    ):
+        """
+        Inicializa el detector
+        
+        Args:
+            signals: Nombres de las señales a vigilar
+            window: Ventana de evaluación (s)
+            slope_threshold: Pendiente máxima en valor absoluto (°C/min)
+            std_threshold: Desviación estándar máxima (°C); None = no se evalúa
+            min_samples: Muestras mínimas en la ventana para evaluar el criterio
+        """
+        if min_samples < 3:
+            raise ValueError("Se necesitan al menos 3 muestras para estimar la pendiente")
+        self.window = window
+        self.min_samples = min_samples
+        self.slope_threshold = slope_threshold
+        self.std_threshold = std_threshold
+        self.trends: Dict[str, RollingTrend] = {name: RollingTrend(window) for name in signals}
+        self.steady_since: Optional[float] = None
+    
+    def reset(self):
+        """Reinicia las ventanas (al comenzar un nivel nuevo)"""
+        for trend in self.trends.values():
+            trend.reset()
+        self.steady_since = None
+    
+    def _signal_steady(self, trend: RollingTrend) -> bool:
+        if trend.count < self.min_samples or trend.span < self.window:
+            return False
+        slope = trend.slope()
+        if slope is None:
+            return False
+        if abs(slope) * 60.0 > self.slope_threshold:
+            return False
+        if self.std_threshold is not None and trend.std() > self.std_threshold:
+            return False
+        return True
+    
+    def update(self, t: float, values: Dict[str, Optional[float]]) -> bool:
+        """
+        Incorpora una muestra y evalúa el criterio
+        
+        Args:
+            t: Instante de la muestra (s, reloj monotónico)
+            values: Valor de cada señal (None o NaN se ignoran)
+            
+        Returns:
+            True si todas las señales están en régimen estacionario
+        """
+        for name, trend in self.trends.items():
+            value = values.get(name)
+            if value is not None and not math.isnan(value):
+                trend.add(t, value)
+        
+        steady = all(self._signal_steady(trend) for trend in self.trends.values())
+        if steady and self.steady_since is None:
+            self.steady_since = t
+        elif not steady:
+            self.steady_since = None
+        return steady
+    
+    def status(self) -> dict:
+        """
+        Pendiente (°C/min) y desviación estándar actuales de cada señal
+        
+        Returns:
+            Diccionario señal -> {"slope", "std", "samples"}
+        """
+        status = {}
+        for name, trend in self.trends.items():
+            slope = trend.slope()
+            std = trend.std()
+            status[name] = {
+                "slope": round(slope * 60.0, 4) if slope is not None else None,
+                "std": round(std, 4) if std is not None else None,
+                "samples": trend.count
+            }
+        return status
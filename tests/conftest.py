@@ -0,0 +1,9 @@
+"""
+Configuración común de pytest para LabPiPanel
+Los módulos viven en la raíz del repositorio
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,122 @@
+"""
+Pruebas de integración de FuenteXLN contra el emulador SCPI de la XLN30052
+Cada prueba arranca un emulador en un puerto libre y conecta por TCP real
+"""
+
+import time
+
+import pytest
+
+from fuente_xln import LINK_OPEN, FuenteXLN
+from xln_emulator import XLNEmulator
+
+
+@pytest.fixture
+def emulator():
+    emu = XLNEmulator(host="127.0.0.1", port=0, seed=1)
+    emu.start()
+    yield emu
+    emu.stop()
+
+
+@pytest.fixture
+def fuente(emulator):
+    source = FuenteXLN("127.0.0.1", emulator.port, timeout=1)
+    assert source.connect()
+    source.start_io_worker()
+    yield source
+    source.ramp.cancel()
+    source.ramp.wait(2)
+    source.stop_io_worker()
+    source.disconnect()
+
+
+def test_set_voltage_is_verified_on_the_instrument(fuente, emulator):
+    assert fuente.set_voltage(12.0)
+    assert fuente.set_current(1.5)
+
+    assert fuente.get_voltage(refresh=True) == pytest.approx(12.0)
+    assert fuente.get_current(refresh=True) == pytest.approx(1.5)
+    assert emulator.instrument.voltage_set == pytest.approx(12.0)
+
+
+def test_out_of_range_setpoint_is_not_sent(fuente, emulator):
+    served = emulator.commands_served
+    assert not fuente.set_voltage(fuente.voltage_max + 1)
+    assert emulator.commands_served == served
+
+
+def test_deferred_setpoints_are_confirmed_by_verify_setpoints(fuente, emulator):
+    assert fuente.set_voltage(24.0, verify=False)
+    assert fuente.set_current(2.0, verify=False)
+
+    assert fuente.verify_setpoints()
+    assert emulator.instrument.voltage_set == pytest.approx(24.0)
+    assert emulator.instrument.current_set == pytest.approx(2.0)
+    # Sin escrituras pendientes no hay nada que verificar
+    assert fuente.verify_setpoints()
+
+
+def test_deferred_setpoint_mismatch_is_reported(fuente, emulator):
+    assert fuente.set_voltage(24.0, verify=False)
+    # Otro cliente (panel frontal) cambia la consigna antes de verificar
+    fuente.io.submit("VOLT 5.00").result(timeout=2)
+
+    assert not fuente.verify_setpoints()
+    assert fuente.get_voltage() == pytest.approx(5.0)
+
+
+def test_protection_trip_invalidates_cached_output_state(fuente, emulator):
+    assert fuente.set_voltage(10.0)
+    assert fuente.set_current(2.0)
+    assert fuente.output_on()
+    assert fuente.get_output_state() is True
+
+    emulator.trip(0x01)
+    # Mientras no se lea el registro, el estado se sirve de memoria
+    assert fuente.get_output_state() is True
+
+    status = fuente.read_questionable()
+    assert status is not None and status & 0x01
+    assert fuente.get_output_state() is False
+    assert fuente.check_protections()["ovp"]
+
+
+def test_open_circuit_fails_fast_when_instrument_is_gone(fuente, emulator):
+    assert fuente.get_identification() is not None
+    emulator.stop()
+
+    deadline = time.monotonic() + 10
+    while fuente.link.state != LINK_OPEN and time.monotonic() < deadline:
+        assert fuente.get_voltage(refresh=True) is None
+    assert fuente.link.state == LINK_OPEN
+
+    started = time.monotonic()
+    assert fuente.get_voltage(refresh=True) is None
+    assert fuente.set_voltage(1.0) is False
+    assert time.monotonic() - started < 0.5
+
+
+def test_ramp_can_be_cancelled(fuente, emulator):
+    assert fuente.set_voltage(0.0)
+    assert fuente.ramp_to(voltage=20.0, duration=2.0, wait=False)
+    time.sleep(0.3)
+    fuente.ramp.cancel()
+
+    assert fuente.ramp.wait(2) is False
+    status = fuente.ramp.status()
+    assert status["error"] == "cancelada"
+    assert 0 < status["points_sent"] < status["points_total"]
+    # La fuente conserva la última consigna enviada
+    assert 0.0 < emulator.instrument.voltage_set < 20.0
+
+
+def test_ramp_reaches_final_setpoint(fuente, emulator):
+    assert fuente.set_voltage(0.0)
+    assert fuente.ramp_to(voltage=6.0, duration=0.5)
+
+    status = fuente.ramp.status()
+    assert status["result"] is True
+    assert status["verifications"] >= 1
+    assert emulator.instrument.voltage_set == pytest.approx(6.0)
+    assert fuente.get_voltage() == pytest.approx(6.0)
@@ -0,0 +1,75 @@
+"""
+Pruebas unitarias del planificador de adquisición multi-frecuencia
+"""
+
+import threading
+import time
+
+import pytest
+
+from acquisition_scheduler import MultiRateScheduler
+
+
+def test_tasks_run_on_their_own_grid():
+    scheduler = MultiRateScheduler()
+    fast, slow = [], []
+    scheduler.add("fast", 0.05, lambda scheduled, actual: fast.append(scheduled))
+    scheduler.add("slow", 0.2, lambda scheduled, actual: slow.append(scheduled))
+    
+    start = time.monotonic()
+    scheduler.run(0.33, start)
+    
+    assert len(fast) == 7
+    assert [round(t - start, 2) for t in slow] == [0.0, 0.2]
+    assert time.monotonic() - start >= 0.33
+
+
+def test_overrun_skips_missed_deadlines():
+    scheduler = MultiRateScheduler()
+    scheduled_times = []
+    
+    def slow_task(scheduled, actual):
+        scheduled_times.append(scheduled)
+        if len(scheduled_times) == 1:
+            time.sleep(0.33)
+    
+    start = time.monotonic()
+    scheduler.add("slow", 0.1, slow_task)
+    scheduler.run(0.55, start)
+    stats = scheduler.stats()["slow"]
+    
+    # La primera ejecución dura 0.33 s: los plazos 0.1, 0.2 y 0.3 se omiten
+    assert stats["missed"] == 3
+    assert [round(t - start, 1) for t in scheduled_times] == [0.0, 0.4, 0.5]
+    assert stats["runs"] == 3
+
+
+def test_stop_ends_run_early():
+    scheduler = MultiRateScheduler()
+    scheduler.add("task", 0.05, lambda scheduled, actual: None)
+    threading.Timer(0.1, scheduler.stop).start()
+    
+    start = time.monotonic()
+    scheduler.run(5.0)
+    
+    assert time.monotonic() - start < 1.0
+    assert scheduler.is_stopped
+
+
+def test_task_error_stops_and_propagates():
+    scheduler = MultiRateScheduler()
+    
+    def failing(scheduled, actual):
+        raise RuntimeError("falla de instrumento")
+    
+    scheduler.add("failing", 0.05, failing)
+    scheduler.add("other", 0.05, lambda scheduled, actual: None)
+    
+    with pytest.raises(RuntimeError):
+        scheduler.run(5.0)
+    assert scheduler.is_stopped
+
+
+def test_invalid_period():
+    with pytest.raises(ValueError):
+        MultiRateScheduler().add("task", 0, lambda scheduled, actual: None)
@@ -0,0 +1,89 @@
+"""
+Pruebas unitarias de los filtros digitales del DAQ
+"""
+
+import numpy as np
+import pytest
+
+from daq_filters import (
+    ExponentialFilter,
+    FilterBank,
+    MedianFilter,
+    MovingAverageFilter,
+    parse_channel_filters,
+    parse_filter_chain,
+)
+
+
+def column(values):
+    return np.array(values, dtype=np.float64)[:, np.newaxis]
+
+
+def test_parse_filter_chain_builds_filters_in_order():
+    chain = parse_filter_chain("median:5| ema:0.3 |")
+    
+    assert [type(f) for f in chain] == [MedianFilter, ExponentialFilter]
+    assert chain[0].window == 5
+    assert chain[1].alpha == 0.3
+
+
+def test_parse_filter_chain_empty_and_unknown():
+    assert parse_filter_chain("") == []
+    with pytest.raises(ValueError):
+        parse_filter_chain("kalman:3")
+    with pytest.raises(ValueError):
+        parse_filter_chain("ema:1.5")
+
+
+def test_parse_channel_filters():
+    assert parse_channel_filters("0=median:5|ema:0.3;4=moving_average:8") == {
+        0: "median:5|ema:0.3",
+        4: "moving_average:8"
+    }
+
+
+def test_moving_average_keeps_history_across_blocks():
+    whole = MovingAverageFilter(3).process(column([1, 2, 3, 4, 5, 6]))
+    
+    split = MovingAverageFilter(3)
+    parts = np.vstack([split.process(column([1, 2])), split.process(column([3, 4, 5, 6]))])
+    
+    np.testing.assert_allclose(whole[:, 0], [1, 1.5, 2, 3, 4, 5])
+    np.testing.assert_allclose(parts, whole)
+
+
+def test_median_rejects_spike_and_ignores_nan():
+    result = MedianFilter(3).process(column([10, 10, 100, 10, np.nan, 12]))
+    
+    np.testing.assert_allclose(result[:, 0], [10, 10, 10, 10, 55, 11])
+
+
+def test_exponential_filter_starts_from_first_valid_sample():
+    result = ExponentialFilter(0.5).process(column([np.nan, 10, 20, np.nan, 30]))
+    
+    assert np.isnan(result[0, 0]) and np.isnan(result[3, 0])
+    np.testing.assert_allclose(result[[1, 2, 4], 0], [10, 15, 22.5])
+
+
+def test_filter_bank_applies_per_channel_chains():
+    bank = FilterBank(3, default_spec="moving_average:2", channel_specs={2: ""})
+    block = np.array([[1.0, 10.0, 5.0], [3.0, 20.0, 7.0]])
+    
+    result = bank.process(block)
+    
+    np.testing.assert_allclose(result, [[1.0, 10.0, 5.0], [2.0, 15.0, 7.0]])
+    assert bank.active
+    
+    bank.reset()
+    np.testing.assert_allclose(bank.process(block[1:]), [[3.0, 20.0, 7.0]])
+
+
+def test_inactive_filter_bank_returns_copy():
+    bank = FilterBank(2)
+    block = np.array([[1.0, 2.0]])
+    
+    result = bank.process(block)
+    result[0, 0] = 99.0
+    
+    assert not bank.active
+    assert block[0, 0] == 1.0
@@ -0,0 +1,111 @@
+"""
+Pruebas unitarias del seguimiento de salud de termopares
+"""
+
+from daq_health import (
+    ChannelHealthTracker,
+    HEALTH_ERROR,
+    HEALTH_NO_RESPONSE,
+    HEALTH_NOISY,
+    HEALTH_OK,
+    HEALTH_OPEN,
+    HEALTH_OUT_OF_RANGE,
+    HEALTH_STUCK,
+    HEALTH_TIMEOUT,
+    HEALTH_UNKNOWN,
+)
+from daq_usb5203 import (
+    CHANNEL_ERROR,
+    CHANNEL_INVALID,
+    CHANNEL_NO_RESPONSE,
+    CHANNEL_TIMEOUT,
+    DAQSnapshot,
+)
+
+
+def scan(readings, status=None, timestamp=1.0):
+    return DAQSnapshot.from_readings(readings, timestamp=timestamp, status=status)
+
+
+def test_unknown_until_first_scan():
+    tracker = ChannelHealthTracker(2)
+    
+    assert not tracker.has_data
+    assert tracker.summary()["overall"] == HEALTH_UNKNOWN
+    
+    tracker.update(scan({0: 25.0, 1: 26.0}))
+    
+    assert tracker.has_data
+    assert tracker.states() == {0: HEALTH_OK, 1: HEALTH_OK}
+    assert tracker.summary()["overall"] == HEALTH_OK
+
+
+def test_invalid_readings_map_to_scan_status():
+    tracker = ChannelHealthTracker(5)
+    
+    tracker.update(scan(
+        {0: 25.0, 1: None, 2: None, 3: None, 4: None},
+        status={
+            1: CHANNEL_INVALID, 2: CHANNEL_NO_RESPONSE, 3: CHANNEL_TIMEOUT, 4: CHANNEL_ERROR
+        }
+    ))
+    
+    assert tracker.states() == {
+        0: HEALTH_OK,
+        1: HEALTH_OPEN,
+        2: HEALTH_NO_RESPONSE,
+        3: HEALTH_TIMEOUT,
+        4: HEALTH_ERROR
+    }
+    assert tracker.open_channels() == [1]
+    assert tracker.summary()["overall"] == "degraded"
+
+
+def test_open_channel_recovers():
+    tracker = ChannelHealthTracker(1)
+    
+    tracker.update(scan({0: None}, status={0: CHANNEL_INVALID}))
+    assert tracker.state(0) == HEALTH_OPEN
+    
+    tracker.update(scan({0: 25.0}))
+    assert tracker.state(0) == HEALTH_OK
+
+
+def test_out_of_range():
+    tracker = ChannelHealthTracker(1, temp_min=-50.0, temp_max=500.0)
+    
+    tracker.update(scan({0: 650.0}))
+    
+    assert tracker.state(0) == HEALTH_OUT_OF_RANGE
+
+
+def test_stuck_after_repeated_values():
+    tracker = ChannelHealthTracker(1, stuck_samples=3)
+    
+    for _ in range(3):
+        tracker.update(scan({0: 25.0}))
+    assert tracker.state(0) == HEALTH_OK
+    
+    tracker.update(scan({0: 25.0}))
+    assert tracker.state(0) == HEALTH_STUCK
+    
+    tracker.update(scan({0: 25.5}))
+    assert tracker.state(0) == HEALTH_OK
+
+
+def test_noisy_when_scan_to_scan_jumps_are_large():
+    tracker = ChannelHealthTracker(1, noise_threshold=2.0, noise_alpha=0.5)
+    
+    for value in (20.0, 30.0, 20.0, 30.0):
+        tracker.update(scan({0: value}))
+    
+    assert tracker.state(0) == HEALTH_NOISY
+
+
+def test_channels_out_of_tracker_range_are_ignored():
+    tracker = ChannelHealthTracker(1)
+    
+    tracker.update(scan({5: 25.0}))
+    
+    assert not tracker.has_data
+    assert tracker.state(5) == HEALTH_UNKNOWN
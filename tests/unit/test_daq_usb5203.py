@@ -0,0 +1,130 @@
+"""
+Pruebas unitarias del DAQ USB-5203: sesión USB con un dispositivo pyusb falso y snapshots
+"""
+
+import struct
+
+import pytest
+
+from daq_usb5203 import (
+    DAQSnapshot,
+    USB5203Session,
+    USB5203_CH_0_TC,
+    USB5203_SENSOR_TYPE,
+    USB5203_SET_ITEM,
+    USB5203_TIN_SCAN,
+    USB5203_TC_TYPES,
+)
+
+
+class FakeEndpoint:
+    bEndpointAddress = 0x81
+
+
+class FakeDevice:
+    """Registra los reportes SET_REPORT y responde TIN_SCAN con valores fijos"""
+    
+    def __init__(self, values, fail_reads=0):
+        self.values = values
+        self.fail_reads = fail_reads
+        self.reports = []
+        self.reads = []
+    
+    def ctrl_transfer(self, bm_request_type, b_request, w_value, w_index, data, timeout):
+        self.reports.append((bm_request_type, b_request, w_value, w_index, bytes(data)))
+        return len(data)
+    
+    def read(self, address, length, timeout):
+        self.reads.append((address, length))
+        if self.fail_reads:
+            self.fail_reads -= 1
+            raise IOError("transferencia fallida")
+        _, _, _, _, request = self.reports[-1]
+        start, end = request[1], request[2]
+        payload = struct.pack(f"<{end - start + 1}f", *self.values[start:end + 1])
+        return bytearray([USB5203_TIN_SCAN]) + bytearray(payload)
+
+
+def make_session(device, tc_type="K", num_channels=8):
+    session = USB5203Session(timeout=1, tc_type=tc_type, num_channels=num_channels)
+    session.device = device
+    session.endpoint_in = FakeEndpoint()
+    return session
+
+
+def test_scan_sends_tin_scan_set_report():
+    device = FakeDevice([20.0 + ch for ch in range(8)])
+    session = make_session(device)
+    
+    session.read_channels([2, 3, 5])
+    
+    assert device.reports == [
+        (0x21, 0x09, 0x0200 | USB5203_TIN_SCAN, 0, bytes([USB5203_TIN_SCAN, 2, 5, 0, 0]))
+    ]
+    assert device.reads == [(0x81, 1 + 4 * 4)]
+
+
+def test_scan_unpacks_little_endian_floats():
+    values = [21.5, -3.25, 100.125, 0.0, 7.75, 8.5, 9.0, 1000.5]
+    session = make_session(FakeDevice(values))
+    
+    readings = session.read_channels([0, 1, 2, 7])
+    
+    assert readings == {0: 21.5, 1: -3.25, 2: 100.125, 7: 1000.5}
+
+
+def test_failed_transfer_returns_none_without_device():
+    session = make_session(FakeDevice([0.0] * 8, fail_reads=1))
+    
+    readings = session.read_channels([0, 1])
+    
+    assert readings == {0: None, 1: None}
+    assert not session.is_open
+
+
+def test_configure_thermocouples_programs_every_channel():
+    device = FakeDevice([0.0] * 8)
+    session = make_session(device, tc_type="j", num_channels=4)
+    
+    session.configure_thermocouples()
+    
+    requests = [report[4] for report in device.reports]
+    header = (0x21, 0x09, 0x0200 | USB5203_SET_ITEM, 0)
+    assert all(report[:4] == header for report in device.reports)
+    assert requests == [
+        bytes([USB5203_SET_ITEM, 0, USB5203_SENSOR_TYPE, 0, 0, 0, 0]),
+        bytes([USB5203_SET_ITEM, 1, USB5203_SENSOR_TYPE, 0, 0, 0, 0]),
+        bytes([USB5203_SET_ITEM, 0, USB5203_CH_0_TC, USB5203_TC_TYPES["J"], 0, 0, 0]),
+        bytes([USB5203_SET_ITEM, 0, USB5203_CH_0_TC + 1, USB5203_TC_TYPES["J"], 0, 0, 0]),
+        bytes([USB5203_SET_ITEM, 1, USB5203_CH_0_TC, USB5203_TC_TYPES["J"], 0, 0, 0]),
+        bytes([USB5203_SET_ITEM, 1, USB5203_CH_0_TC + 1, USB5203_TC_TYPES["J"], 0, 0, 0]),
+    ]
+
+
+def test_invalid_tc_type_is_rejected():
+    with pytest.raises(ValueError):
+        USB5203Session(tc_type="X")
+
+
+def test_group_stats_ignores_invalid_channels():
+    snapshot = DAQSnapshot.from_readings({0: 20.0, 1: 22.0, 2: None, 3: 30.0}, timestamp=1.0)
+    
+    stats = snapshot.group_stats([0, 1, 2])
+    
+    assert stats == {"average": 21.0, "min": 20.0, "max": 22.0, "spread": 2.0, "valid_count": 2}
+    assert snapshot.average([3]) == 30.0
+
+
+def test_group_stats_without_valid_readings():
+    snapshot = DAQSnapshot.from_readings({0: None, 1: None}, timestamp=1.0)
+    
+    stats = snapshot.group_stats([0, 1, 5])
+    
+    assert stats == {"average": None, "min": None, "max": None, "spread": None, "valid_count": 0}
+
+
+def test_snapshot_arrays_are_read_only():
+    snapshot = DAQSnapshot.from_readings({0: 20.0}, timestamp=1.0)
+    
+    with pytest.raises(ValueError):
+        snapshot.values[0] = 0.0
@@ -0,0 +1,88 @@
+"""
+Pruebas unitarias del formato binario de resultados y su conversión con CSV
+"""
+
+import csv
+
+import numpy as np
+import pytest
+
+from results_binary import BinaryResults, BinaryResultsFile, binary_to_csv, csv_to_binary
+from results_writer import CSVResultsFile
+
+FIELDNAMES = ["timestamp", "stream", "elapsed_time", "voltage", "current", "temp_evap_avg"]
+
+ROWS = [
+    {"timestamp": 1705314600.0, "stream": "temperatures", "elapsed_time": 0.0,
+     "temp_evap_avg": 25.125},
+    {"timestamp": 1705314600.5, "stream": "electrical", "elapsed_time": 0.5,
+     "voltage": 12.0, "current": 0.25},
+    {"timestamp": 1705314601.0, "stream": "temperatures", "elapsed_time": 1.0,
+     "temp_evap_avg": 25.5},
+]
+
+
+def write_csv(path):
+    sink = CSVResultsFile(path, FIELDNAMES)
+    for row in ROWS:
+        sink.write(row)
+    sink.close()
+
+
+def read_csv(path):
+    with open(path, newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def test_binary_file_is_read_back_by_column(tmp_path):
+    path = tmp_path / "results.lpr"
+    sink = BinaryResultsFile(
+        path, FIELDNAMES, categories={"stream": ["temperatures", "electrical"]},
+        metadata={"name": "prueba"}, chunk_rows=2
+    )
+    for row in ROWS:
+        sink.write(row)
+    sink.close()
+    
+    with BinaryResults(path) as results:
+        assert len(results) == 3
+        assert results.metadata == {"name": "prueba"}
+        assert results.labels("stream") == ["temperatures", "electrical", "temperatures"]
+        np.testing.assert_array_equal(results.mask("stream", "electrical"), [False, True, False])
+        np.testing.assert_allclose(results["temp_evap_avg"][[0, 2]], [25.125, 25.5])
+        assert np.isnan(results["voltage"][0])
+        assert results.as_array().shape == (3, len(FIELDNAMES))
+
+
+def test_truncated_final_record_is_ignored(tmp_path):
+    path = tmp_path / "results.lpr"
+    sink = BinaryResultsFile(path, ["voltage"])
+    sink.write({"voltage": 1.0})
+    sink.write({"voltage": 2.0})
+    sink.close()
+    with open(path, "ab") as f:
+        f.write(b"\x00\x01\x02")
+    
+    with BinaryResults(path) as results:
+        np.testing.assert_allclose(results["voltage"], [1.0, 2.0])
+
+
+def test_not_a_results_file(tmp_path):
+    path = tmp_path / "other.lpr"
+    path.write_bytes(b"not a results file")
+    
+    with pytest.raises(ValueError):
+        BinaryResults(path)
+
+
+def test_csv_binary_round_trip(tmp_path):
+    original = tmp_path / "results.csv"
+    write_csv(original)
+    
+    binary = csv_to_binary(original, chunk_rows=2)
+    restored = binary_to_csv(binary, tmp_path / "restored.csv")
+    
+    assert binary.suffix == ".lpr"
+    with BinaryResults(binary) as results:
+        assert results.categories == {"stream": ["temperatures", "electrical"]}
+    assert read_csv(restored) == read_csv(original)
@@ -0,0 +1,113 @@
+"""
+Pruebas unitarias del escritor diferido de resultados
+"""
+
+import csv
+import time
+
+import pytest
+
+from results_writer import CSVResultsFile, ResultsWriter
+
+
+class FailingSink:
+    """Archivo de resultados cuya escritura falla a partir de la fila fail_at"""
+    
+    path = "failing.csv"
+    
+    def __init__(self, fail_at=0):
+        self.fail_at = fail_at
+        self.rows = []
+        self.flushes = 0
+        self.closed = False
+    
+    def write(self, row):
+        if len(self.rows) >= self.fail_at:
+            raise OSError("disco lleno")
+        self.rows.append(row)
+    
+    def flush(self):
+        self.flushes += 1
+    
+    def fileno(self):
+        return -1
+    
+    def close(self):
+        self.closed = True
+
+
+def read_rows(path):
+    with open(path, newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def test_rows_are_formatted_and_flushed_every_n_rows(tmp_path):
+    path = tmp_path / "results.csv"
+    sink = CSVResultsFile(path, ["timestamp", "voltage", "current", "temp_evap_avg", "stream"])
+    
+    with ResultsWriter(sink, flush_rows=2, flush_interval=60.0, fsync=False) as writer:
+        for i in range(5):
+            writer.write({
+                "timestamp": 0.0, "voltage": 12.345, "current": 0.5, "stream": "electrical"
+            })
+    
+    rows = read_rows(path)
+    assert len(rows) == 5
+    assert rows[0]["voltage"] == "12.35"
+    assert rows[0]["current"] == "0.500"
+    assert rows[0]["temp_evap_avg"] == "N/A"
+    assert rows[0]["stream"] == "electrical"
+    # Dos volcados por filas (2 y 4) y el volcado final
+    assert writer.stats()["rows_written"] == 5
+    assert writer.stats()["flushes"] == 3
+
+
+def test_interval_flush_reaches_disk_before_close(tmp_path):
+    path = tmp_path / "results.csv"
+    writer = ResultsWriter(
+        CSVResultsFile(path, ["voltage"]), flush_rows=100, flush_interval=0.05, fsync=True
+    )
+    try:
+        writer.write({"voltage": 1.0})
+        time.sleep(0.3)
+        assert len(read_rows(path)) == 1
+    finally:
+        writer.close()
+
+
+def test_sink_error_is_raised_to_producer_and_file_closed():
+    sink = FailingSink(fail_at=1)
+    writer = ResultsWriter(sink, flush_rows=1, flush_interval=60.0, fsync=False)
+    
+    writer.write({"voltage": 1.0})
+    writer.write({"voltage": 2.0})
+    deadline = time.monotonic() + 2.0
+    while writer.error is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    
+    assert isinstance(writer.error, OSError)
+    with pytest.raises(OSError):
+        writer.write({"voltage": 3.0})
+    with pytest.raises(OSError):
+        writer.close()
+    assert sink.rows == [{"voltage": 1.0}]
+    assert sink.closed
+
+
+def test_context_exit_does_not_mask_caller_exception():
+    sink = FailingSink(fail_at=0)
+    
+    with pytest.raises(KeyError):
+        with ResultsWriter(sink, fsync=False) as writer:
+            writer.write({"voltage": 1.0})
+            raise KeyError("fallo del experimento")
+    
+    assert sink.closed
+
+
+def test_write_after_close_is_rejected(tmp_path):
+    writer = ResultsWriter(CSVResultsFile(tmp_path / "r.csv", ["voltage"]), fsync=False)
+    writer.close()
+    
+    with pytest.raises(ValueError):
+        writer.write({"voltage": 1.0})
@@ -0,0 +1,57 @@
+"""
+Pruebas unitarias del transporte SCPI asíncrono
+"""
+
+import asyncio
+
+import pytest
+
+from scpi_async import AsyncSCPIClient, _decode_line, _strip_telnet
+
+IAC = 0xFF
+
+
+def test_plain_line_is_decoded():
+    assert _decode_line(b"12.00\r\n") == "12.00"
+
+
+def test_two_byte_command_is_removed():
+    # IAC NOP, IAC GA
+    assert _strip_telnet(bytes([IAC, 0xF1]) + b"1" + bytes([IAC, 0xF9])) == b"1"
+
+
+def test_option_negotiation_is_removed():
+    # IAC WILL ECHO, IAC DO SUPPRESS-GO-AHEAD, IAC WONT 1, IAC DONT 3
+    raw = bytes([IAC, 0xFB, 0x01, IAC, 0xFD, 0x03]) + b"5.00" + bytes([IAC, 0xFC, 1, IAC, 0xFE, 3])
+    assert _decode_line(raw) == "5.00"
+
+
+def test_subnegotiation_block_is_skipped():
+    # IAC SB TERMINAL-TYPE SEND IAC SE, con un IAC IAC escapado dentro del bloque
+    raw = bytes([IAC, 0xFA, 0x18, 0x01, IAC, IAC, 0xF0, IAC, 0xF0]) + b"OK"
+    assert _strip_telnet(raw) == b"OK"
+
+
+def test_escaped_iac_is_literal_ff():
+    assert _strip_telnet(b"A" + bytes([IAC, IAC]) + b"B") == bytes([0x41, IAC, 0x42])
+
+
+def test_connect_closes_writer_when_banner_drain_fails():
+    async def scenario():
+        async def hang_up(reader, writer):
+            writer.close()
+        
+        server = await asyncio.start_server(hang_up, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        client = AsyncSCPIClient("127.0.0.1", port, timeout=1, settle_time=0.05)
+        try:
+            with pytest.raises(ConnectionError):
+                await client.connect()
+        finally:
+            server.close()
+            await server.wait_closed()
+        return client
+    
+    client = asyncio.run(scenario())
+    assert client._writer is None
+    assert not client.is_open
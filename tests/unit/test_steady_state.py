@@ -0,0 +1,112 @@
+"""
+Pruebas unitarias de la detección de régimen estacionario
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+from steady_state import RollingTrend, SteadyStateDetector
+
+
+def test_rolling_trend_matches_least_squares_over_window():
+    trend = RollingTrend(10.0)
+    times = np.arange(1000.0, 1100.0, 0.5)
+    values = 3.0 + 0.2 * times + np.sin(times)
+    for t, y in zip(times, values):
+        trend.add(t, y)
+    
+    in_window = times >= times[-1] - 10.0
+    assert trend.count == in_window.sum()
+    assert trend.slope() == pytest.approx(np.polyfit(times[in_window], values[in_window], 1)[0])
+    assert trend.std() == pytest.approx(values[in_window].std())
+
+
+def test_rolling_trend_needs_three_samples():
+    trend = RollingTrend(10.0)
+    assert trend.slope() is None and trend.std() is None
+    
+    trend.add(0.0, 1.0)
+    trend.add(1.0, 2.0)
+    assert trend.slope() is None
+    
+    trend.add(2.0, 3.0)
+    assert trend.slope() == pytest.approx(1.0)
+    
+    trend.reset()
+    assert trend.count == 0 and trend.span == 0.0
+
+
+def test_invalid_window():
+    with pytest.raises(ValueError):
+        RollingTrend(0)
+
+
+def feed(detector, times, evap, cond):
+    result = False
+    for t, e, c in zip(times, evap, cond):
+        result = detector.update(t, {"temp_evap_avg": e, "temp_cond_avg": c})
+    return result
+
+
+def test_steady_when_all_signals_flat_over_full_window():
+    detector = SteadyStateDetector(window=10.0, slope_threshold=0.05)
+    times = np.arange(0.0, 12.0, 1.0)
+    
+    assert feed(detector, times, np.full(12, 60.0), np.full(12, 30.0))
+    assert detector.steady_since == 10.0
+    assert detector.status()["temp_evap_avg"]["slope"] == 0.0
+
+
+def test_not_steady_before_window_is_covered():
+    detector = SteadyStateDetector(window=10.0, slope_threshold=0.05, min_samples=3)
+    times = np.arange(0.0, 9.0, 1.0)
+    
+    assert not feed(detector, times, np.full(9, 60.0), np.full(9, 30.0))
+
+
+def test_not_steady_with_too_few_samples_in_window():
+    # Ventana cubierta con 3 muestras a 60 s: la pendiente no es fiable
+    detector = SteadyStateDetector(window=120.0, slope_threshold=0.05)
+    times = [0.0, 60.0, 120.0, 180.0]
+    
+    assert not feed(detector, times, [60.0] * 4, [30.0] * 4)
+    
+    relaxed = SteadyStateDetector(window=120.0, slope_threshold=0.05, min_samples=3)
+    assert feed(relaxed, times, [60.0] * 4, [30.0] * 4)
+
+
+def test_one_signal_drifting_blocks_steady_state():
+    detector = SteadyStateDetector(window=10.0, slope_threshold=0.05)
+    times = np.arange(0.0, 20.0, 1.0)
+    # 0.1 °C/s = 6 °C/min en el evaporador
+    assert not feed(detector, times, 60.0 + 0.1 * times, np.full(20, 30.0))
+    assert detector.steady_since is None
+
+
+def test_std_threshold_and_missing_values():
+    detector = SteadyStateDetector(window=10.0, slope_threshold=1.0, std_threshold=0.1)
+    times = np.arange(0.0, 20.0, 0.5)
+    noisy = 60.0 + np.where(np.arange(len(times)) % 2, 0.5, -0.5)
+    cond = [math.nan if i % 5 == 0 else 30.0 for i in range(len(times))]
+    
+    assert not feed(detector, times, noisy, cond)
+    status = detector.status()
+    assert status["temp_evap_avg"]["std"] == pytest.approx(0.5, abs=0.01)
+    assert status["temp_cond_avg"]["samples"] < status["temp_evap_avg"]["samples"]
+
+
+def test_reset_clears_windows():
+    detector = SteadyStateDetector(window=10.0)
+    feed(detector, np.arange(0.0, 12.0, 1.0), np.full(12, 60.0), np.full(12, 30.0))
+    
+    detector.reset()
+    
+    assert detector.steady_since is None
+    assert detector.status()["temp_evap_avg"]["samples"] == 0
+
+
+def test_min_samples_lower_bound():
+    with pytest.raises(ValueError):
+        SteadyStateDetector(min_samples=2)
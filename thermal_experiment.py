@@ -5,19 +5,27 @@ Instituto Tecnológico Metropolitano (ITM) - Medellín, Colombia
 """
 
 import logging
+import threading
 import time
-import csv
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import Callable, List, Optional, Dict, Tuple, Union
 import math
 
-from fuente_xln import FuenteXLN
-from daq_usb5203 import DAQUSB5203
+from acquisition_scheduler import MultiRateScheduler
+from fuente_xln import FuenteXLN, PROTECTION_MASK
+from daq_usb5203 import DAQUSB5203, DAQDeviceGroup, DAQSnapshot
 from relay_controller import RelayController
+from results_binary import BINARY_SUFFIX, BinaryResultsFile
+from results_writer import CSVResultsFile, ResultsWriter
+from steady_state import SteadyStateDetector
+from daq_sampler import DAQSampler
 
 logger = logging.getLogger(__name__)
 
+STREAMS = ("temperatures", "electrical", "protections")
+RESULTS_LAYOUTS = ("split", "merged")
+
 
 class ThermalExperiment:
     """Controlador de experimentos térmicos automatizados"""
@@ -25,25 +33,53 @@ class ThermalExperiment:
     def __init__(
         self,
         fuente: FuenteXLN,
-        daq: DAQUSB5203,
+        daq: Union[DAQUSB5203, DAQDeviceGroup],
         relay: RelayController,
-        results_dir: Path
+        results_dir: Path,
+        sampler: Optional[DAQSampler] = None,
+        results_flush_rows: int = 50,
+        results_flush_interval: float = 5.0,
+        results_fsync: bool = True,
+        results_format: str = "csv",
+        results_layout: str = "split"
     ):
         """
         Inicializa experimento térmico
         
         Args:
             fuente: Instancia de FuenteXLN
-            daq: Instancia de DAQUSB5203
+            daq: Instancia de DAQUSB5203 o DAQDeviceGroup
             relay: Instancia de RelayController
             results_dir: Directorio para guardar resultados
+            sampler: Muestreador compartido; si está activo las temperaturas
+                se toman de su buffer en lugar de leer el DAQ
+            results_flush_rows: Filas pendientes que fuerzan un volcado del CSV
+            results_flush_interval: Segundos máximos entre volcados del CSV
+            results_fsync: Forzar escritura física en cada volcado
+            results_format: "csv" (texto) o "binary" (registros float64, ver results_binary)
+            results_layout: "split" (una fila por muestra de cada flujo, columna stream)
+                o "merged" (columnas anteriores sin stream; cada fila lleva el último
+                valor conocido de cada flujo)
         """
         self.fuente = fuente
         self.daq = daq
+        self.sampler = sampler
         self.relay = relay
         self.results_dir = results_dir
+        self.results_flush_rows = results_flush_rows
+        self.results_flush_interval = results_flush_interval
+        self.results_fsync = results_fsync
+        if results_format not in ("csv", "binary"):
+            raise ValueError(f"Formato de resultados no soportado: {results_format}")
+        self.results_format = results_format
+        if results_layout not in RESULTS_LAYOUTS:
+            raise ValueError(f"Disposición de resultados no soportada: {results_layout}")
+        self.results_layout = results_layout
         self.is_running = False
         self.current_experiment = None
+        self.abort_reason: Optional[str] = None
+        self._abort = threading.Event()
+        self._scheduler: Optional[MultiRateScheduler] = None
         
         logger.info("ThermalExperiment inicializado")
     
@@ -100,6 +136,159 @@ class ThermalExperiment:
         
         return r_thermal
     
+    def abort(self, reason: str = "Abortado"):
+        """
+        Aborta el experimento en curso (lo atiende el bucle en su próxima espera)
+        
+        Args:
+            reason: Motivo registrado en los resultados
+        """
+        if self.is_running and not self._abort.is_set():
+            self.abort_reason = reason
+            self._abort.set()
+            scheduler = self._scheduler
+            if scheduler is not None:
+                scheduler.stop()
+            logger.warning(f"Abortando experimento: {reason}")
+    
+    def read_temperatures(self) -> Tuple[DAQSnapshot, DAQSnapshot]:
+        """
+        Obtiene el escaneo de temperaturas más reciente
+        
+        Returns:
+            Tupla (snapshot crudo, snapshot filtrado). Sin muestreador activo o
+            sin filtros configurados ambos son el mismo escaneo.
+        """
+        if self.sampler is not None and self.sampler.is_running:
+            return self.sampler.latest_pair()
+        snapshot = self.daq.read_snapshot()
+        return snapshot, snapshot
+    
+    def _acquire_level(
+        self,
+        power_w: float,
+        duration: float,
+        rates: Dict[str, float],
+        evaporator_channels: List[int],
+        condenser_channels: List[int],
+        record: Callable[[str, float, float, dict], None],
+        results: Dict,
+        detector: Optional[SteadyStateDetector] = None,
+        min_hold: float = 0.0
+    ) -> Dict[str, dict]:
+        """
+        Adquiere un nivel de potencia con un flujo independiente por medición
+        
+        Temperaturas, mediciones eléctricas y protecciones corren cada una en
+        su propio hilo y a su propio periodo; un disparo de protección
+        termina el nivel. Con detector, un flujo más ("steady_state", periodo
+        rates["steady_state"]) evalúa las temperaturas filtradas y termina el
+        nivel cuando alcanzan el régimen estacionario tras min_hold segundos.
+        
+        Args:
+            power_w: Potencia del nivel (W)
+            duration: Duración del nivel (s)
+            rates: Periodo de cada flujo (s), claves de STREAMS y "steady_state" con detector
+            evaporator_channels: Canales del evaporador
+            condenser_channels: Canales del condensador
+            record: Función (flujo, programado, real, valores) que registra una fila
+            results: Resultados del experimento (se agregan los errores)
+            detector: Criterio de régimen estacionario (None = duración fija)
+            min_hold: Permanencia mínima antes de aceptar el régimen (s)
+            
+        Returns:
+            Estadísticas de cada flujo (ejecuciones y plazos omitidos)
+        """
+        scheduler = MultiRateScheduler()
+        trip_lock = threading.Lock()
+        level_start = time.monotonic()
+        if detector is not None:
+            detector.reset()
+        
+        def trip(status: str):
+            with trip_lock:
+                if scheduler.is_stopped:
+                    return
+                scheduler.stop()
+            error_msg = f"Protección activada: {status}"
+            logger.warning(error_msg)
+            results["errors"].append(error_msg)
+        
+        def sample_temperatures(scheduled: float, actual: float):
+            temps_raw, temps = self.read_temperatures()
+            
+            temp_evap_avg = temps.average(evaporator_channels)
+            temp_cond_avg = temps.average(condenser_channels)
+            temp_evap_avg_raw = temps_raw.average(evaporator_channels)
+            temp_cond_avg_raw = temps_raw.average(condenser_channels)
+            
+            r_thermal = None
+            if temp_evap_avg is not None and temp_cond_avg is not None and power_w > 0:
+                r_thermal = self.calculate_thermal_resistance(temp_evap_avg, temp_cond_avg, power_w)
+            
+            r_thermal_raw = None
+            if temp_evap_avg_raw is not None and temp_cond_avg_raw is not None and power_w > 0:
+                r_thermal_raw = self.calculate_thermal_resistance(
+                    temp_evap_avg_raw, temp_cond_avg_raw, power_w
+                )
+            
+            record("temperatures", scheduled, actual, {
+                "power_level": power_w,
+                **{f"temp_evap_ch{ch}": temps.get(ch) for ch in evaporator_channels},
+                **{f"temp_cond_ch{ch}": temps.get(ch) for ch in condenser_channels},
+                "temp_evap_avg": temp_evap_avg,
+                "temp_cond_avg": temp_cond_avg,
+                "r_thermal": r_thermal,
+                "temp_evap_avg_raw": temp_evap_avg_raw,
+                "temp_cond_avg_raw": temp_cond_avg_raw,
+                "r_thermal_raw": r_thermal_raw
+            })
+        
+        def evaluate_steady_state(scheduled: float, actual: float):
+            _, temps = self.read_temperatures()
+            steady = detector.update(actual, {
+                "temp_evap_avg": temps.average(evaporator_channels),
+                "temp_cond_avg": temps.average(condenser_channels)
+            })
+            if steady and actual - level_start >= min_hold:
+                logger.info(
+                    f"Régimen estacionario a {power_w}W tras {actual - level_start:.0f}s: "
+                    f"{detector.status()}"
+                )
+                scheduler.stop()
+        
+        def sample_electrical(scheduled: float, actual: float):
+            fuente_state = self.fuente.read_state()
+            record("electrical", scheduled, actual, {
+                "power_level": power_w,
+                "voltage": fuente_state["voltage"] if fuente_state else None,
+                "current": fuente_state["current"] if fuente_state else None
+            })
+            if fuente_state and fuente_state["protections"]["status"] != "ok":
+                trip(fuente_state["protections"]["status"])
+        
+        def check_protections(scheduled: float, actual: float):
+            status = self.fuente.read_questionable()
+            if status is not None and status & PROTECTION_MASK:
+                trip(self.fuente.decode_protections(status)["status"])
+        
+        scheduler.add("temperatures", rates["temperatures"], sample_temperatures)
+        scheduler.add("electrical", rates["electrical"], sample_electrical)
+        scheduler.add("protections", rates["protections"], check_protections)
+        if detector is not None:
+            scheduler.add("steady_state", rates["steady_state"], evaluate_steady_state)
+        
+        # Publicar el planificador antes de comprobar el aborto: abort() lo detiene
+        # o run() no arranca
+        self._scheduler = scheduler
+        try:
+            if not self._abort.is_set():
+                scheduler.run(duration, level_start)
+        finally:
+            self._scheduler = None
+        
+        return scheduler.stats()
+    
     def run_experiment(
         self,
         power_levels: List[float],
@@ -108,19 +297,44 @@ class ThermalExperiment:
         resistance_ohm: float = 10.0,
         evaporator_channels: List[int] = [0, 1, 2, 3],
         condenser_channels: List[int] = [4, 5, 6, 7],
-        enable_pump: bool = True
+        enable_pump: bool = True,
+        ramp_time: float = 0.0,
+        temperature_rate: Optional[float] = None,
+        electrical_rate: Optional[float] = None,
+        protection_rate: Optional[float] = None,
+        steady_state: bool = False,
+        steady_window: float = 120.0,
+        steady_slope: float = 0.05,
+        steady_std: Optional[float] = None,
+        min_hold: float = 120.0,
+        steady_rate: Optional[float] = None,
+        steady_min_samples: int = 10
     ) -> Dict:
         """
         Ejecuta experimento térmico completo
         
         Args:
             power_levels: Lista de niveles de potencia (W)
-            duration_per_level: Duración de cada nivel (segundos)
-            sample_rate: Intervalo entre muestras (segundos)
+            duration_per_level: Duración de cada nivel (segundos); con steady_state es la
+                permanencia máxima
+            sample_rate: Intervalo entre muestras por defecto de cada flujo (segundos)
             resistance_ohm: Resistencia de la carga (Ω)
             evaporator_channels: Canales del evaporador
             condenser_channels: Canales del condensador
             enable_pump: Activar bomba de fluido
+            ramp_time: Duración de la rampa de voltaje desde 0 V al inicio de cada nivel (s);
+                0 = escalón
+            temperature_rate: Periodo de las temperaturas (s); None = sample_rate
+            electrical_rate: Periodo de voltaje/corriente (s); None = sample_rate
+            protection_rate: Periodo de la consulta de protecciones (s); None = sample_rate
+            steady_state: Avanzar de nivel al alcanzar el régimen estacionario
+            steady_window: Ventana de evaluación del régimen (s)
+            steady_slope: Pendiente máxima de temp_evap_avg y temp_cond_avg (°C/min)
+            steady_std: Desviación estándar máxima en la ventana (°C); None = no se evalúa
+            min_hold: Permanencia mínima en cada nivel antes de aceptar el régimen (s)
+            steady_rate: Periodo de evaluación del régimen sobre las temperaturas
+                filtradas (s); None = periodo del muestreador (o temperature_rate sin él)
+            steady_min_samples: Muestras mínimas en la ventana antes de aceptar el régimen
             
         Returns:
             Diccionario con resultados del experimento
@@ -130,21 +344,55 @@ class ThermalExperiment:
             return {"status": "error", "message": "Experimento ya en ejecución"}
         
         self.is_running = True
+        self._abort.clear()
+        self.abort_reason = None
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         experiment_name = f"thermal_experiment_{timestamp}"
-        csv_path = self.results_dir / f"{experiment_name}.csv"
+        binary = self.results_format == "binary"
+        results_path = self.results_dir / f"{experiment_name}{BINARY_SUFFIX if binary else '.csv'}"
         
         logger.info(f"Iniciando experimento: {experiment_name}")
         logger.info(f"Niveles de potencia: {power_levels}W")
         logger.info(f"Duración por nivel: {duration_per_level}s")
-        logger.info(f"Frecuencia de muestreo: {sample_rate}s")
+        rates = {
+            "temperatures": temperature_rate or sample_rate,
+            "electrical": electrical_rate or sample_rate,
+            "protections": protection_rate or sample_rate
+        }
+        logger.info(f"Periodos de muestreo: {rates}")
+        
+        detector = None
+        if steady_state:
+            detector = SteadyStateDetector(
+                window=steady_window,
+                slope_threshold=steady_slope,
+                std_threshold=steady_std,
+                min_samples=steady_min_samples
+            )
+            # El criterio sigue al flujo filtrado del muestreador, no al periodo de registro
+            if steady_rate is None:
+                steady_rate = (
+                    self.sampler.period if self.sampler is not None else rates["temperatures"]
+                )
+            rates["steady_state"] = steady_rate
+            logger.info(
+                f"Régimen estacionario: ventana {steady_window}s cada {steady_rate}s "
+                f"(mínimo {steady_min_samples} muestras), "
+                f"pendiente ≤ {steady_slope}°C/min, "
+                f"permanencia {min_hold}-{duration_per_level}s"
+            )
         
         results = {
             "status": "in_progress",
             "name": experiment_name,
-            "csv_file": str(csv_path),
+            "binary_file" if binary else "csv_file": str(results_path),
             "power_levels": power_levels,
             "samples_collected": 0,
+            "missed_samples": 0,
+            "levels": [],
+            "streams": {
+                name: {"period": rate, "runs": 0, "missed": 0} for name, rate in rates.items()
+            },
             "errors": []
         }
         
@@ -152,21 +400,70 @@ class ThermalExperiment:
             if enable_pump:
                 self.relay.activate_relay("RELAY_1")
                 logger.info("Bomba de fluido activada")
-                time.sleep(5)
+                self._abort.wait(5)
+            
+            merged = self.results_layout == "merged"
+            fieldnames = (
+                ["timestamp"] + ([] if merged else ["stream"]) +
+                ["scheduled_time", "elapsed_time", "power_level"] +
+                ["voltage", "current"] +
+                [f"temp_evap_ch{ch}" for ch in evaporator_channels] +
+                [f"temp_cond_ch{ch}" for ch in condenser_channels] +
+                ["temp_evap_avg", "temp_cond_avg", "r_thermal"] +
+                ["temp_evap_avg_raw", "temp_cond_avg_raw", "r_thermal_raw"]
+            )
             
-            with open(csv_path, 'w', newline='') as csvfile:
-                fieldnames = [
-                    "timestamp", "elapsed_time", "power_level", "voltage", "current",
-                    "temp_evap_ch0", "temp_evap_ch1", "temp_evap_ch2", "temp_evap_ch3",
-                    "temp_cond_ch4", "temp_cond_ch5", "temp_cond_ch6", "temp_cond_ch7",
-                    "temp_evap_avg", "temp_cond_avg", "r_thermal"
-                ]
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
+            # Las filas se encolan con valores crudos; formato y escritura ocurren en el
+            # hilo del escritor. En "split" cada flujo escribe sólo sus columnas y el resto
+            # queda en "N/A" (NaN en binario); en "merged" se repite el último valor
+            if binary:
+                sink = BinaryResultsFile(
+                    results_path,
+                    fieldnames,
+                    categories={} if merged else {"stream": list(STREAMS)},
+                    metadata={
+                        "name": experiment_name,
+                        "evaporator_channels": evaporator_channels,
+                        "condenser_channels": condenser_channels,
+                        "power_levels": power_levels,
+                        "resistance_ohm": resistance_ohm,
+                        "rates": rates
+                    }
+                )
+            else:
+                sink = CSVResultsFile(results_path, fieldnames)
+            
+            with ResultsWriter(
+                sink,
+                flush_rows=self.results_flush_rows,
+                flush_interval=self.results_flush_interval,
+                fsync=self.results_fsync
+            ) as writer:
+                count_lock = threading.Lock()
+                last_values: Dict[str, object] = {}
+                
+                # Plazos en reloj monotónico; la hora civil sólo se deriva para el registro
+                experiment_start = time.monotonic()
+                wall_start = time.time()
                 
-                experiment_start = time.time()
+                def record(stream: str, scheduled: float, actual: float, values: dict):
+                    row = {
+                        "timestamp": wall_start + actual - experiment_start,
+                        "scheduled_time": scheduled - experiment_start,
+                        "elapsed_time": actual - experiment_start
+                    }
+                    with count_lock:
+                        if merged:
+                            last_values.update(values)
+                            writer.write({**row, **last_values})
+                        else:
+                            writer.write({**row, "stream": stream, **values})
+                        results["samples_collected"] += 1
                 
                 for level_idx, power_w in enumerate(power_levels):
+                    if self._abort.is_set():
+                        break
+                    
                     logger.info(f"=== Nivel {level_idx + 1}/{len(power_levels)}: {power_w}W ===")
                     
                     voltage, current = self.calculate_power_settings(power_w, resistance_ohm)
@@ -177,100 +474,90 @@ class ThermalExperiment:
                         results["errors"].append(error_msg)
                         continue
                     
-                    if not self.fuente.set_voltage(voltage):
+                    # Consignas disparadas sin esperar lectura; se verifican juntas antes
+                    # de activar la salida
+                    if not self.fuente.set_voltage(0.0 if ramp_time > 0 else voltage, verify=False):
                         error_msg = f"Error configurando voltaje: {voltage}V"
                         logger.error(error_msg)
                         results["errors"].append(error_msg)
                         continue
                     
-                    if not self.fuente.set_current(current * 1.1):
+                    if not self.fuente.set_current(current * 1.1, verify=False):
                         error_msg = f"Error configurando corriente: {current}A"
                         logger.error(error_msg)
                         results["errors"].append(error_msg)
                         continue
                     
+                    if not self.fuente.verify_setpoints():
+                        error_msg = f"Consignas no verificadas: {voltage}V / {current * 1.1}A"
+                        logger.error(error_msg)
+                        results["errors"].append(error_msg)
+                        continue
+                    
                     if not self.fuente.output_on():
                         error_msg = "Error activando salida de fuente"
                         logger.error(error_msg)
                         results["errors"].append(error_msg)
                         continue
                     
-                    level_start = time.time()
-                    sample_count = 0
+                    if ramp_time > 0 and not self.fuente.ramp_to(voltage, duration=ramp_time):
+                        ramp_error = self.fuente.ramp.status()["error"]
+                        error_msg = f"Rampa a {voltage}V no completada: {ramp_error}"
+                        logger.error(error_msg)
+                        results["errors"].append(error_msg)
+                        self.fuente.output_off()
+                        continue
                     
-                    while (time.time() - level_start) < duration_per_level:
-                        sample_start = time.time()
-                        
-                        voltage_meas = self.fuente.measure_voltage()
-                        current_meas = self.fuente.measure_current()
-                        
-                        temps = self.daq.read_all_channels()
-                        
-                        temp_evap_list = [temps.get(ch) for ch in evaporator_channels if temps.get(ch) is not None]
-                        temp_cond_list = [temps.get(ch) for ch in condenser_channels if temps.get(ch) is not None]
-                        
-                        temp_evap_avg = sum(temp_evap_list) / len(temp_evap_list) if temp_evap_list else None
-                        temp_cond_avg = sum(temp_cond_list) / len(temp_cond_list) if temp_cond_list else None
-                        
-                        r_thermal = None
-                        if temp_evap_avg and temp_cond_avg and power_w > 0:
-                            r_thermal = self.calculate_thermal_resistance(temp_evap_avg, temp_cond_avg, power_w)
-                        
-                        elapsed = time.time() - experiment_start
-                        
-                        row = {
-                            "timestamp": datetime.now().isoformat(),
-                            "elapsed_time": f"{elapsed:.2f}",
-                            "power_level": power_w,
-                            "voltage": f"{voltage_meas:.2f}" if voltage_meas else "N/A",
-                            "current": f"{current_meas:.3f}" if current_meas else "N/A",
-                            "temp_evap_ch0": f"{temps.get(0):.2f}" if temps.get(0) else "N/A",
-                            "temp_evap_ch1": f"{temps.get(1):.2f}" if temps.get(1) else "N/A",
-                            "temp_evap_ch2": f"{temps.get(2):.2f}" if temps.get(2) else "N/A",
-                            "temp_evap_ch3": f"{temps.get(3):.2f}" if temps.get(3) else "N/A",
-                            "temp_cond_ch4": f"{temps.get(4):.2f}" if temps.get(4) else "N/A",
-                            "temp_cond_ch5": f"{temps.get(5):.2f}" if temps.get(5) else "N/A",
-                            "temp_cond_ch6": f"{temps.get(6):.2f}" if temps.get(6) else "N/A",
-                            "temp_cond_ch7": f"{temps.get(7):.2f}" if temps.get(7) else "N/A",
-                            "temp_evap_avg": f"{temp_evap_avg:.2f}" if temp_evap_avg else "N/A",
-                            "temp_cond_avg": f"{temp_cond_avg:.2f}" if temp_cond_avg else "N/A",
-                            "r_thermal": f"{r_thermal:.4f}" if r_thermal else "N/A"
-                        }
-                        
-                        writer.writerow(row)
-                        csvfile.flush()
-                        
-                        sample_count += 1
-                        results["samples_collected"] += 1
-                        
-                        protections = self.fuente.check_protections()
-                        if protections["status"] != "ok":
-                            error_msg = f"Protección activada: {protections['status']}"
-                            logger.warning(error_msg)
-                            results["errors"].append(error_msg)
-                            break
-                        
-                        elapsed_sample = time.time() - sample_start
-                        sleep_time = max(0, sample_rate - elapsed_sample)
-                        
-                        if sleep_time > 0:
-                            time.sleep(sleep_time)
+                    # Sin arrastrar lecturas del nivel anterior a las filas combinadas
+                    with count_lock:
+                        last_values.clear()
+                    level_start = time.monotonic()
+                    stats = self._acquire_level(
+                        power_w,
+                        duration_per_level,
+                        rates,
+                        evaporator_channels,
+                        condenser_channels,
+                        record,
+                        results,
+                        detector,
+                        min_hold
+                    )
+                    results["levels"].append({
+                        "power": power_w,
+                        "duration": round(time.monotonic() - level_start, 2),
+                        "steady": detector is not None and detector.steady_since is not None,
+                        "steady_state": detector.status() if detector is not None else None
+                    })
+                    for name, stream_stats in stats.items():
+                        results["streams"][name]["runs"] += stream_stats["runs"]
+                        results["streams"][name]["missed"] += stream_stats["missed"]
+                        results["missed_samples"] += stream_stats["missed"]
                     
-                    logger.info(f"Nivel {power_w}W completado: {sample_count} muestras")
+                    logger.info(
+                        f"Nivel {power_w}W completado: "
+                        f"{stats['temperatures']['runs']} muestras de temperatura, "
+                        f"{stats['electrical']['runs']} eléctricas"
+                    )
                     
                     self.fuente.output_off()
-                    time.sleep(2)
+            
+            results["writer"] = writer.stats()
             
             if enable_pump:
                 self.relay.deactivate_relay("RELAY_1")
                 logger.info("Bomba de fluido desactivada")
             
-            results["status"] = "completed"
-            total_time = time.time() - experiment_start
+            if self._abort.is_set():
+                results["status"] = "aborted"
+                results["errors"].append(self.abort_reason)
+            else:
+                results["status"] = "completed"
+            total_time = time.monotonic() - experiment_start
             results["total_time"] = f"{total_time:.2f}s"
             
             logger.info(f"Experimento completado: {results['samples_collected']} muestras en {total_time:.2f}s")
-            logger.info(f"Resultados guardados en: {csv_path}")
+            logger.info(f"Resultados guardados en: {results_path}")
             
         except KeyboardInterrupt:
             logger.warning("Experimento interrumpido por usuario")
@@ -0,0 +1,237 @@
+"""
+Emulador TCP de la fuente BK Precision XLN30052
+Atiende el subconjunto SCPI de fuente_xln.py en el puerto 5024 con latencia,
+desconexiones y disparos de protección configurables
+Instituto Tecnológico Metropolitano (ITM) - Medellín, Colombia
+
+Uso:
+    python xln_emulator.py --port 5024 --latency 0.005 --drop-rate 0.01
+    XLN_HOST=127.0.0.1 python labpipanel.py
+"""
+
+import argparse
+import asyncio
+import logging
+from typing import Optional, Set
+
+from scpi_async import EventLoopThread
+from simulation import LatencyProfile, XLNInstrumentModel
+
+logger = logging.getLogger(__name__)
+
+PROTECTION_TRIP_BITS = {
+    "ovp": 0x01,
+    "ocp": 0x02,
+    "opp": 0x04
+}
+
+
+class XLNEmulator:
+    """
+    Servidor SCPI sobre TCP que responde como una XLN30052
+    
+    Todas las conexiones comparten un único XLNInstrumentModel, igual que
+    los clientes de una fuente real comparten su estado.
+    """
+    
+    def __init__(
+        self,
+        host: str = "0.0.0.0",
+        port: int = 5024,
+        instrument: Optional[XLNInstrumentModel] = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        drop_rate: float = 0.0,
+        trip_after: Optional[float] = None,
+        trip_bits: int = 0x01,
+        banner: Optional[str] = None,
+        seed: Optional[int] = None
+    ):
+        """
+        Inicializa el emulador (no abre el puerto)
+        
+        Args:
+            host: Interfaz de escucha
+            port: Puerto TCP (0 = puerto libre asignado por el sistema)
+            instrument: Modelo SCPI (por defecto carga resistiva de 10 Ω)
+            latency: Retardo fijo de cada respuesta (s)
+            jitter: Retardo adicional uniforme máximo (s)
+            drop_rate: Probabilidad de cerrar la conexión al recibir un comando (0-1)
+            trip_after: Segundos desde el arranque para forzar un disparo de protección
+            trip_bits: Bits del disparo forzado (OVP=0x01, OCP=0x02, OPP=0x04)
+            banner: Línea de saludo enviada al conectar
+            seed: Semilla para latencia y desconexiones reproducibles
+        """
+        self.host = host
+        self.port = port
+        self.instrument = instrument or XLNInstrumentModel()
+        self.profile = LatencyProfile(latency, jitter, drop_rate, seed)
+        self.trip_after = trip_after
+        self.trip_bits = trip_bits
+        self.banner = banner
+        
+        self.commands_served = 0
+        self.connections_dropped = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._clients: Set[asyncio.StreamWriter] = set()
+        self._loop_thread: Optional[EventLoopThread] = None
+    
+    async def start_server(self) -> int:
+        """
+        Abre el puerto en el bucle actual
+        
+        Returns:
+            Puerto de escucha efectivo
+        """
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        
+        if self.trip_after is not None:
+            asyncio.get_running_loop().call_later(self.trip_after, self.trip)
+        
+        logger.info(f"Emulador XLN30052 escuchando en {self.host}:{self.port}")
+        return self.port
+    
+    async def close_server(self):
+        """Cierra el puerto y las conexiones abiertas"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for writer in list(self._clients):
+            writer.close()
+    
+    async def serve_forever(self):
+        """Atiende clientes hasta que se cancele la tarea"""
+        await self.start_server()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close_server()
+    
+    def start(self) -> int:
+        """
+        Arranca el emulador en un hilo propio (para pruebas y mediciones)
+        
+        Returns:
+            Puerto de escucha efectivo
+        """
+        self._loop_thread = EventLoopThread(name="xln-emulator")
+        return self._loop_thread.run(self.start_server())
+    
+    def stop(self):
+        """Detiene el emulador arrancado con start()"""
+        if self._loop_thread is not None:
+            self._loop_thread.run(self.close_server())
+            self._loop_thread = None
+    
+    def trip(self, bits: Optional[int] = None):
+        """Fuerza un disparo de protección (apaga la salida)"""
+        bits = self.trip_bits if bits is None else bits
+        self.instrument.trip(bits)
+        logger.warning(f"Emulador: disparo de protección forzado (0x{bits:02X})")
+    
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Atiende una conexión: una línea SCPI por comando, respuestas en orden"""
+        peer = writer.get_extra_info("peername")
+        self._clients.add(writer)
+        logger.info(f"Emulador: cliente conectado {peer}")
+        
+        try:
+            if self.banner:
+                writer.write((self.banner + "\r\n").encode("ascii"))
+                await writer.drain()
+            
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                line = raw.decode("ascii", errors="ignore").strip()
+                if not line:
+                    continue
+                
+                if self.profile.should_fail():
+                    self.connections_dropped += 1
+                    logger.warning(f"Emulador: conexión {peer} cortada al recibir '{line}'")
+                    break
+                
+                delay = self.profile.sample_delay()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                
+                try:
+                    response = self.instrument.handle(line)
+                except ValueError as e:
+                    # Como la fuente real: el comando inválido no produce respuesta
+                    logger.warning(f"Emulador: {e}")
+                    continue
+                
+                self.commands_served += 1
+                if response is not None:
+                    writer.write((response + "\n").encode("ascii"))
+                    await writer.drain()
+        except (ConnectionError, OSError) as e:
+            logger.info(f"Emulador: conexión {peer} perdida: {e}")
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+            logger.info(f"Emulador: cliente desconectado {peer}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Emulador TCP de la fuente BK Precision XLN30052")
+    parser.add_argument("--host", default="0.0.0.0", help="Interfaz de escucha")
+    parser.add_argument("--port", type=int, default=5024, help="Puerto TCP")
+    parser.add_argument("--latency", type=float, default=0.0, help="Retardo fijo por respuesta (s)")
+    parser.add_argument(
+        "--jitter", type=float, default=0.0, help="Retardo adicional uniforme máximo (s)"
+    )
+    parser.add_argument(
+        "--drop-rate", type=float, default=0.0,
+        help="Probabilidad de cortar la conexión por comando"
+    )
+    parser.add_argument(
+        "--trip-after", type=float, default=None,
+        help="Segundos hasta forzar un disparo de protección"
+    )
+    parser.add_argument(
+        "--trip", choices=sorted(PROTECTION_TRIP_BITS), default="ovp",
+        help="Protección del disparo forzado"
+    )
+    parser.add_argument("--load", type=float, default=10.0, help="Resistencia de carga (Ω)")
+    parser.add_argument(
+        "--noise", type=float, default=0.0, help="Ruido de medición (fracción del valor)"
+    )
+    parser.add_argument("--banner", default=None, help="Línea de saludo al conectar")
+    parser.add_argument(
+        "--seed", type=int, default=None, help="Semilla para latencia y desconexiones"
+    )
+    args = parser.parse_args()
+    
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    
+    emulator = XLNEmulator(
+        args.host,
+        args.port,
+        XLNInstrumentModel(
+            load_ohm=args.load, noise=args.noise, profile=LatencyProfile(seed=args.seed)
+        ),
+        latency=args.latency,
+        jitter=args.jitter,
+        drop_rate=args.drop_rate,
+        trip_after=args.trip_after,
+        trip_bits=PROTECTION_TRIP_BITS[args.trip],
+        banner=args.banner,
+        seed=args.seed
+    )
+    
+    try:
+        asyncio.run(emulator.serve_forever())
+    except KeyboardInterrupt:
+        logger.info("Emulador detenido")
+
+
+if __name__ == "__main__":
+    main()